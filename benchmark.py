@@ -0,0 +1,283 @@
+"""Мікробенчмарки обробників бота на синтетичних даних.
+
+Створює файли user_N.txt із заданою кількістю користувачів і записів, підміняє
+сховище в main на сховище з цими даними та викликає справжні обробники з
+імітацією Update/CallbackQuery/Context, які лише запам'ятовують відповіді.
+Для кожної операції друкує p50/p99 затримки, пікову пам'ять (tracemalloc)
+і байти, прочитані та записані процесом (/proc/self/io).
+
+Використання:
+    python benchmark.py --users 1000 --records 10 1000 100000 --save baseline.json
+    python benchmark.py --users 1000 --records 10 1000 100000 --compare baseline.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import main
+from cache import CachedBirthdayStore, RecordCache
+from keyboards import count_pages
+from records import Birthday, MONTHS
+from reminders import CalendarIndex
+from storage import FileBirthdayStore
+
+# Номери повідомлень, які «надсилають» замінники
+MESSAGE_IDS = itertools.count(1)
+
+NAMES = ("Олександр", "Марія", "Іван", "Оксана", "Петро", "Наталія", "Андрій", "Ірина", "Тарас", "Олена")
+
+
+class StubMessage:
+    """Замінник telegram.Message: відповіді записуються в replies"""
+
+    def __init__(self, user_id: int, text: str | None, replies: list):
+        self.from_user = SimpleNamespace(id=user_id, mention_html=lambda: f"user {user_id}")
+        self.chat_id = user_id
+        self.message_id = next(MESSAGE_IDS)
+        self.text = text
+        self.replies = replies
+
+    async def reply_text(self, text: str, **kwargs):
+        self.replies.append(text)
+        return StubMessage(self.from_user.id, text, self.replies)
+
+
+class StubCallbackQuery:
+    """Замінник telegram.CallbackQuery"""
+
+    def __init__(self, user_id: int, data: str, replies: list):
+        self.from_user = SimpleNamespace(id=user_id)
+        self.data = data
+        self.message = StubMessage(user_id, None, replies)
+        self.replies = replies
+
+    async def answer(self, *args, **kwargs) -> None:
+        pass
+
+    async def edit_message_text(self, text: str, **kwargs):
+        self.replies.append(text)
+
+
+class StubUpdate:
+    """Замінник telegram.Update з текстовим повідомленням або натисканням кнопки"""
+
+    def __init__(self, user_id: int, text: str | None = None, callback_data: str | None = None):
+        self.replies = []
+        self.effective_user = SimpleNamespace(id=user_id, mention_html=lambda: f"user {user_id}")
+        if callback_data is None:
+            self.message = StubMessage(user_id, text, self.replies)
+            self.callback_query = None
+        else:
+            self.message = None
+            self.callback_query = StubCallbackQuery(user_id, callback_data, self.replies)
+
+
+class StubBot:
+    """Замінник telegram.Bot: редагування й видалення повідомлень записуються в calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def edit_message_text(self, text: str, chat_id: int, message_id: int, **kwargs):
+        self.calls.append(('edit_message_text', chat_id, message_id, text))
+
+    async def delete_message(self, chat_id: int, message_id: int, **kwargs) -> bool:
+        self.calls.append(('delete_message', chat_id, message_id))
+        return True
+
+
+class StubContext:
+    """Замінник ContextTypes.DEFAULT_TYPE: user_data, args та bot"""
+
+    def __init__(self, args: list[str] | None = None):
+        self.user_data = {}
+        self.args = args or []
+        self.bot = StubBot()
+
+
+def generate(directory: str, users: int, records: int, seed: int = 0) -> None:
+    """Файли user_1.txt ... user_N.txt по records випадкових записів"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for user_id in range(1, users + 1):
+        lines = [
+            f"{Birthday(f'{rng.choice(NAMES)} {i}', rng.randint(1, 28), rng.randint(1, 12), rng.randint(1950, 2010))}\n"
+            for i in range(records)
+        ]
+        with open(os.path.join(directory, f"user_{user_id}.txt"), "w", encoding="utf-8") as file:
+            file.writelines(lines)
+
+
+# Сценарії: корутина, що виконує одну операцію користувача через справжні обробники
+
+async def show_dates(user_id: int, rng: random.Random, records: int) -> None:
+    await main.show_dates(StubUpdate(user_id, "Показати дати"), StubContext())
+
+
+async def switch_page(user_id: int, rng: random.Random, records: int) -> None:
+    page = rng.randint(1, count_pages(records))
+    await main.button_handler(StubUpdate(user_id, callback_data=f"page_{page}"), StubContext())
+
+
+async def nearest_birthday(user_id: int, rng: random.Random, records: int) -> None:
+    await main.get_nearest_birthday(StubUpdate(user_id, "Найближчий день народження"), StubContext())
+
+
+async def add_conversation(user_id: int, rng: random.Random, records: int) -> None:
+    context = StubContext()
+    await main.add_birthday_start(StubUpdate(user_id, "Додати дату"), context)
+    await main.get_name(StubUpdate(user_id, rng.choice(NAMES)), context)
+    await main.get_day(StubUpdate(user_id, str(rng.randint(1, 28))), context)
+    await main.get_month(StubUpdate(user_id, callback_data=rng.choice(MONTHS)), context)
+    await main.get_year(StubUpdate(user_id, str(rng.randint(1950, 2010))), context)
+
+
+async def delete_record(user_id: int, rng: random.Random, records: int) -> None:
+    context = StubContext()
+    await main.delete_birthday_start(StubUpdate(user_id, "Видалити дату"), context)
+    await main.handle_delete_number(StubUpdate(user_id, "1"), context)
+
+
+SCENARIOS = {
+    'show_dates': show_dates,
+    'button_handler': switch_page,
+    'get_nearest_birthday': nearest_birthday,
+    'add_conversation': add_conversation,
+    'handle_delete_number': delete_record,
+}
+
+
+def io_counters() -> tuple[int, int] | None:
+    """Байти, прочитані та записані процесом (включно з потоками сховища); None поза Linux"""
+    try:
+        with open("/proc/self/io", "r") as file:
+            values = dict(line.split(": ") for line in file.read().splitlines())
+    except OSError:
+        return None
+    return int(values['rchar']), int(values['wchar'])
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def measure(scenario, users: int, records: int, iterations: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    user_ids = [rng.randint(1, users) for _ in range(iterations)]
+
+    # Затримки міряються окремо від пам'яті: tracemalloc сильно сповільнює виконання
+    latencies = []
+    io_before = io_counters()
+    for user_id in user_ids:
+        started = time.perf_counter()
+        await scenario(user_id, rng, records)
+        latencies.append(time.perf_counter() - started)
+    io_after = io_counters()
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for user_id in user_ids[:max(1, iterations // 10)]:
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            await scenario(user_id, rng, records)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'alloc_kib': percentile(peaks, 0.5) / 1024,
+    }
+    if io_before is not None:
+        result['read_bytes'] = (io_after[0] - io_before[0]) / iterations
+        result['written_bytes'] = (io_after[1] - io_before[1]) / iterations
+    return result
+
+
+async def run(directory: str, users: int, records: int, iterations: int, seed: int,
+              scenarios: list[str]) -> dict:
+    # Обробники звертаються до main.store, тож підміняємо його сховищем із синтетичними даними;
+    # решту стану (налаштування, кеш списків) створює main.create_services()
+    main.store = CachedBirthdayStore(FileBirthdayStore(directory), RecordCache())
+    main.store.subscribe(CalendarIndex())
+    main.create_services()
+    try:
+        return {
+            f"{name}@{records}": await measure(SCENARIOS[name], users, records, iterations, seed)
+            for name in scenarios
+        }
+    finally:
+        await main.store.close()
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Операції, що стали повільнішими за базові більш ніж на tolerance"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {base[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    print(f"{'операція':<36}{'p50, мс':>10}{'p99, мс':>10}{'пам., КіБ':>11}{'читання, Б':>13}{'запис, Б':>11}")
+    for key, result in results.items():
+        print(
+            f"{key:<36}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['alloc_kib']:>11.1f}"
+            f"{result.get('read_bytes', float('nan')):>13.0f}{result.get('written_bytes', float('nan')):>11.0f}"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--records', type=int, nargs='+', default=[10, 1000],
+                        help='кількість записів на користувача (кілька значень — кілька прогонів)')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                        help='лише вказані операції (за замовчуванням усі)')
+    parser.add_argument('--data-dir', help='де створювати дані (за замовчуванням тимчасова директорія)')
+    parser.add_argument('--save', help='зберегти результати як базові у JSON')
+    parser.add_argument('--compare', help='порівняти з базовими результатами з JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='допустиме сповільнення відносно базових (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results = {}
+    for records in args.records:
+        with tempfile.TemporaryDirectory(dir=args.data_dir) as directory:
+            generate(directory, args.users, records, args.seed)
+            results.update(asyncio.run(run(
+                directory, args.users, records, args.iterations, args.seed, args.scenario or list(SCENARIOS)
+            )))
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for line in regressions:
+            print(f"Регресія: {line}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,155 @@
+import calendar
+import unicodedata
+from bisect import bisect_left, bisect_right, insort_right
+from datetime import date, timedelta
+
+from records import Birthday
+
+
+def day_key(month: int, day: int) -> int:
+    """Ключ дня року, що зберігає порядок дат: 5 березня -> 305"""
+    return month * 100 + day
+
+
+# Різні написання апострофа в українських іменах (Мар'яна, Мар’яна, Марʼяна) вважаються однаковими
+APOSTROPHES = str.maketrans({"’": "'", "ʼ": "'", "‘": "'", "`": "'", "´": "'"})
+
+
+def normalize_name(name: str) -> str:
+    """Ключ імені для пошуку: Unicode NFKC, без регістру, з єдиним апострофом"""
+    # Апострофи замінюються до NFKC: вона розкладає «´» на пробіл і наголос
+    return unicodedata.normalize("NFKC", name.translate(APOSTROPHES)).casefold().strip()
+
+
+def occurrence(month: int, day: int, year: int) -> date:
+    """Дата дня народження в конкретному році.
+
+    Якщо такого дня в місяці немає (29 лютого в невисокосний рік або 31 квітня,
+    яке пропускає перевірка get_day), святкуємо в останній день місяця.
+    """
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+class BirthdayIndex:
+    """Відсортований за днем року індекс записів одного користувача.
+
+    Пошук найближчого дня народження — бінарний пошук з переходом через кінець року,
+    додавання й видалення оновлюють індекс без повної перебудови.
+    """
+
+    __slots__ = ('keys', 'records')
+
+    def __init__(self, records=()):
+        # Сортування стабільне, тож записи з однаковою датою йдуть у порядку додавання
+        pairs = sorted(((day_key(r.month, r.day), r) for r in records), key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.records = [record for _, record in pairs]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, birthday: Birthday) -> None:
+        key = day_key(birthday.month, birthday.day)
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.records.insert(position, birthday)
+
+    def remove(self, birthday: Birthday) -> None:
+        key = day_key(birthday.month, birthday.day)
+        for position in range(bisect_left(self.keys, key), bisect_right(self.keys, key)):
+            if self.records[position] == birthday:
+                del self.keys[position]
+                del self.records[position]
+                return
+        raise ValueError(f"запису немає в індексі: {birthday}")
+
+    def nearest(self, today: date) -> tuple[date, list[Birthday]] | None:
+        """Найближча (сьогодні або пізніше) дата та всі записи, що на неї припадають"""
+        if not self.keys:
+            return None
+
+        year = today.year
+        position = bisect_left(self.keys, day_key(today.month, today.day))
+        if position == len(self.keys):
+            # Цього року днів народження вже не залишилось — переходимо на початок наступного
+            position, year = 0, year + 1
+
+        record = self.records[position]
+        nearest_date = occurrence(record.month, record.day, year)
+
+        # Якщо дата зсунулась на останній день місяця, на неї припадають усі пізніші дні цього місяця
+        if nearest_date.day == calendar.monthrange(year, nearest_date.month)[1]:
+            end = bisect_right(self.keys, day_key(nearest_date.month, 31))
+        else:
+            end = bisect_right(self.keys, self.keys[position])
+        return nearest_date, self.records[position:end]
+
+    def upcoming(self, today: date, days: int) -> list[tuple[date, list[Birthday]]]:
+        """Дні народження в найближчі days днів, тобто в діапазоні [today, today + days),
+        як [(дата, записи)] за датою.
+
+        Діапазон може переходити через кінець року, тому він ділиться на відрізки
+        в межах одного року; кожен відрізок — бінарний пошук і зріз, тож час
+        O(log n + k), де k — кількість знайдених записів.
+        """
+        end = today + timedelta(days=days - 1)
+        result = {}
+        for year in range(today.year, end.year + 1):
+            first = day_key(today.month, today.day) if year == today.year else day_key(1, 1)
+            if year == end.year:
+                # В останній день місяця святкуються й дні, яких у ньому немає (29 лютого, 31 квітня)
+                last_day = 31 if end.day == calendar.monthrange(year, end.month)[1] else end.day
+                last = day_key(end.month, last_day)
+            else:
+                last = day_key(12, 31)
+            for position in range(bisect_left(self.keys, first), bisect_right(self.keys, last)):
+                record = self.records[position]
+                result.setdefault(occurrence(record.month, record.day, year), []).append(record)
+        return sorted(result.items())
+
+    def month(self, month: int, start: int, count: int) -> tuple[list[Birthday], int]:
+        """Записи місяця [start, start + count) у порядку днів та їх загальна кількість"""
+        first = bisect_left(self.keys, day_key(month, 1))
+        last = bisect_right(self.keys, day_key(month, 31))
+        return self.records[first + start:min(first + start + count, last)], last - first
+
+
+class NameIndex:
+    """Відсортований за нормалізованим ім'ям індекс записів одного користувача.
+
+    Пошук за початком імені — два бінарні пошуки в масиві ключів, тож час не
+    залежить від кількості записів; додавання й видалення оновлюють індекс на місці.
+    """
+
+    __slots__ = ('keys', 'records')
+
+    def __init__(self, records=()):
+        pairs = sorted(((normalize_name(r.name), r) for r in records), key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.records = [record for _, record in pairs]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, birthday: Birthday) -> None:
+        key = normalize_name(birthday.name)
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.records.insert(position, birthday)
+
+    def remove(self, birthday: Birthday) -> None:
+        key = normalize_name(birthday.name)
+        for position in range(bisect_left(self.keys, key), bisect_right(self.keys, key)):
+            if self.records[position] == birthday:
+                del self.keys[position]
+                del self.records[position]
+                return
+        raise ValueError(f"запису немає в індексі: {birthday}")
+
+    def search(self, prefix: str, start: int, count: int) -> tuple[list[Birthday], int]:
+        """Записи, чиє ім'я починається з prefix: [start, start + count) за абеткою та їх кількість"""
+        prefix = normalize_name(prefix)
+        first = bisect_left(self.keys, prefix)
+        # Усі ключі з цим початком менші за prefix + найбільший символ Unicode
+        last = bisect_left(self.keys, prefix + "\U0010ffff", first)
+        return self.records[first + start:min(first + start + count, last)], last - first
@@ -0,0 +1,120 @@
+"""Статистика списку дат користувача (/stats).
+
+Розподіл за місяцями та віком, найближчі ювілеї та тижні з найбільшою кількістю
+днів народження рахуються одним пакетним проходом по стовпцях BirthdayColumns
+(день, місяць, рік), без розбору рядків і без об'єктів Birthday для кожного запису:
+з NumPy — векторно, без нього — тим самим алгоритмом у циклі по масивах array.
+Календарна арифметика (найближча дата, високосні роки) рахується лише для 12×31
+можливих (місяць, день) у таблиці, а записи лише індексують її.
+"""
+from datetime import date, timedelta
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from birthday_index import occurrence
+from columns import BirthdayColumns
+from records import Birthday
+
+# Вік, з яким день народження вважається ювілеєм, і на скільки днів уперед їх шукати
+MILESTONES = (18, 30, 40, 50, 60, 70, 75, 80, 90, 100)
+MILESTONE_DAYS = 365
+# Скільки найближчих ювілеїв і найнасиченіших тижнів показувати
+MILESTONES_SHOWN = 10
+BUSIEST_WEEKS = 3
+# Вікові групи по AGE_STEP років; остання — AGE_GROUPS * AGE_STEP і більше
+AGE_STEP = 10
+AGE_GROUPS = 10
+
+# Ключ таблиці дат: місяць * 32 + день
+KEY_SIZE = 13 * 32
+# Тижні від понеділка поточного: найближчий день народження не далі ніж за 366 днів
+WEEK_COUNT = (366 + 6) // 7 + 1
+
+
+class BirthdayStats:
+    """Статистика записів користувача на певну дату"""
+
+    __slots__ = ('today', 'total', 'months', 'ages', 'milestones', 'milestone_count', 'weeks')
+
+    def __init__(self, today: date, total: int, months: list[int], ages: list[int],
+                 milestones: list[tuple[date, Birthday, int]], milestone_count: int,
+                 weeks: list[tuple[date, int]]):
+        self.today = today
+        self.total = total
+        self.months = months  # кількість записів у кожному місяці, січень — перший
+        self.ages = ages  # кількість записів у кожній віковій групі
+        self.milestones = milestones  # (дата, запис, скільки виповниться), найближчі спершу
+        self.milestone_count = milestone_count  # усього ювілеїв за MILESTONE_DAYS днів
+        self.weeks = weeks  # (понеділок тижня, кількість), найнасиченіші спершу
+
+
+def next_dates(today: date) -> tuple[list[int], list[int]]:
+    """Для кожного ключа (місяць, день): через скільки днів найближчий день народження
+    і в якому році. Неіснуючі ключі (день 0) лишаються нулями"""
+    deltas, years = [0] * KEY_SIZE, [0] * KEY_SIZE
+    for month in range(1, 13):
+        for day in range(1, 32):
+            when = occurrence(month, day, today.year)
+            if when < today:
+                when = occurrence(month, day, today.year + 1)
+            deltas[month * 32 + day] = (when - today).days
+            years[month * 32 + day] = when.year
+    return deltas, years
+
+
+def _aggregate_numpy(columns: BirthdayColumns, deltas: list[int], years: list[int], weekday: int):
+    days = numpy.frombuffer(columns.days, dtype=numpy.uint8)
+    months = numpy.frombuffer(columns.months, dtype=numpy.uint8)
+    keys = months.astype(numpy.intp) * 32 + days
+    delta = numpy.asarray(deltas, dtype=numpy.int32)[keys]
+    turning = numpy.asarray(years, dtype=numpy.int32)[keys] - numpy.frombuffer(columns.years, dtype=numpy.uint16)
+    # До дня народження людині ще на рік менше, ніж виповниться
+    age = turning - (delta > 0)
+
+    month_counts = numpy.bincount(months, minlength=13)[1:]
+    age_counts = numpy.bincount(numpy.clip(age // AGE_STEP, 0, AGE_GROUPS), minlength=AGE_GROUPS + 1)
+    week_counts = numpy.bincount((delta + weekday) // 7, minlength=WEEK_COUNT)
+    selected = numpy.flatnonzero(numpy.isin(turning, MILESTONES) & (delta <= MILESTONE_DAYS))
+    # Стабільне сортування: ювілеї одного дня — у порядку списку
+    selected = selected[numpy.argsort(delta[selected], kind='stable')]
+    milestones = [(int(delta[i]), int(i), int(turning[i])) for i in selected[:MILESTONES_SHOWN]]
+    return month_counts.tolist(), age_counts.tolist(), week_counts.tolist(), milestones, len(selected)
+
+
+def _aggregate_arrays(columns: BirthdayColumns, deltas: list[int], years: list[int], weekday: int):
+    month_counts = [0] * 12
+    age_counts = [0] * (AGE_GROUPS + 1)
+    week_counts = [0] * WEEK_COUNT
+    milestones = []
+    milestone_ages = frozenset(MILESTONES)
+    for i, (day, month, year) in enumerate(zip(columns.days, columns.months, columns.years)):
+        key = month * 32 + day
+        delta = deltas[key]
+        turning = years[key] - year
+        age = turning - (delta > 0)
+        month_counts[month - 1] += 1
+        age_counts[min(max(age // AGE_STEP, 0), AGE_GROUPS)] += 1
+        week_counts[(delta + weekday) // 7] += 1
+        if turning in milestone_ages and delta <= MILESTONE_DAYS:
+            milestones.append((delta, i, turning))
+    milestones.sort(key=lambda milestone: milestone[0])
+    return month_counts, age_counts, week_counts, milestones[:MILESTONES_SHOWN], len(milestones)
+
+
+def compute_stats(records, today: date) -> BirthdayStats:
+    """Статистика записів на дату today (місцеву дату користувача)"""
+    columns = BirthdayColumns.of(records)
+    deltas, years = next_dates(today)
+    weekday = today.weekday()
+    aggregate = _aggregate_numpy if numpy is not None and len(columns) else _aggregate_arrays
+    month_counts, age_counts, week_counts, milestones, milestone_count = aggregate(columns, deltas, years, weekday)
+
+    # Об'єкти Birthday створюються лише для показаних ювілеїв
+    milestones = [(today + timedelta(days=delta), columns[i], turning) for delta, i, turning in milestones]
+    monday = today - timedelta(days=weekday)
+    busiest = sorted((week for week in range(WEEK_COUNT) if week_counts[week]), key=lambda week: -week_counts[week])
+    weeks = [(monday + timedelta(weeks=week), week_counts[week]) for week in busiest[:BUSIEST_WEEKS]]
+    return BirthdayStats(today, len(columns), month_counts, age_counts, milestones, milestone_count, weeks)
@@ -0,0 +1,187 @@
+"""Масовий імпорт і експорт записів у форматах CSV та iCalendar (.ics).
+
+Файли читаються й пишуться потоково, рядок за рядком; перевірка полів та сама,
+що й при покроковому додаванні дати (records.validate_birthday).
+
+CSV: стовпці «ім'я, день, місяць, рік» (місяць — назва або номер) або «ім'я, дата»
+з датою 1990-05-17 чи 17.05.1990; рядок заголовка та роздільник «;» розпізнаються.
+iCalendar: кожна подія VEVENT — запис, ім'я з SUMMARY, дата з DTSTART.
+"""
+import calendar
+import csv
+import io
+import itertools
+import re
+import tempfile
+from datetime import date
+
+from records import Birthday, validate_birthday
+
+DATE_FORMATS = (
+    re.compile(r"^(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})$"),
+    re.compile(r"^(?P<day>\d{1,2})\.(?P<month>\d{1,2})\.(?P<year>\d{4})$"),
+)
+ICS_DATE = re.compile(r"^(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2})")
+
+
+def detect_format(file_name: str | None, mime_type: str | None) -> str | None:
+    """'csv', 'ics' або None, якщо формат не підтримується"""
+    file_name = (file_name or "").lower()
+    if file_name.endswith(".ics") or mime_type == "text/calendar":
+        return 'ics'
+    if file_name.endswith(".csv") or mime_type in ("text/csv", "text/comma-separated-values"):
+        return 'csv'
+    return None
+
+
+def _parse_date(value: str) -> tuple[str, str, str]:
+    for pattern in DATE_FORMATS:
+        match = pattern.match(value.strip())
+        if match:
+            return match['day'], match['month'], match['year']
+    raise ValueError(f"невідомий формат дати: {value}")
+
+
+def _csv_row(row: list[str], current_year: int) -> Birthday:
+    fields = [field.strip() for field in row]
+    if len(fields) >= 4:
+        return validate_birthday(fields[0], fields[1], fields[2], fields[3], current_year)
+    if len(fields) == 2:
+        return validate_birthday(fields[0], *_parse_date(fields[1]), current_year)
+    raise ValueError("очікується «ім'я, день, місяць, рік» або «ім'я, дата»")
+
+
+def iter_csv(file, current_year: int):
+    """Рядки CSV як (номер рядка, запис або текст помилки)"""
+    first_line = file.readline()
+    delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+    for row_number, row in enumerate(csv.reader(itertools.chain([first_line], file), delimiter=delimiter), 1):
+        if not any(field.strip() for field in row):
+            continue
+        try:
+            yield row_number, _csv_row(row, current_year)
+        except ValueError as e:
+            # Перший рядок, у якому замість дня не число, вважаємо заголовком
+            if row_number == 1 and len(row) > 1 and not row[1].strip()[:1].isdigit():
+                continue
+            yield row_number, str(e)
+
+
+def _unescape_ics(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m[1] in "nN" else m[1], value)
+
+
+def _unfold(file):
+    """Рядки iCalendar з об'єднаними продовженнями (рядки, що починаються з пробілу)"""
+    line_number, current = 0, None
+    for number, line in enumerate(file, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield line_number, current
+        line_number, current = number, line
+    if current is not None:
+        yield line_number, current
+
+
+def iter_ics(file, current_year: int):
+    """Події VEVENT як (номер рядка початку події, запис або текст помилки)"""
+    event = None
+    for line_number, line in _unfold(file):
+        name, _, value = line.partition(":")
+        name = name.split(";")[0].upper()
+        if name == "BEGIN" and value.strip().upper() == "VEVENT":
+            event = {'line': line_number}
+        elif event is not None and name == "END" and value.strip().upper() == "VEVENT":
+            try:
+                match = ICS_DATE.match(event.get('DTSTART', ""))
+                if match is None:
+                    raise ValueError("немає дати DTSTART")
+                yield event['line'], validate_birthday(
+                    _unescape_ics(event.get('SUMMARY', "")), match['day'], match['month'], match['year'], current_year
+                )
+            except ValueError as e:
+                yield event['line'], str(e)
+            event = None
+        elif event is not None and name in ("SUMMARY", "DTSTART"):
+            event[name] = value.strip()
+
+
+def read_import(path: str, file_format: str, current_year: int,
+                max_records: int) -> tuple[list[Birthday], list[tuple[int, str]]]:
+    """Розбирає файл імпорту: коректні записи та помилки (номер рядка, опис).
+    Понад max_records записів не читається — це теж повертається як помилка"""
+    records, errors = [], []
+    parse = iter_ics if file_format == 'ics' else iter_csv
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as file:
+        for row_number, result in parse(file, current_year):
+            if isinstance(result, str):
+                errors.append((row_number, result))
+            elif len(records) >= max_records:
+                errors.append((row_number, f"перевищено ліміт у {max_records} записів, решту файлу пропущено"))
+                break
+            else:
+                records.append(result)
+    return records, errors
+
+
+def write_csv(records: list[Birthday], file) -> None:
+    """Пише записи у текстовий файл CSV: ім'я, день, місяць (номер), рік"""
+    writer = csv.writer(file)
+    writer.writerow(("name", "day", "month", "year"))
+    for birthday in records:
+        writer.writerow(birthday)
+
+
+def _escape_ics(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Переносить рядок iCalendar довший за 75 байтів"""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Не розриваємо багатобайтовий символ UTF-8
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def write_ics(records: list[Birthday], file, user_id: int) -> None:
+    """Пише записи у текстовий файл iCalendar: щорічні події на весь день"""
+    file.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//birthday_bot//UK\r\n")
+    for number, birthday in enumerate(records):
+        # Неіснуючі дати (29 лютого не в високосний рік, 31 квітня) переносимо на кінець місяця
+        day = min(birthday.day, calendar.monthrange(birthday.year, birthday.month)[1])
+        start = date(birthday.year, birthday.month, day)
+        file.write("BEGIN:VEVENT\r\n")
+        file.write(f"UID:{user_id}-{number}@birthday_bot\r\n")
+        file.write(f"DTSTAMP:{start:%Y%m%d}T000000Z\r\n")
+        file.write(f"DTSTART;VALUE=DATE:{start:%Y%m%d}\r\n")
+        file.write("RRULE:FREQ=YEARLY\r\n")
+        file.write(_fold(f"SUMMARY:{_escape_ics(birthday.name)}"))
+        file.write("END:VEVENT\r\n")
+    file.write("END:VCALENDAR\r\n")
+
+
+def export_to_file(records: list[Birthday], file_format: str, user_id: int):
+    """Пише записи у тимчасовий файл на диску (не в пам'ять) і повертає його,
+    відкритим для читання з початку; файл видаляється після close()"""
+    file = tempfile.TemporaryFile()
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    if file_format == 'ics':
+        write_ics(records, text, user_id)
+    else:
+        write_csv(records, text)
+    text.flush()
+    text.detach()
+    file.seek(0)
+    return file
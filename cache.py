@@ -0,0 +1,261 @@
+import logging
+from collections import OrderedDict
+from datetime import date
+
+from birthday_index import BirthdayIndex, NameIndex
+from birthday_stats import BirthdayStats, compute_stats
+from columns import BirthdayColumns
+from records import Birthday
+from locks import UserLockManager
+from metrics import CACHE_REQUESTS, CACHE_EVICTIONS
+from storage import BirthdayStore, RecordChangedError
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """Закешовані дані одного користувача; записи зберігаються стовпцями"""
+
+    __slots__ = ('version', 'records', '_index', '_names', '_upcoming', '_stats')
+
+    def __init__(self, version, records: list[Birthday]):
+        self.version = version
+        self.records = BirthdayColumns.of(records)
+        self._index = None
+        self._names = None
+        self._upcoming = None  # (дата, {днів: результат}) — діє до кінця дня або до зміни записів
+        self._stats = None  # статистика на свою дату (today), так само до кінця дня або до зміни записів
+
+    @property
+    def index(self) -> BirthdayIndex:
+        # Індекс будується лише при першому зверненні
+        if self._index is None:
+            self._index = BirthdayIndex(self.records)
+        return self._index
+
+    @property
+    def names(self) -> NameIndex:
+        if self._names is None:
+            self._names = NameIndex(self.records)
+        return self._names
+
+    def upcoming(self, today: date, days: int) -> list[tuple[date, list[Birthday]]]:
+        if self._upcoming is None or self._upcoming[0] != today:
+            self._upcoming = (today, {})
+        results = self._upcoming[1]
+        if days not in results:
+            results[days] = self.index.upcoming(today, days)
+        return results[days]
+
+    def stats(self, today: date) -> BirthdayStats:
+        if self._stats is None or self._stats.today != today:
+            self._stats = compute_stats(self.records, today)
+        return self._stats
+
+
+class RecordCache:
+    """LRU-кеш розібраних записів користувачів з обмеженням за кількістю
+    користувачів та сумарною кількістю записів"""
+
+    def __init__(self, max_users: int = 10000, max_records: int = 1000000):
+        self.max_users = max_users
+        self.max_records = max_records
+        self._entries = OrderedDict()  # user_id -> CacheEntry
+        self._records = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: int, version) -> CacheEntry | None:
+        """Повертає запис кешу, якщо він є саме для цієї версії даних"""
+        entry = self._entries.get(user_id)
+        if entry is None or entry.version != version:
+            self.misses += 1
+            CACHE_REQUESTS.labels('miss').inc()
+            if entry is not None:
+                self.invalidate(user_id)
+            return None
+        self.hits += 1
+        CACHE_REQUESTS.labels('hit').inc()
+        self._entries.move_to_end(user_id)
+        return entry
+
+    def put(self, user_id: int, version, records: list[Birthday]) -> CacheEntry:
+        self.invalidate(user_id)
+        entry = CacheEntry(version, records)
+        if len(records) > self.max_records:
+            return entry
+        self._entries[user_id] = entry
+        self._records += len(records)
+        self._evict()
+        return entry
+
+    def apply_append(self, user_id: int, old_version, new_version, birthdays: list[Birthday]) -> None:
+        """Оновлює запис кешу після додавання, якщо до цього він був актуальним"""
+        entry = self._entries.get(user_id)
+        if entry is None or entry.version != old_version:
+            self.invalidate(user_id)
+            return
+        # Новий список замість зміни старого: його ще можуть використовувати обробники
+        entry.records = entry.records.appended(birthdays)
+        entry._upcoming = None
+        entry._stats = None
+        for sorted_index in (entry._index, entry._names):
+            if sorted_index is not None:
+                for birthday in birthdays:
+                    sorted_index.add(birthday)
+        entry.version = new_version
+        self._records += len(birthdays)
+        self._evict()
+
+    def apply_delete(self, user_id: int, old_version, new_version, index: int, deleted: Birthday) -> None:
+        """Оновлює запис кешу після видалення, якщо до цього він був актуальним"""
+        entry = self._entries.get(user_id)
+        if entry is None or entry.version != old_version:
+            self.invalidate(user_id)
+            return
+        entry.records = entry.records.without(index)
+        entry._upcoming = None
+        entry._stats = None
+        for sorted_index in (entry._index, entry._names):
+            if sorted_index is not None:
+                sorted_index.remove(deleted)
+        entry.version = new_version
+        self._records -= 1
+
+    def invalidate(self, user_id: int) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._records -= len(entry.records)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_users or self._records > self.max_records:
+            _, evicted = self._entries.popitem(last=False)
+            self._records -= len(evicted.records)
+            self.evictions += 1
+            CACHE_EVICTIONS.inc()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'users': len(self._entries),
+            'records': self._records,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+
+class CachedBirthdayStore(BirthdayStore):
+    """Обгортка над сховищем, що кешує розібрані записи та індекс дат.
+
+    Перед кожним читанням перевіряється версія даних (для файлів — mtime і розмір),
+    тож зміни файлу ззовні теж скидають кеш. Додавання та видалення через обгортку
+    оновлюють закешовані записи й індекс на місці, а також сповіщають підписані
+    глобальні індекси (методи add/remove з аргументами user_id та запис).
+    Усі зміни даних одного користувача виконуються під його замком.
+    """
+
+    def __init__(self, backend: BirthdayStore, cache: RecordCache):
+        self.backend = backend
+        self.cache = cache
+        self.listeners = []
+        self.locks = UserLockManager()
+
+    def subscribe(self, listener) -> None:
+        self.listeners.append(listener)
+
+    async def exists(self, user_id: int) -> bool:
+        return await self.backend.exists(user_id)
+
+    async def version(self, user_id: int):
+        return await self.backend.version(user_id)
+
+    async def _entry(self, user_id: int) -> CacheEntry:
+        version = await self.backend.version(user_id)
+        if version is None:
+            self.cache.invalidate(user_id)
+            raise FileNotFoundError(user_id)
+
+        entry = self.cache.get(user_id, version)
+        if entry is None:
+            entry = self.cache.put(user_id, version, await self.backend.read(user_id))
+        return entry
+
+    async def read(self, user_id: int) -> list[Birthday]:
+        return (await self._entry(user_id)).records
+
+    async def read_page(self, user_id: int, start: int, count: int) -> tuple[list[Birthday], int]:
+        """Сторінка записів: з кешу, якщо він актуальний, інакше напряму зі сховища
+        без завантаження всього списку в кеш"""
+        version = await self.backend.version(user_id)
+        if version is None:
+            self.cache.invalidate(user_id)
+            raise FileNotFoundError(user_id)
+
+        entry = self.cache.get(user_id, version)
+        if entry is not None:
+            return entry.records[start:start + count], len(entry.records)
+        return await self.backend.read_page(user_id, start, count)
+
+    async def day_index(self, user_id: int) -> BirthdayIndex:
+        """Відсортований за днем року індекс записів користувача"""
+        return (await self._entry(user_id)).index
+
+    async def name_index(self, user_id: int) -> NameIndex:
+        """Відсортований за ім'ям індекс записів користувача"""
+        return (await self._entry(user_id)).names
+
+    async def upcoming(self, user_id: int, today: date, days: int) -> list[tuple[date, list[Birthday]]]:
+        """Дні народження в найближчі days днів; результат кешується до кінця дня або до зміни записів"""
+        return (await self._entry(user_id)).upcoming(today, days)
+
+    async def stats(self, user_id: int, today: date) -> BirthdayStats:
+        """Статистика записів; кешується до кінця дня або до зміни записів"""
+        return (await self._entry(user_id)).stats(today)
+
+    async def append(self, user_id: int, birthday: Birthday) -> None:
+        await self.append_many(user_id, [birthday])
+
+    async def append_many(self, user_id: int, birthdays: list[Birthday]) -> None:
+        if not birthdays:
+            return
+        async with self.locks.lock(user_id):
+            old_version = await self.backend.version(user_id)
+            try:
+                await self.backend.append_many(user_id, birthdays)
+            except Exception:
+                self.cache.invalidate(user_id)
+                raise
+            self.cache.apply_append(user_id, old_version, await self.backend.version(user_id), birthdays)
+        for listener in self.listeners:
+            for birthday in birthdays:
+                listener.add(user_id, birthday)
+
+    async def delete(self, user_id: int, index: int, expected: Birthday | None = None) -> Birthday:
+        """Видаляє запис за індексом; якщо передано expected, а там уже інший запис —
+        кидає RecordChangedError замість того, щоб видалити не те"""
+        async with self.locks.lock(user_id):
+            if expected is not None:
+                records = await self.read(user_id)
+                if index >= len(records) or records[index] != expected:
+                    raise RecordChangedError(expected)
+
+            old_version = await self.backend.version(user_id)
+            try:
+                deleted = await self.backend.delete(user_id, index)
+            except Exception:
+                self.cache.invalidate(user_id)
+                raise
+            self.cache.apply_delete(user_id, old_version, await self.backend.version(user_id), index, deleted)
+        for listener in self.listeners:
+            listener.remove(user_id, deleted)
+        return deleted
+
+    async def scan(self) -> list[tuple[int, list[Birthday]]]:
+        return await self.backend.scan()
+
+    async def close(self) -> None:
+        logger.info(f"Статистика кешу записів: {self.cache.stats()}")
+        await self.backend.close()
@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta, timezone
+
+
+class Clock:
+    """Джерело поточного часу (UTC); планувальник і обробники беруть час лише звідси"""
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+
+class ManualClock(Clock):
+    """Годинник, яким керують вручну: для перевірки планувальника без очікування"""
+
+    def __init__(self, start: datetime):
+        self._now = start.astimezone(timezone.utc)
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, moment: datetime) -> None:
+        self._now = moment.astimezone(timezone.utc)
+
+    def advance(self, delta: timedelta) -> None:
+        self._now += delta
@@ -0,0 +1,212 @@
+"""Компактне зберігання записів у пам'яті стовпцями замість окремих об'єктів.
+
+Імена зберігаються в таблиці рядків (StringTable): один буфер UTF-8 і масив
+кінців імен, тож ім'я займає лише свої байти, а не окремий об'єкт str.
+День, місяць і рік — у масивах array('B')/array('H'). Об'єкти Birthday
+створюються лише тоді, коли запис справді потрібен (показ, нагадування).
+
+Бюджет пам'яті на запис при 10 млн записів (ім'я в середньому 16 байтів UTF-8,
+наприклад «Іван Петренко»; масиви array мають до ~12% запасу на зростання):
+
+    BirthdayColumns (записи користувача в кеші та журналі):
+        день 1 + місяць 1 + рік 2 + кінець імені 4 + ім'я 16  ≈ 24 байти (~27 із запасом)
+    DayColumns (глобальний календар нагадувань, день і місяць — ключ кошика):
+        user_id 8 + рік 2 + кінець імені 4 + ім'я 16          ≈ 30 байтів (~34 із запасом)
+
+Для порівняння: список кортежів (user_id, Birthday) коштував ~300 байтів на запис
+(кортеж, Birthday, об'єкти str та int для кожного запису). Постійні витрати —
+кілька сотень байтів на контейнер (на користувача чи на день календаря).
+"""
+from array import array
+from collections.abc import Sequence
+
+from records import Birthday
+
+
+class StringTable:
+    """Рядки, записані підряд в одному буфері UTF-8; i-й рядок — байти між кінцями i-1 та i"""
+
+    __slots__ = ('data', 'ends')
+
+    def __init__(self, data: bytearray | None = None, ends: array | None = None):
+        self.data = data if data is not None else bytearray()
+        self.ends = ends if ends is not None else array('I')
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def __getitem__(self, index: int) -> str:
+        start = self.ends[index - 1] if index > 0 else 0
+        return self.data[start:self.ends[index]].decode("utf-8")
+
+    def append(self, value: str) -> None:
+        self.data += value.encode("utf-8")
+        self.ends.append(len(self.data))
+
+    def extend(self, values) -> None:
+        for value in values:
+            self.append(value)
+
+    def copy(self) -> 'StringTable':
+        return StringTable(bytearray(self.data), array('I', self.ends))
+
+    def without(self, index: int) -> 'StringTable':
+        """Копія таблиці без index-го рядка"""
+        start = self.ends[index - 1] if index > 0 else 0
+        end = self.ends[index]
+        removed = end - start
+        ends = self.ends[:index]
+        ends.extend(value - removed for value in self.ends[index + 1:])
+        return StringTable(self.data[:start] + self.data[end:], ends)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + self.ends.itemsize * len(self.ends)
+
+
+class BirthdayColumns(Sequence):
+    """Незмінний список записів одного користувача, збережений стовпцями.
+
+    Поводиться як список Birthday (індекс, зріз, ітерація, len); зміни створюють
+    нову копію (appended, without), тож список можна безпечно віддавати обробникам.
+    """
+
+    __slots__ = ('days', 'months', 'years', 'names')
+
+    def __init__(self, records=()):
+        self.days = array('B')
+        self.months = array('B')
+        self.years = array('H')
+        self.names = StringTable()
+        self._extend(records)
+
+    @classmethod
+    def of(cls, records) -> 'BirthdayColumns':
+        """records як BirthdayColumns (без копіювання, якщо це вже вони)"""
+        return records if isinstance(records, cls) else cls(records)
+
+    def _extend(self, records) -> None:
+        for birthday in records:
+            self.days.append(birthday.day)
+            self.months.append(birthday.month)
+            self.years.append(birthday.year)
+            self.names.append(birthday.name)
+
+    def _copy(self) -> 'BirthdayColumns':
+        copy = BirthdayColumns()
+        copy.days = array('B', self.days)
+        copy.months = array('B', self.months)
+        copy.years = array('H', self.years)
+        copy.names = self.names.copy()
+        return copy
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Birthday(self.names[index], self.days[index], self.months[index], self.years[index])
+
+    def __iter__(self):
+        names = self.names
+        for i in range(len(self.days)):
+            yield Birthday(names[i], self.days[i], self.months[i], self.years[i])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __add__(self, other) -> 'BirthdayColumns':
+        return self.appended(other)
+
+    def __repr__(self) -> str:
+        return f"BirthdayColumns({list(self)!r})"
+
+    def appended(self, records) -> 'BirthdayColumns':
+        """Нова копія з доданими в кінець записами"""
+        copy = self._copy()
+        copy._extend(records)
+        return copy
+
+    def without(self, index: int) -> 'BirthdayColumns':
+        """Нова копія без запису з цим індексом"""
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        copy = BirthdayColumns()
+        copy.days = self.days[:index] + self.days[index + 1:]
+        copy.months = self.months[:index] + self.months[index + 1:]
+        copy.years = self.years[:index] + self.years[index + 1:]
+        copy.names = self.names.without(index)
+        return copy
+
+    @property
+    def nbytes(self) -> int:
+        """Розмір даних записів (без постійних витрат на сам контейнер)"""
+        return (self.days.itemsize * len(self.days) + self.months.itemsize * len(self.months)
+                + self.years.itemsize * len(self.years) + self.names.nbytes)
+
+
+class DayColumns:
+    """Записи всіх користувачів на один день (місяць і день — ключ у календарі).
+
+    Видалення лише позначає запис (рік 0), а коли таких більше чверті —
+    масиви переписуються без них, як ущільнення журналу.
+    """
+
+    __slots__ = ('owners', 'years', 'names', 'dead')
+
+    def __init__(self):
+        self.owners = array('q')
+        self.years = array('H')
+        self.names = StringTable()
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.owners) - self.dead
+
+    def add(self, user_id: int, name: str, year: int) -> None:
+        self.owners.append(user_id)
+        self.years.append(year)
+        self.names.append(name)
+
+    def remove(self, user_id: int, name: str, year: int) -> bool:
+        owners = self.owners
+        start = 0
+        while True:
+            try:
+                i = owners.index(user_id, start)
+            except ValueError:
+                return False
+            if self.years[i] == year and self.names[i] == name:
+                break
+            start = i + 1
+        self.years[i] = 0
+        self.dead += 1
+        if self.dead >= 32 and self.dead * 4 > len(owners):
+            self._compact()
+        return True
+
+    def _compact(self) -> None:
+        owners, years, names = array('q'), array('H'), StringTable()
+        for user_id, name, year in self:
+            owners.append(user_id)
+            years.append(year)
+            names.append(name)
+        self.owners, self.years, self.names, self.dead = owners, years, names, 0
+
+    def __iter__(self):
+        """Живі записи як (user_id, ім'я, рік)"""
+        for i in range(len(self.owners)):
+            if self.years[i]:
+                yield self.owners[i], self.names[i], self.years[i]
+
+    @property
+    def nbytes(self) -> int:
+        return (self.owners.itemsize * len(self.owners) + self.years.itemsize * len(self.years)
+                + self.names.nbytes)
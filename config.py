@@ -1 +1,95 @@
-TOKEN = 'your_token'
\ No newline at end of file
+from datetime import time
+
+TOKEN = 'your_token'
+
+# Адреса сервера Bot API: справжній Telegram, власний telegram-bot-api
+# або локальна імітація для навантажувального тестування (python fake_api.py)
+BOT_API_URL = 'https://api.telegram.org'
+
+# Директорія з файлами користувачів
+USER_DATA_DIR = 'user_data'
+
+# Кількість потоків для дискових операцій сховища
+STORAGE_IO_WORKERS = 4
+
+# Обмеження кешу розібраних записів: кількість користувачів та сумарна кількість записів
+CACHE_MAX_USERS = 10000
+CACHE_MAX_RECORDS = 1000000
+
+# /upcoming: кількість днів за замовчуванням і найбільша допустима
+UPCOMING_DEFAULT_DAYS = 7
+UPCOMING_MAX_DAYS = 366
+
+# Обмеження кешу відрендерених списків дат: кількість списків та сумарна довжина тексту
+RENDER_CACHE_MAX_ENTRIES = 1000
+RENDER_CACHE_MAX_CHARS = 10_000_000
+
+# Сховище даних: 'file' (файл на користувача) або 'sqlite'
+STORAGE_BACKEND = 'file'
+SQLITE_PATH = 'birthdays.db'
+
+# Щоденні нагадування: час розсилки (за місцевим часом користувача), типові відступи (днів до дати) та максимальний відступ
+REMINDER_TIME = time(9, 0)
+REMINDER_OFFSETS = (0, 1)
+REMINDER_MAX_OFFSET = 30
+# Часовий пояс користувачів, які не вказали свій (/timezone), і як часто перевіряти,
+# чи настав час розсилки в якомусь поясі, хв (60 ділиться на це число; 15 — для поясів зі зміщенням +5:30 тощо)
+DEFAULT_TIMEZONE = 'Europe/Kyiv'
+REMINDER_TICK_MINUTES = 15
+USER_SETTINGS_PATH = 'user_settings.json'
+# Дати останньої розсилки в кожному поясі, щоб перезапуск не повторював і не пропускав розсилку
+REMINDER_STATE_PATH = 'reminder_state.json'
+
+# Обмеження вихідних повідомлень: загалом за секунду, на один чат за секунду та запас на чат
+OUTBOUND_GLOBAL_RATE = 30
+OUTBOUND_CHAT_RATE = 1
+OUTBOUND_CHAT_BURST = 3
+
+# Режим запуску: 'polling' (опитування) або 'webhook' (локальний HTTP-сервер)
+RUN_MODE = 'polling'
+
+# Скільки оновлень різних користувачів обробляється одночасно
+CONCURRENT_UPDATES = 16
+
+# Обмеження вхідних оновлень від одного користувача: оновлень за секунду та скільки про запас
+INBOUND_RATE = 2
+INBOUND_BURST = 10
+
+# Шардований режим (python sharding.py): кількість робочих процесів, між якими
+# користувачі розподіляються за хешем user_id (1 — звичайний запуск python main.py),
+# та скільки оновлень може чекати в черзі одного процесу
+SHARD_COUNT = 1
+SHARD_QUEUE_SIZE = 10000
+
+# Налаштування вебхука: адреса й порт локального сервера, шлях, публічна адреса та секрет
+WEBHOOK_LISTEN = '127.0.0.1'
+WEBHOOK_PORT = 8443
+WEBHOOK_PATH = 'telegram'
+WEBHOOK_URL = ''
+WEBHOOK_SECRET_TOKEN = ''
+
+# Сканування всіх файлів при запуску: кількість процесів (None — за кількістю ядер),
+# з якої кількості змінених файлів вмикати процеси та чи зберігати знімок для наступного запуску
+SCAN_PROCESSES = None
+SCAN_PARALLEL_THRESHOLD = 1000
+SCAN_SNAPSHOT = True
+
+# Ущільнення журналу: частка позначок видалення та мінімальна кількість рядків журналу
+COMPACTION_RATIO = 0.3
+COMPACTION_MIN_ENTRIES = 32
+
+# Збереження context.user_data і станів розмов між перезапусками: файл бази,
+# як часто бот передає зміни (с) і скільки зміни накопичуються перед записом (с)
+PERSISTENCE_PATH = 'bot_state.db'
+PERSISTENCE_UPDATE_INTERVAL = 10
+PERSISTENCE_FLUSH_DELAY = 1.0
+
+# Імпорт з файлу: максимальний розмір файлу (байтів), кількість записів і скільки помилок показувати
+IMPORT_MAX_FILE_SIZE = 5 * 1024 * 1024
+IMPORT_MAX_RECORDS = 10000
+IMPORT_ERRORS_SHOWN = 20
+
+# Локальний HTTP-сервер метрик Prometheus (порт 0 — вимкнено) та типовий інтервал семплювального профайлера, с
+METRICS_LISTEN = '127.0.0.1'
+METRICS_PORT = 9464
+PROFILER_INTERVAL = 0.005
@@ -0,0 +1,214 @@
+import asyncio
+import itertools
+import logging
+import time
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from metrics import OUTBOUND_LATENCY, OUTBOUND_QUEUE_WAIT, OUTBOUND_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Пріоритети вихідних запитів (менше число — вищий пріоритет).
+# Передаються в методи бота через rate_limit_args, за замовчуванням — INTERACTIVE.
+INTERACTIVE = 0
+SCHEDULED = 1
+
+
+class TokenBucket:
+    """Відро токенів: rate токенів за секунду, не більше capacity про запас"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Скільки секунд чекати до появи токена"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Request:
+    __slots__ = ('callback', 'args', 'kwargs', 'endpoint', 'chat_id', 'future', 'attempts', 'enqueued')
+
+    def __init__(self, callback, args, kwargs, endpoint, chat_id, future, enqueued):
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.endpoint = endpoint
+        self.chat_id = chat_id
+        self.future = future
+        self.attempts = 0
+        self.enqueued = enqueued
+
+
+def _seconds(value) -> float:
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class OutboundDispatcher(BaseRateLimiter[int]):
+    """Центральна черга вихідних запитів до Bot API.
+
+    Запити обробляються за пріоритетом (відповіді користувачам раніше за розсилку),
+    з обмеженням загальної швидкості та швидкості на кожен чат. Якщо Telegram
+    повертає RetryAfter, відправка зупиняється на вказаний час, а запит повторюється.
+    Підключається через Application.builder().rate_limiter(...).
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, chat_burst: float = 3,
+                 group_rate: float = 20 / 60, max_retries: int = 3, clock=time.monotonic):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self._clock = clock
+        # Загальний ліміт рівномірний, без запасу: Telegram рахує його ковзним вікном
+        self._global = TokenBucket(global_rate, 1, clock())
+        self._chats = {}  # chat_id -> TokenBucket
+        self._queue = None
+        self._sequence = itertools.count()
+        self._pending = set()
+        self._tasks = set()
+        self._worker = None
+        self._paused_until = 0.0
+        self.sent = 0
+        self.retries = 0
+
+    async def initialize(self) -> None:
+        if self._worker is None:
+            self._queue = asyncio.PriorityQueue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def shutdown(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        # Запити, які вже відправляються, дочікуємось; решту скасовуємо
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for request in self._pending:
+            if not request.future.done():
+                request.future.cancel()
+        self._pending.clear()
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if self._worker is None:
+            await self.initialize()
+        priority = INTERACTIVE if rate_limit_args is None else rate_limit_args
+        request = _Request(callback, args, kwargs, endpoint, data.get('chat_id'),
+                           asyncio.get_running_loop().create_future(), self._clock())
+        self._pending.add(request)
+        self._enqueue(priority, next(self._sequence), request)
+        try:
+            return await request.future
+        finally:
+            self._pending.discard(request)
+
+    def _enqueue(self, priority: int, sequence: int, request: _Request) -> None:
+        if not request.future.done():
+            self._queue.put_nowait((priority, sequence, request))
+
+    def _chat_bucket(self, chat_id, now: float) -> TokenBucket | None:
+        if not isinstance(chat_id, int):
+            return None
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Від'ємні id — групи, для них ліміт значно нижчий
+            if chat_id < 0:
+                bucket = TokenBucket(self.group_rate, 1, now)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _forget_idle_chats(self, now: float) -> None:
+        """Повні відра нічим не відрізняються від нових, тож їх можна не тримати в пам'яті"""
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.is_full(now)]:
+            del self._chats[chat_id]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            priority, sequence, request = await self._queue.get()
+            if request.future.done():
+                continue
+
+            now = self._clock()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                now = self._clock()
+
+            # Чат вичерпав свій ліміт — відкладаємо лише цей запит, не блокуючи інші чати
+            bucket = self._chat_bucket(request.chat_id, now)
+            if bucket is not None:
+                wait = bucket.wait_time(now)
+                if wait > 0:
+                    loop.call_later(wait, self._enqueue, priority, sequence, request)
+                    continue
+
+            wait = self._global.wait_time(now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = self._clock()
+            self._global.take(now)
+            if bucket is not None:
+                bucket.take(now)
+
+            self.sent += 1
+            OUTBOUND_QUEUE_WAIT.labels(priority).observe(now - request.enqueued)
+            if self.sent % 10000 == 0:
+                self._forget_idle_chats(now)
+            task = asyncio.create_task(self._execute(priority, sequence, request))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, priority: int, sequence: int, request: _Request) -> None:
+        started = self._clock()
+        try:
+            result = await request.callback(*request.args, **request.kwargs)
+        except RetryAfter as e:
+            OUTBOUND_REQUESTS.labels(request.endpoint, 'retry_after').inc()
+            request.attempts += 1
+            if request.attempts > self.max_retries:
+                if not request.future.done():
+                    request.future.set_exception(e)
+                return
+            delay = _seconds(e.retry_after)
+            logger.warning(f"RetryAfter для {request.endpoint}: пауза {delay} с (спроба {request.attempts})")
+            self.retries += 1
+            self._paused_until = max(self._paused_until, self._clock() + delay)
+            self._enqueue(priority, sequence, request)
+        except asyncio.CancelledError:
+            request.future.cancel()
+            raise
+        except Exception as e:
+            OUTBOUND_REQUESTS.labels(request.endpoint, 'error').inc()
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            OUTBOUND_REQUESTS.labels(request.endpoint, 'ok').inc()
+            OUTBOUND_LATENCY.labels(request.endpoint).observe(self._clock() - started)
+            if not request.future.done():
+                request.future.set_result(result)
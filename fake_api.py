@@ -0,0 +1,324 @@
+"""Локальна імітація сервера Bot API для навантажувального тестування бота.
+
+Реалізує методи, якими користується бот у звичайній роботі: getMe, getUpdates
+(з довгим опитуванням), deleteWebhook, sendMessage, editMessageText,
+deleteMessage та answerCallbackQuery. Оновлення від «користувачів» створюють
+send_text і press_button, а кожен виклик бота, що стосується чату, потрапляє в
+чергу inbox(chat_id) — так навантажувальний тест (loadtest.py) бачить відповіді.
+Повідомлення зберігаються, тож редагування чужого чи видаленого повідомлення або
+без змін повертає 400, як справжній Telegram.
+
+Бот підключається до імітації через config.BOT_API_URL (адреса — FakeBotApi.url).
+"""
+import asyncio
+import html
+import itertools
+import json
+import logging
+import re
+import time
+from collections import Counter, deque
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+BOT_ID = 1000000
+BOT_USERNAME = 'fake_birthday_bot'
+
+# Максимальна довжина тексту повідомлення (у символах UTF-16, після розбору розмітки)
+MESSAGE_LIMIT = 4096
+
+REASONS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found'}
+
+
+class ApiError(Exception):
+    """Помилка, яку сервер повертає боту (error_code і description, як у Telegram)"""
+
+    def __init__(self, code: int, description: str):
+        super().__init__(description)
+        self.code = code
+        self.description = description
+
+
+class ApiCall:
+    """Виклик Bot API, що стосується чату: так його бачить користувач"""
+
+    __slots__ = ('method', 'chat_id', 'message', 'error', 'received')
+
+    def __init__(self, method: str, chat_id: int, message: dict | None, error: str | None, received: float):
+        self.method = method
+        self.chat_id = chat_id
+        self.message = message  # надіслане чи відредаговане повідомлення
+        self.error = error  # опис помилки, якщо сервер відхилив виклик
+        self.received = received  # time.monotonic() отримання запиту
+
+    @property
+    def text(self) -> str:
+        return self.message.get('text', '') if self.message else ''
+
+
+class FakeBotApi:
+    """HTTP-сервер з підмножиною Bot API та станом чатів у пам'яті"""
+
+    def __init__(self, token: str, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.token = token
+        self.host = host
+        self.port = port
+        self.latency = latency  # штучна затримка кожної відповіді, с
+        self._server = None
+        self._updates = deque()
+        self._update_ids = itertools.count(1)
+        self._arrived = asyncio.Event()
+        self._message_ids = {}  # chat_id -> наступний message_id (у приватному чаті нумерація спільна)
+        self._messages = {}  # (chat_id, message_id) -> повідомлення
+        self._callbacks = {}  # id натискання кнопки -> chat_id, доки бот не відповів
+        self._callback_ids = itertools.count(1)
+        self._inboxes = {}  # chat_id -> asyncio.Queue[ApiCall]
+        self.polling = asyncio.Event()  # встановлюється першим getUpdates: бот запущений
+        self.requests = Counter()  # метод -> кількість запитів
+        self.errors = Counter()  # (метод, опис) -> кількість відхилених запитів
+        self.delivered = 0  # скільки оновлень бот отримав
+        self.methods = {
+            'getMe': self._get_me,
+            'getUpdates': self._get_updates,
+            'deleteWebhook': self._delete_webhook,
+            'sendMessage': self._send_message,
+            'editMessageText': self._edit_message_text,
+            'deleteMessage': self._delete_message,
+            'answerCallbackQuery': self._answer_callback_query,
+        }
+
+    @property
+    def url(self) -> str:
+        """Значення для config.BOT_API_URL"""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # Бік користувача
+
+    def inbox(self, chat_id: int) -> asyncio.Queue:
+        """Черга викликів бота, що стосуються чату (повідомлення, редагування, відповіді на кнопки)"""
+        inbox = self._inboxes.get(chat_id)
+        if inbox is None:
+            inbox = self._inboxes[chat_id] = asyncio.Queue()
+        return inbox
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {'id': user_id, 'is_bot': False, 'first_name': f"User {user_id}", 'language_code': 'uk'}
+
+    @staticmethod
+    def _chat(chat_id: int) -> dict:
+        return {'id': chat_id, 'type': 'private', 'first_name': f"User {chat_id}"}
+
+    def _next_message_id(self, chat_id: int) -> int:
+        message_id = self._message_ids.get(chat_id, 1)
+        self._message_ids[chat_id] = message_id + 1
+        return message_id
+
+    def _push(self, kind: str, payload: dict) -> float:
+        self._updates.append({'update_id': next(self._update_ids), kind: payload})
+        self._arrived.set()
+        return time.monotonic()
+
+    def send_text(self, user_id: int, text: str) -> float:
+        """Повідомлення користувача боту; повертає час, коли оновлення стало доступним боту"""
+        message = {
+            'message_id': self._next_message_id(user_id),
+            'date': int(time.time()),
+            'chat': self._chat(user_id),
+            'from': self._user(user_id),
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return self._push('message', message)
+
+    def press_button(self, user_id: int, message: dict, data: str) -> float:
+        """Натискання інлайн-кнопки під повідомленням бота"""
+        callback_id = str(next(self._callback_ids))
+        self._callbacks[callback_id] = user_id
+        return self._push('callback_query', {
+            'id': callback_id,
+            'from': self._user(user_id),
+            'message': message,
+            'chat_instance': str(user_id),
+            'data': data,
+        })
+
+    # Методи Bot API
+
+    async def _get_me(self, params: dict):
+        return {'id': BOT_ID, 'is_bot': True, 'first_name': 'Birthday Bot', 'username': BOT_USERNAME,
+                'can_join_groups': False, 'can_read_all_group_messages': False, 'supports_inline_queries': False}
+
+    async def _delete_webhook(self, params: dict):
+        return True
+
+    async def _get_updates(self, params: dict):
+        self.polling.set()
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 100))
+        timeout = float(params.get('timeout', 0))
+        # Оновлення з id меншим за offset підтверджені ботом
+        while self._updates and self._updates[0]['update_id'] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout > 0:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        updates = list(itertools.islice(self._updates, limit))
+        self.delivered += len(updates)
+        return updates
+
+    def _stored(self, params: dict) -> tuple[int, int, dict]:
+        chat_id, message_id = int(params['chat_id']), int(params['message_id'])
+        message = self._messages.get((chat_id, message_id))
+        if message is None:
+            raise ApiError(400, "Bad Request: message to edit not found")
+        return chat_id, message_id, message
+
+    @staticmethod
+    def _text(params: dict) -> str:
+        """Текст повідомлення так, як його побачить користувач: Telegram прибирає розмітку HTML"""
+        text = params['text']
+        if params.get('parse_mode') == 'HTML':
+            text = html.unescape(re.sub(r"<[^>]*>", "", text))
+        if not text.strip():
+            raise ApiError(400, "Bad Request: message text is empty")
+        if len(text.encode("utf-16-le")) // 2 > MESSAGE_LIMIT:
+            raise ApiError(400, "Bad Request: message is too long")
+        return text
+
+    @staticmethod
+    def _inline_markup(params: dict) -> dict | None:
+        """Клавіатура під повідомленням; звичайна клавіатура в повідомлення не потрапляє"""
+        reply_markup = json.loads(params['reply_markup']) if 'reply_markup' in params else None
+        return reply_markup if reply_markup is not None and 'inline_keyboard' in reply_markup else None
+
+    async def _send_message(self, params: dict):
+        chat_id = int(params['chat_id'])
+        text = self._text(params)
+        message = {
+            'message_id': self._next_message_id(chat_id),
+            'date': int(time.time()),
+            'chat': self._chat(chat_id),
+            'from': {'id': BOT_ID, 'is_bot': True, 'first_name': 'Birthday Bot', 'username': BOT_USERNAME},
+            'text': text,
+        }
+        reply_markup = self._inline_markup(params)
+        if reply_markup is not None:
+            message['reply_markup'] = reply_markup
+        self._messages[(chat_id, message['message_id'])] = message
+        return message
+
+    async def _edit_message_text(self, params: dict):
+        chat_id, message_id, message = self._stored(params)
+        text = self._text(params)
+        reply_markup = self._inline_markup(params)
+        if message['text'] == text and message.get('reply_markup') == reply_markup:
+            raise ApiError(400, "Bad Request: message is not modified: specified new message content and "
+                                "reply markup are exactly the same as a current content and reply markup of the message")
+        message = dict(message, text=text, edit_date=int(time.time()))
+        message.pop('reply_markup', None)
+        if reply_markup is not None:
+            message['reply_markup'] = reply_markup
+        self._messages[(chat_id, message_id)] = message
+        return message
+
+    async def _delete_message(self, params: dict):
+        chat_id, message_id = int(params['chat_id']), int(params['message_id'])
+        if self._messages.pop((chat_id, message_id), None) is None:
+            raise ApiError(400, "Bad Request: message to delete not found")
+        return True
+
+    async def _answer_callback_query(self, params: dict):
+        if self._callbacks.pop(params['callback_query_id'], None) is None:
+            raise ApiError(400, "Bad Request: query is too old and response timeout expired or query id is invalid")
+        return True
+
+    def _chat_of(self, method: str, params: dict) -> int | None:
+        if method == 'answerCallbackQuery':
+            return self._callbacks.get(params.get('callback_query_id'))
+        chat_id = params.get('chat_id')
+        return int(chat_id) if chat_id is not None else None
+
+    async def call(self, method: str, params: dict) -> tuple[int, dict]:
+        """Виконує метод; повертає HTTP-статус і тіло відповіді Bot API"""
+        self.requests[method] += 1
+        received = time.monotonic()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        handler = self.methods.get(method)
+        chat_id = self._chat_of(method, params)
+        try:
+            if handler is None:
+                raise ApiError(404, "Not Found")
+            result = await handler(params)
+        except ApiError as e:
+            self.errors[(method, e.description)] += 1
+            if chat_id is not None:
+                self.inbox(chat_id).put_nowait(ApiCall(method, chat_id, None, e.description, received))
+            return e.code, {'ok': False, 'error_code': e.code, 'description': e.description}
+        except (KeyError, ValueError) as e:
+            description = f"Bad Request: invalid parameters: {str(e)}"
+            self.errors[(method, description)] += 1
+            return 400, {'ok': False, 'error_code': 400, 'description': description}
+        if chat_id is not None and method != 'getUpdates':
+            self.inbox(chat_id).put_nowait(
+                ApiCall(method, chat_id, result if isinstance(result, dict) else None, None, received)
+            )
+        return 200, {'ok': True, 'result': result}
+
+    # HTTP
+
+    def _parse_request(self, target: str, headers: dict, body: bytes) -> tuple[str | None, dict]:
+        """Метод і параметри з /bot<token>/<метод>?...; None, якщо токен не збігається"""
+        url = urlsplit(target)
+        prefix, _, method = url.path.lstrip("/").partition("/")
+        params = dict(parse_qsl(url.query))
+        content_type = headers.get('content-type', '')
+        if body and content_type.startswith('application/json'):
+            params.update(json.loads(body))
+        elif body:
+            params.update(parse_qsl(body.decode("utf-8")))
+        return (method if prefix == f"bot{self.token}" else None), params
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Клієнт бота тримає з'єднання відкритими, тож запити читаються в циклі
+        try:
+            while parts := (await reader.readline()).decode("latin-1").split():
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                method, params = self._parse_request(parts[1] if len(parts) > 1 else "/", headers, body)
+                if method is None:
+                    status, payload = 401, {'ok': False, 'error_code': 401, 'description': 'Unauthorized'}
+                else:
+                    status, payload = await self.call(method, params)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.warning(f"Помилка обробки запиту: {str(e)}")
+        finally:
+            writer.close()
+
@@ -0,0 +1,108 @@
+"""Імітація Bot API для офлайн-перевірки диспетчера вихідних повідомлень.
+
+FakeBot приймає send_message так само, як справжній бот з rate_limiter, і кидає
+RetryAfter, якщо перевищено ліміти Telegram (загальний і на чат). Запуск
+python fake_bot.py проганяє розсилку з інтерактивними відповідями паралельно
+і друкує пропускну здатність та затримки.
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict, deque
+
+from telegram.error import RetryAfter
+
+from dispatcher import OutboundDispatcher, INTERACTIVE, SCHEDULED
+
+
+class FakeBot:
+    """Замінник бота: запити йдуть через rate_limiter, «сервер» перевіряє ліміти"""
+
+    def __init__(self, rate_limiter: OutboundDispatcher, global_limit: int = 30, chat_limit: int = 1,
+                 chat_burst: int = 3, latency: float = 0.0):
+        self.rate_limiter = rate_limiter
+        self.global_limit = global_limit
+        self.chat_limit = chat_limit
+        self.chat_burst = chat_burst
+        self.latency = latency
+        self._global_window = deque()
+        self._chat_windows = defaultdict(deque)
+        self.sent = []  # (час, chat_id, текст)
+        self.rejected = 0
+
+    @staticmethod
+    def _count_last_second(window: deque, now: float) -> int:
+        while window and window[0] <= now - 1:
+            window.popleft()
+        return len(window)
+
+    async def _api_send_message(self, chat_id: int, text: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        chat_window = self._chat_windows[chat_id]
+        if (self._count_last_second(self._global_window, now) >= self.global_limit
+                or self._count_last_second(chat_window, now) >= self.chat_limit + self.chat_burst):
+            self.rejected += 1
+            raise RetryAfter(1)
+        self._global_window.append(now)
+        chat_window.append(now)
+        self.sent.append((now, chat_id, text))
+        return {'chat_id': chat_id, 'text': text}
+
+    async def send_message(self, chat_id: int, text: str, rate_limit_args=None, **kwargs):
+        data = {'chat_id': chat_id, 'text': text}
+        return await self.rate_limiter.process_request(
+            self._api_send_message, (), data, 'sendMessage', data, rate_limit_args
+        )
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def simulate(fanout: int = 300, interactive: int = 30, latency: float = 0.02) -> dict:
+    """Розсилка на fanout чатів, під час якої інші користувачі отримують interactive відповідей"""
+    dispatcher = OutboundDispatcher()
+    bot = FakeBot(dispatcher, latency=latency)
+    await dispatcher.initialize()
+
+    async def timed(chat_id: int, priority: int, delay: float = 0.0):
+        await asyncio.sleep(delay)
+        started = time.monotonic()
+        await bot.send_message(chat_id, f"msg {chat_id}", rate_limit_args=priority)
+        return priority, time.monotonic() - started
+
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *(timed(chat_id, SCHEDULED) for chat_id in range(1, fanout + 1)),
+        *(timed(-chat_id - 1000000, INTERACTIVE, delay=chat_id * 0.1) for chat_id in range(interactive))
+    )
+    elapsed = time.monotonic() - started
+    await dispatcher.shutdown()
+
+    latencies = defaultdict(list)
+    for priority, latency in results:
+        latencies[priority].append(latency)
+    return {
+        'sent': len(bot.sent),
+        'seconds': round(elapsed, 2),
+        'messages_per_second': round(len(bot.sent) / elapsed, 1),
+        'retry_after': bot.rejected,
+        'interactive_p50': round(_percentile(latencies[INTERACTIVE], 0.5), 3),
+        'interactive_p99': round(_percentile(latencies[INTERACTIVE], 0.99), 3),
+        'scheduled_p50': round(_percentile(latencies[SCHEDULED], 0.5), 3),
+        'scheduled_p99': round(_percentile(latencies[SCHEDULED], 0.99), 3),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Офлайн-перевірка диспетчера вихідних повідомлень")
+    parser.add_argument("--fanout", type=int, default=300, help="кількість нагадувань у розсилці")
+    parser.add_argument("--interactive", type=int, default=30, help="кількість інтерактивних відповідей")
+    parser.add_argument("--latency", type=float, default=0.02, help="затримка «сервера» в секундах")
+    args = parser.parse_args()
+    print(asyncio.run(simulate(args.fanout, args.interactive, args.latency)))
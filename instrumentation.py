@@ -0,0 +1,235 @@
+"""Інструментування бота: заміри обробників і сховища, локальний HTTP-сервер
+метрик та семплювальний профайлер, який вмикається під час роботи.
+
+Адреси локального сервера:
+    /metrics                     метрики у форматі Prometheus
+    /profile/start?interval=0.005  почати семплювання головного потоку
+    /profile/stop                зупинити й отримати стеки у форматі folded (для flamegraph)
+"""
+import asyncio
+import functools
+import logging
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from urllib.parse import urlsplit, parse_qs
+
+from telegram.ext import ConversationHandler
+
+from metrics import (render, HANDLER_LATENCY, HANDLER_IN_FLIGHT, HANDLER_ERRORS, CONVERSATION_TRANSITIONS,
+                     STORAGE_LATENCY, STORAGE_ERRORS)
+from records import Birthday
+from storage import BirthdayStore
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedStore(BirthdayStore):
+    """Обгортка над сховищем, що міряє час і помилки кожної операції"""
+
+    def __init__(self, backend: BirthdayStore):
+        self.backend = backend
+
+    async def _timed(self, operation: str, awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        except Exception:
+            STORAGE_ERRORS.labels(operation).inc()
+            raise
+        finally:
+            STORAGE_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+    async def exists(self, user_id: int) -> bool:
+        return await self._timed('exists', self.backend.exists(user_id))
+
+    async def version(self, user_id: int):
+        return await self._timed('version', self.backend.version(user_id))
+
+    async def read(self, user_id: int) -> list[Birthday]:
+        return await self._timed('read', self.backend.read(user_id))
+
+    async def read_page(self, user_id: int, start: int, count: int) -> tuple[list[Birthday], int]:
+        return await self._timed('read_page', self.backend.read_page(user_id, start, count))
+
+    async def append(self, user_id: int, birthday: Birthday) -> None:
+        return await self._timed('append', self.backend.append(user_id, birthday))
+
+    async def append_many(self, user_id: int, birthdays: list[Birthday]) -> None:
+        return await self._timed('append_many', self.backend.append_many(user_id, birthdays))
+
+    async def delete(self, user_id: int, index: int) -> Birthday:
+        return await self._timed('delete', self.backend.delete(user_id, index))
+
+    async def scan(self) -> list[tuple[int, list[Birthday]]]:
+        return await self._timed('scan', self.backend.scan())
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def _state_label(state, state_names: dict) -> str:
+    if state == ConversationHandler.END:
+        return 'END'
+    return state_names.get(state, str(state))
+
+
+def _wrap(handler, conversation: str | None = None, from_state: str | None = None, state_names: dict = None) -> None:
+    callback = handler.callback
+    if getattr(callback, '_instrumented', False):
+        return
+    name = callback.__name__
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        in_flight = HANDLER_IN_FLIGHT.labels(name)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            result = await callback(update, context)
+        except Exception:
+            HANDLER_ERRORS.labels(name).inc()
+            raise
+        finally:
+            HANDLER_LATENCY.labels(name).observe(time.perf_counter() - started)
+            in_flight.dec()
+        if conversation is not None and result is not None:
+            CONVERSATION_TRANSITIONS.labels(conversation, from_state, _state_label(result, state_names)).inc()
+        return result
+
+    wrapper._instrumented = True
+    handler.callback = wrapper
+
+
+def instrument_application(application, state_names: dict[str, dict]) -> None:
+    """Обгортає колбеки всіх зареєстрованих обробників (і обробників усередині розмов)
+    замірами часу; для розмов також рахує переходи між станами.
+    state_names: назва розмови -> {стан: назва стану для міток}"""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if not isinstance(handler, ConversationHandler):
+                _wrap(handler)
+                continue
+            conversation = handler.name or 'conversation'
+            names = state_names.get(conversation, {})
+            for child in handler.entry_points:
+                _wrap(child, conversation, 'ENTRY', names)
+            for state, children in handler.states.items():
+                for child in children:
+                    _wrap(child, conversation, _state_label(state, names), names)
+            for child in handler.fallbacks:
+                _wrap(child, conversation, 'FALLBACK', names)
+
+
+class SamplingProfiler:
+    """Семплювальний профайлер: окремий потік кожні interval секунд знімає стек
+    потоку з циклом подій і рахує однакові стеки"""
+
+    def __init__(self):
+        self._stacks = StackCounter()
+        self._thread = None
+        self._stop = threading.Event()
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float, thread_id: int | None = None) -> None:
+        if self.running:
+            return
+        target = thread_id if thread_id is not None else threading.get_ident()
+        self._stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, args=(target, interval), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Зупиняє профайлер і повертає стеки у форматі folded: «a;b;c кількість»"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def _sample(self, thread_id: int, interval: float) -> None:
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class MetricsServer:
+    """Мінімальний HTTP-сервер для збору метрик і керування профайлером.
+    Слухає лише вказану адресу (за замовчуванням локальну)"""
+
+    def __init__(self, host: str, port: int, profiler_interval: float):
+        self.host = host
+        self.port = port
+        self.profiler_interval = profiler_interval
+        self.profiler = SamplingProfiler()
+        self._server = None
+        self._loop_thread = None
+
+    async def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Метрики доступні на http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        self.profiler.stop()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _route(self, target: str) -> tuple[str, str]:
+        url = urlsplit(target)
+        if url.path == '/metrics':
+            return '200 OK', render()
+        if url.path == '/profile/start':
+            interval = float(parse_qs(url.query).get('interval', [self.profiler_interval])[0])
+            if not interval > 0:
+                raise ValueError("interval must be positive")
+            self.profiler.start(interval, self._loop_thread)
+            return '200 OK', f"profiler started, interval {interval}\n"
+        if url.path == '/profile/stop':
+            samples = self.profiler.samples
+            return '200 OK', f"# samples: {samples}\n" + self.profiler.stop()
+        return '404 Not Found', "not found\n"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            # Заголовки запиту не потрібні, але їх треба дочитати
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != 'GET':
+                status, body = '405 Method Not Allowed', "only GET\n"
+            else:
+                try:
+                    status, body = self._route(parts[1])
+                except ValueError as e:
+                    status, body = '400 Bad Request', f"{e}\n"
+            data = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"Помилка сервера метрик: {str(e)}")
+        finally:
+            writer.close()
@@ -0,0 +1,76 @@
+from functools import lru_cache
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
+
+from records import MONTHS
+
+# Скільки записів показується на одній сторінці та скільки кнопок сторінок видно одночасно
+ITEMS_PER_PAGE = 10
+PAGE_BUTTONS = 10
+PAGE_BUTTONS_PER_ROW = 5
+
+# Об'єкти розмітки Telegram незмінні, тож їх можна створити один раз і використовувати повторно
+
+
+@lru_cache(maxsize=None)
+def get_menu_keyboard() -> ReplyKeyboardMarkup:
+    keyboard = [
+        [KeyboardButton("Додати дату")],
+        [KeyboardButton("Показати дати")],
+        [KeyboardButton("Найближчий день народження")],
+        [KeyboardButton("Видалити дату")]
+    ]
+    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+
+
+@lru_cache(maxsize=None)
+def get_cancel_keyboard() -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup([[KeyboardButton("Скасувати")]], resize_keyboard=True)
+
+
+@lru_cache(maxsize=None)
+def get_month_keyboard() -> InlineKeyboardMarkup:
+    """Кнопки з місяцями по три в ряд"""
+    keyboard = [
+        [InlineKeyboardButton(month, callback_data=month) for month in MONTHS[start:start + 3]]
+        for start in range(0, len(MONTHS), 3)
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+def count_pages(total_items: int) -> int:
+    """Кількість сторінок для списку (щонайменше одна)"""
+    return max(1, -(-total_items // ITEMS_PER_PAGE))
+
+
+@lru_cache(maxsize=4096)
+def get_pagination_keyboard(current_page: int, total_pages: int, prefix: str = "page") -> InlineKeyboardMarkup | None:
+    """Кнопки сторінок: вікно з PAGE_BUTTONS сторінок навколо поточної,
+    плюс переходи на першу й останню, якщо вони не потрапили у вікно.
+    callback_data кнопок — «{prefix}_{номер сторінки}»"""
+    if total_pages <= 1:
+        return None
+
+    first = max(1, min(current_page - PAGE_BUTTONS // 2, total_pages - PAGE_BUTTONS + 1))
+    last = min(total_pages, first + PAGE_BUTTONS - 1)
+
+    keyboard = []
+    row = []
+    for page in range(first, last + 1):
+        # Виділяємо поточну сторінку
+        text = f"[{page}]" if page == current_page else str(page)
+        row.append(InlineKeyboardButton(text, callback_data=f"{prefix}_{page}"))
+        if len(row) == PAGE_BUTTONS_PER_ROW:
+            keyboard.append(row)
+            row = []
+    if row:
+        keyboard.append(row)
+
+    navigation = []
+    if first > 1:
+        navigation.append(InlineKeyboardButton("« 1", callback_data=f"{prefix}_1"))
+    if last < total_pages:
+        navigation.append(InlineKeyboardButton(f"{total_pages} »", callback_data=f"{prefix}_{total_pages}"))
+    if navigation:
+        keyboard.append(navigation)
+    return InlineKeyboardMarkup(keyboard)
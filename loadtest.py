@@ -0,0 +1,338 @@
+"""Наскрізне навантажувальне тестування бота через локальну імітацію Bot API.
+
+Запускає імітацію сервера Telegram (fake_api.py) і справжнього бота (main.main():
+опитування getUpdates, ConversationHandler, обробники, сховище) в окремому процесі
+з окремою робочою директорією, спрямованого на імітацію через BOT_API_URL. Тисячі
+віртуальних користувачів одночасно проходять сценарії додавання дати, гортання
+сторінок і видалення, як у клієнті Telegram: надсилають повідомлення, чекають
+відповіді бота, натискають кнопки з його клавіатур. Наприкінці друкується
+пропускна здатність, процентилі затримки кожного кроку (від появи оновлення на
+сервері до відповіді бота) і частка помилок.
+
+Використання:
+    python loadtest.py --users 2000 --duration 60 --records 100
+    python loadtest.py --users 500 --port 8081 --external-bot   (бота, наприклад
+        python sharding.py, запускаєте самі з BOT_API_URL = 'http://127.0.0.1:8081')
+
+За замовчуванням бот запускається без обмеження вихідних повідомлень Telegram
+(30 за секунду), щоб міряти сам бот, а не ліміт; --telegram-limits його залишає.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from fake_api import FakeBotApi
+from records import Birthday, MONTHS
+
+logger = logging.getLogger(__name__)
+
+NAMES = ("Олександр", "Марія", "Іван", "Оксана", "Петро", "Наталія", "Андрій", "Ірина", "Тарас", "Олена")
+
+# Частки сценаріїв серед дій користувачів
+FLOW_WEIGHTS = {'add': 4, 'page': 4, 'delete': 2}
+
+NUMBERED_LINE = re.compile(r"^(\d+)\. ", re.MULTILINE)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def generate(directory: str, users: int, records: int, seed: int = 0) -> None:
+    """Файли user_1.txt ... user_N.txt по records випадкових записів (як у benchmark.py)"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for user_id in range(1, users + 1):
+        lines = [
+            f"{Birthday(f'{rng.choice(NAMES)} {i}', rng.randint(1, 28), rng.randint(1, 12), rng.randint(1950, 2010))}\n"
+            for i in range(records)
+        ]
+        with open(os.path.join(directory, f"user_{user_id}.txt"), "w", encoding="utf-8") as file:
+            file.writelines(lines)
+
+
+def run_bot(directory: str, overrides: dict) -> None:
+    """Точка входу процесу бота: config змінюється до імпорту main, як у робочих процесах sharding.py"""
+    os.chdir(directory)
+    import config
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    import main
+    # Журнал кожного запиту HTTP-клієнта бота заглушив би решту
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    main.main()
+
+
+class Stats:
+    """Результати кроків сценаріїв усіх віртуальних користувачів"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)  # крок -> затримки, с
+        self.outcomes = defaultdict(Counter)  # крок -> результат -> кількість
+        self.flows = Counter()  # сценарій -> кількість завершених
+        self.api_errors = Counter()  # опис помилки Bot API у відповідь на виклик бота -> кількість
+
+    def record(self, step: str, outcome: str, latency: float | None = None) -> None:
+        self.outcomes[step][outcome] += 1
+        if latency is not None:
+            self.latencies[step].append(latency)
+
+
+class StepFailed(Exception):
+    """Крок не отримав очікуваної відповіді; сценарій переривається"""
+
+
+class VirtualUser:
+    """Користувач Telegram, що проходить сценарії через імітацію Bot API"""
+
+    def __init__(self, api: FakeBotApi, user_id: int, stats: Stats, rng: random.Random,
+                 think_time: float, timeout: float):
+        self.api = api
+        self.user_id = user_id
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time
+        self.timeout = timeout
+        self.inbox = api.inbox(user_id)
+
+    async def step(self, name: str, send, expect) -> dict:
+        """Виконує дію send() і чекає повідомлення бота, для якого expect(метод, текст) істинне.
+        Повертає це повідомлення; без нього — StepFailed"""
+        # Запізнілі відповіді на попередні кроки не мають зарахуватись цьому
+        while not self.inbox.empty():
+            self.inbox.get_nowait()
+        sent = send()
+        deadline = sent + self.timeout
+        while True:
+            try:
+                call = await asyncio.wait_for(self.inbox.get(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self.stats.record(name, 'timeout')
+                raise StepFailed(name)
+            if call.error is not None:
+                self.stats.api_errors[f"{call.method}: {call.error}"] += 1
+                continue
+            if call.text.startswith("⏳"):
+                self.stats.record(name, 'throttled')
+                raise StepFailed(name)
+            if call.text.startswith("❌"):
+                self.stats.record(name, 'error')
+                raise StepFailed(name)
+            if call.message is not None and expect(call.method, call.text):
+                self.stats.record(name, 'ok', call.received - sent)
+                return call.message
+
+    def text(self, text: str):
+        return lambda: self.api.send_text(self.user_id, text)
+
+    def button(self, message: dict, data: str):
+        return lambda: self.api.press_button(self.user_id, message, data)
+
+    @staticmethod
+    def buttons(message: dict) -> list[str]:
+        keyboard = message.get('reply_markup', {}).get('inline_keyboard', [])
+        return [button['callback_data'] for row in keyboard for button in row if 'callback_data' in button]
+
+    async def think(self) -> None:
+        await asyncio.sleep(self.think_time * self.rng.uniform(0.5, 1.5))
+
+    async def add_flow(self) -> None:
+        await self.step('add:start', self.text("Додати дату"), lambda method, text: "ім'я" in text)
+        await self.think()
+        name = f"{self.rng.choice(NAMES)} {self.rng.randint(1, 9999)}"
+        await self.step('add:name', self.text(name), lambda method, text: "день" in text)
+        await self.think()
+        months = await self.step('add:day', self.text(str(self.rng.randint(1, 28))),
+                                 lambda method, text: "місяць" in text)
+        await self.think()
+        month = self.rng.choice(self.buttons(months) or MONTHS)
+        await self.step('add:month', self.button(months, month), lambda method, text: "рік" in text)
+        await self.think()
+        await self.step('add:year', self.text(str(self.rng.randint(1950, 2010))),
+                        lambda method, text: text.startswith("✅"))
+
+    async def page_flow(self) -> None:
+        page = await self.step('page:show', self.text("Показати дати"),
+                               lambda method, text: "Сторінка" in text or "немає" in text)
+        pages = [data for data in self.buttons(page) if data.startswith("page_")]
+        if not pages:
+            return
+        await self.think()
+        # Поточна сторінка на клавіатурі позначена, але має ту саму callback_data — її редагування нічого не змінить
+        current = re.search(r"Сторінка (\d+)", page['text'])
+        pages = [data for data in pages if current is None or data != f"page_{current.group(1)}"] or pages
+        await self.step('page:switch', self.button(page, self.rng.choice(pages)),
+                        lambda method, text: method == 'editMessageText')
+
+    async def delete_flow(self) -> None:
+        listing = await self.step('delete:list', self.text("Видалити дату"),
+                                  lambda method, text: text.startswith("🗑") or "немає" in text)
+        numbers = NUMBERED_LINE.findall(listing['text'])
+        if not numbers:
+            return
+        await self.think()
+        await self.step('delete:number', self.text(self.rng.choice(numbers)),
+                        lambda method, text: "видалено" in text or "змінився" in text)
+
+    async def run(self, deadline: float) -> None:
+        flows = {'add': self.add_flow, 'page': self.page_flow, 'delete': self.delete_flow}
+        names, weights = list(FLOW_WEIGHTS), list(FLOW_WEIGHTS.values())
+        # Спочатку кожен користувач додає дату, далі — випадкові сценарії
+        flow = 'add'
+        while time.monotonic() < deadline:
+            try:
+                await flows[flow]()
+                self.stats.flows[flow] += 1
+            except StepFailed:
+                # Розмова могла лишитись незавершеною — виходимо з неї, як зробив би користувач
+                await self.recover()
+            await self.think()
+            flow = self.rng.choices(names, weights)[0]
+
+    async def recover(self) -> None:
+        # Відповідь не чекаємо: поза розмовою бот на /cancel не відповідає
+        self.api.send_text(self.user_id, "/cancel")
+
+
+async def run_load(api: FakeBotApi, users: int, duration: float, ramp_up: float, think_time: float,
+                   timeout: float, seed: int) -> tuple[Stats, float]:
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + ramp_up + duration
+
+    async def user(user_id: int) -> None:
+        # Користувачі підключаються поступово протягом ramp_up
+        await asyncio.sleep(ramp_up * (user_id - 1) / users)
+        await VirtualUser(api, user_id, stats, random.Random(seed * 1000003 + user_id), think_time, timeout).run(deadline)
+
+    await asyncio.gather(*(user(user_id) for user_id in range(1, users + 1)))
+    return stats, time.monotonic() - started
+
+
+def report(stats: Stats, api: FakeBotApi, users: int, elapsed: float) -> dict:
+    steps = {}
+    for step in sorted(stats.outcomes):
+        outcomes = stats.outcomes[step]
+        count = sum(outcomes.values())
+        latencies = stats.latencies[step]
+        steps[step] = {
+            'count': count,
+            'ok': outcomes['ok'],
+            'timeout': outcomes['timeout'],
+            'error': outcomes['error'],
+            'throttled': outcomes['throttled'],
+            'error_rate': (count - outcomes['ok']) / count if count else 0.0,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p90_ms': percentile(latencies, 0.9) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': max(latencies, default=0.0) * 1000,
+        }
+    total = sum(step['count'] for step in steps.values())
+    ok = sum(step['ok'] for step in steps.values())
+    return {
+        'users': users,
+        'seconds': elapsed,
+        'steps': total,
+        'steps_per_second': ok / elapsed,
+        'flows': dict(stats.flows),
+        'flows_per_second': sum(stats.flows.values()) / elapsed,
+        'updates_delivered': api.delivered,
+        'api_requests': dict(api.requests),
+        'api_requests_per_second': sum(api.requests.values()) / elapsed,
+        'error_rate': (total - ok) / total if total else 0.0,
+        'api_errors': dict(stats.api_errors),
+        'by_step': steps,
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"Користувачів: {result['users']}, тривалість: {result['seconds']:.1f} с")
+    print(f"Кроків: {result['steps']} ({result['steps_per_second']:.1f} успішних/с), "
+          f"сценаріїв: {sum(result['flows'].values())} ({result['flows_per_second']:.1f}/с) {result['flows']}")
+    print(f"Оновлень отримано ботом: {result['updates_delivered']}, "
+          f"запитів до API: {sum(result['api_requests'].values())} ({result['api_requests_per_second']:.1f}/с)")
+    print(f"Частка помилок: {result['error_rate']:.2%}")
+    print(f"{'крок':<16}{'к-сть':>8}{'p50, мс':>10}{'p90, мс':>10}{'p99, мс':>10}{'макс, мс':>10}"
+          f"{'тайм-аут':>10}{'помилка':>9}{'ліміт':>7}")
+    for step, values in result['by_step'].items():
+        print(
+            f"{step:<16}{values['count']:>8}{values['p50_ms']:>10.1f}{values['p90_ms']:>10.1f}"
+            f"{values['p99_ms']:>10.1f}{values['max_ms']:>10.1f}{values['timeout']:>10}"
+            f"{values['error']:>9}{values['throttled']:>7}"
+        )
+    for description, count in result['api_errors'].items():
+        print(f"Помилка Bot API ({count}): {description}")
+
+
+async def main(args) -> dict:
+    from config import TOKEN
+
+    api = FakeBotApi(TOKEN, port=args.port, latency=args.api_latency)
+    await api.start()
+    process = None
+    try:
+        if args.external_bot:
+            logger.warning(f"Очікуємо бота: запустіть його з BOT_API_URL = '{api.url}'")
+        else:
+            directory = args.data_dir or tempfile.mkdtemp(prefix="loadtest-")
+            if args.records:
+                generate(os.path.join(directory, 'user_data'), args.users, args.records, args.seed)
+            overrides = {'BOT_API_URL': api.url, 'RUN_MODE': 'polling', 'SHARD_COUNT': 1}
+            if not args.telegram_limits:
+                overrides.update(OUTBOUND_GLOBAL_RATE=1e9, OUTBOUND_CHAT_RATE=1e9, OUTBOUND_CHAT_BURST=1e9)
+            process = multiprocessing.get_context("spawn").Process(
+                target=run_bot, args=(directory, overrides), name="bot"
+            )
+            process.start()
+            logger.info(f"Бот запущено, дані в {directory}")
+        await asyncio.wait_for(api.polling.wait(), args.startup_timeout)
+        logger.info(f"Бот опитує сервер; {args.users} користувачів, {args.duration} с")
+        stats, elapsed = await run_load(
+            api, args.users, args.duration, args.ramp_up, args.think_time, args.timeout, args.seed
+        )
+        return report(stats, api, args.users, elapsed)
+    finally:
+        if process is not None:
+            # SIGTERM — звичайна зупинка бота: дані записуються на диск
+            process.terminate()
+            await asyncio.get_running_loop().run_in_executor(None, process.join)
+        await api.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000, help='кількість одночасних користувачів')
+    parser.add_argument('--duration', type=float, default=60, help='тривалість після підключення всіх, с')
+    parser.add_argument('--ramp-up', type=float, default=10, help='за скільки секунд підключаються всі, с')
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help='середня пауза користувача між діями, с (ліміт бота — INBOUND_RATE за секунду)')
+    parser.add_argument('--timeout', type=float, default=10, help='скільки чекати відповіді бота, с')
+    parser.add_argument('--records', type=int, default=0, help='скільки записів має кожен користувач на початку')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=0, help='порт імітації Bot API (0 — будь-який вільний)')
+    parser.add_argument('--api-latency', type=float, default=0.0, help='затримка кожної відповіді імітації, с')
+    parser.add_argument('--telegram-limits', action='store_true',
+                        help='не знімати обмеження вихідних повідомлень з config.py')
+    parser.add_argument('--external-bot', action='store_true', help='не запускати бота, а чекати на вже запущеного')
+    parser.add_argument('--startup-timeout', type=float, default=120, help='скільки чекати запуску бота, с')
+    parser.add_argument('--data-dir', help='робоча директорія бота (за замовчуванням тимчасова)')
+    parser.add_argument('--save', help='зберегти результати у JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    result = asyncio.run(main(args))
+    print_report(result)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
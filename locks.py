@@ -0,0 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class UserLockManager:
+    """Асинхронні замки на кожного користувача.
+
+    Замки розкладені по шардах за user_id і живуть лише доки їх хтось тримає
+    або чекає: простоюючий замок одразу видаляється, тож пам'ять не росте
+    з кількістю користувачів, які колись писали боту.
+    """
+
+    def __init__(self, shards: int = 64):
+        self._shards = [{} for _ in range(shards)]  # user_id -> [замок, кількість власників і тих, хто чекає]
+
+    def _shard(self, user_id: int) -> dict:
+        return self._shards[hash(user_id) % len(self._shards)]
+
+    @asynccontextmanager
+    async def lock(self, user_id: int):
+        shard = self._shard(user_id)
+        entry = shard.get(user_id)
+        if entry is None:
+            entry = shard[user_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del shard[user_id]
+
+    def __len__(self) -> int:
+        """Кількість замків, що зараз використовуються"""
+        return sum(len(shard) for shard in self._shards)
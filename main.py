@@ -1,22 +1,115 @@
+import asyncio
+import html
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, ConversationHandler, CallbackQueryHandler
-from config import TOKEN
-from datetime import datetime, date
 import os
+import tempfile
+from telegram import Update, InlineKeyboardMarkup
+from telegram.error import BadRequest
+from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, ConversationHandler, CallbackQueryHandler
+from config import (TOKEN, BOT_API_URL, USER_DATA_DIR, STORAGE_IO_WORKERS, CACHE_MAX_USERS, CACHE_MAX_RECORDS,
+                    RENDER_CACHE_MAX_ENTRIES, RENDER_CACHE_MAX_CHARS, UPCOMING_DEFAULT_DAYS, UPCOMING_MAX_DAYS,
+                    STORAGE_BACKEND, SQLITE_PATH, REMINDER_TIME, REMINDER_OFFSETS, REMINDER_MAX_OFFSET,
+                    USER_SETTINGS_PATH, REMINDER_STATE_PATH, DEFAULT_TIMEZONE, REMINDER_TICK_MINUTES, OUTBOUND_GLOBAL_RATE, OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST,
+                    RUN_MODE, CONCURRENT_UPDATES, SHARD_COUNT, INBOUND_RATE, INBOUND_BURST, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL,
+                    WEBHOOK_SECRET_TOKEN, COMPACTION_RATIO, COMPACTION_MIN_ENTRIES, METRICS_LISTEN, METRICS_PORT,
+                    PROFILER_INTERVAL, IMPORT_MAX_FILE_SIZE, IMPORT_MAX_RECORDS, IMPORT_ERRORS_SHOWN,
+                    PERSISTENCE_PATH, PERSISTENCE_UPDATE_INTERVAL, PERSISTENCE_FLUSH_DELAY, SCAN_PROCESSES,
+                    SCAN_PARALLEL_THRESHOLD, SCAN_SNAPSHOT)
+from storage import BirthdayStore, FileBirthdayStore, RecordChangedError
+from sqlite_store import SqliteBirthdayStore
+from cache import CachedBirthdayStore, RecordCache
+from dispatcher import OutboundDispatcher
+from update_processor import PerUserUpdateProcessor
+from throttling import InboundThrottle
+from instrumentation import InstrumentedStore, MetricsServer, instrument_application
+from metrics import CACHE_USERS, CACHE_RECORDS
+from reminders import ZonedCalendar, ReminderScheduler
+from user_settings import UserSettings, parse_timezone
+from clock import Clock
+from bulk_io import detect_format, read_import, export_to_file
+from persistence import SqlitePersistence
+from rendering import RenderCache, iter_chunks, shorten, with_header
+from keyboards import (get_menu_keyboard, get_cancel_keyboard, get_month_keyboard, get_pagination_keyboard,
+                       count_pages, ITEMS_PER_PAGE)
+from records import Birthday, MONTHS, MONTH_NUMBER, MIN_YEAR, days_word, years_word, join_names, validate_name
+from birthday_index import normalize_name
+from birthday_stats import BirthdayStats, AGE_STEP, AGE_GROUPS
+from datetime import date, timedelta
 
 # Налаштування логування
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                     level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Створюємо директорію для зберігання даних користувачів, якщо вона не існує
-if not os.path.exists("user_data"):
-    os.makedirs("user_data")
+def create_backend() -> BirthdayStore:
+    """Створює сховище, вибране в config.STORAGE_BACKEND"""
+    if STORAGE_BACKEND == 'sqlite':
+        return SqliteBirthdayStore(SQLITE_PATH)
+    if STORAGE_BACKEND == 'file':
+        # Директорія створюється, якщо вона не існує
+        return FileBirthdayStore(
+            USER_DATA_DIR,
+            max_workers=STORAGE_IO_WORKERS,
+            compaction_ratio=COMPACTION_RATIO,
+            compaction_min_entries=COMPACTION_MIN_ENTRIES,
+            scan_processes=SCAN_PROCESSES,
+            scan_parallel_threshold=SCAN_PARALLEL_THRESHOLD,
+            snapshot=SCAN_SNAPSHOT
+        )
+    raise ValueError(f"Невідоме сховище: {STORAGE_BACKEND}")
+
+# Стан бота створюється в build_application (create_services), щоб import main
+# не створював директорію, базу й пул потоків і не читав шляхи з config, які
+# sharding.configure_shard змінює для кожного шарда
+
+# Сховище даних користувачів
+store: CachedBirthdayStore | None = None
+
+# Відрендерені повні списки дат (для видалення) за версією даних користувача
+render_cache: RenderCache | None = None
+
+# Локальний сервер метрик і профайлера (None, якщо METRICS_PORT не задано)
+metrics_server: MetricsServer | None = None
+
+# Глобальний індекс (місяць, день) для нагадувань, оновлюється при додаванні та видаленні,
+# розкладений за часовими поясами користувачів; поточний час дає лише clock
+clock = Clock()
+user_settings: UserSettings | None = None
+calendar_index: ZonedCalendar | None = None
+reminder_scheduler: ReminderScheduler | None = None
+
+def create_store() -> CachedBirthdayStore:
+    """Сховище з кешем розібраних записів, щоб гортання сторінок не перечитувало дані;
+    кожна операція сховища заміряється, зміни потрапляють в індекс нагадувань"""
+    cached = CachedBirthdayStore(
+        InstrumentedStore(create_backend()),
+        RecordCache(max_users=CACHE_MAX_USERS, max_records=CACHE_MAX_RECORDS)
+    )
+    cached.subscribe(calendar_index)
+    CACHE_USERS.set_function(lambda: cached.cache.stats()['users'])
+    CACHE_RECORDS.set_function(lambda: cached.cache.stats()['records'])
+    return cached
+
+def create_services() -> None:
+    """Створює ще не створений стан бота; вже підставлене (як у benchmark.py) лишається"""
+    global store, render_cache, metrics_server, user_settings, calendar_index, reminder_scheduler
+    if reminder_scheduler is None:
+        user_settings = UserSettings(USER_SETTINGS_PATH, REMINDER_OFFSETS, DEFAULT_TIMEZONE)
+        calendar_index = ZonedCalendar(user_settings.get_timezone)
+        reminder_scheduler = ReminderScheduler(
+            calendar_index, user_settings, REMINDER_TIME, timedelta(minutes=REMINDER_TICK_MINUTES), clock,
+            REMINDER_STATE_PATH
+        )
+    if store is None:
+        store = create_store()
+    if render_cache is None:
+        render_cache = RenderCache(max_entries=RENDER_CACHE_MAX_ENTRIES, max_chars=RENDER_CACHE_MAX_CHARS)
+    if metrics_server is None and METRICS_PORT:
+        metrics_server = MetricsServer(METRICS_LISTEN, METRICS_PORT, PROFILER_INTERVAL)
 
-def get_user_file_path(user_id):
-    """Повертає шлях до файлу даних конкретного користувача"""
-    return f"user_data/user_{user_id}.txt"
+def local_today(user_id: int) -> date:
+    """Сьогоднішня дата в часовому поясі користувача"""
+    return user_settings.local_now(user_id, clock.now()).date()
 
 # Словник для зберігання даних користувачів
 user_data = {}
@@ -26,18 +119,16 @@ AWAITING_DELETE_NUMBER = 0
 AWAITING_NAME = "AWAITING_NAME"
 AWAITING_DATE = "AWAITING_DATE"
 
+# Стан очікування файлу для імпорту
+AWAITING_IMPORT_FILE = 0
+
 # Стани розмови
 NAME, DAY, MONTH, YEAR = range(4)
 
-# Оновлюємо кнопки меню
-def get_menu_keyboard():
-    keyboard = [
-        [KeyboardButton("Додати дату")],
-        [KeyboardButton("Показати дати")],
-        [KeyboardButton("Найближчий день народження")],
-        [KeyboardButton("Видалити дату")]
-    ]
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+# Назви станів для метрик переходів розмов
+STATE_NAMES = {NAME: 'NAME', DAY: 'DAY', MONTH: 'MONTH', YEAR: 'YEAR'}
+DELETE_STATE_NAMES = {AWAITING_DELETE_NUMBER: 'AWAITING_DELETE_NUMBER'}
+IMPORT_STATE_NAMES = {AWAITING_IMPORT_FILE: 'AWAITING_IMPORT_FILE'}
 
 # Команда старт
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -72,79 +163,50 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             reply_markup=get_menu_keyboard()
         )
 
-# Оновлена функція для пагінації
+async def load_page(user_id: int, page: int) -> tuple[list[Birthday], int, int]:
+    """Записи сторінки, їх загальна кількість і номер сторінки, обмежений реальною кількістю сторінок.
+    Читається лише потрібна сторінка, а не весь список"""
+    page = max(page, 1)
+    page_data, total = await store.read_page(user_id, (page - 1) * ITEMS_PER_PAGE, ITEMS_PER_PAGE)
+    total_pages = count_pages(total)
+    if page > total_pages:
+        # Записів стало менше — показуємо останню сторінку
+        page = total_pages
+        page_data, total = await store.read_page(user_id, (page - 1) * ITEMS_PER_PAGE, ITEMS_PER_PAGE)
+    return page_data, total, page
+
+def render_page(page_data, total: int, page: int) -> tuple[str, InlineKeyboardMarkup | None]:
+    """Текст і кнопки сторінки списку"""
+    total_pages = count_pages(total)
+    start_index = (page - 1) * ITEMS_PER_PAGE
+    
+    # Форматування даних з HTML тегами
+    if page_data:
+        numbered_data = '\n'.join([
+            f"<b>{start_index + i + 1}.</b> <code>{html.escape(str(birthday))}</code>" 
+            for i, birthday in enumerate(page_data)
+        ])
+    else:
+        numbered_data = "<i>Немає записів на цій сторінці</i>"
+    
+    message_text = f"📋 <b>Сторінка {page} з {total_pages}</b>\n\n{numbered_data}"
+    return message_text, get_pagination_keyboard(page, total_pages)
+
+# Показ списку дат посторінково
 async def show_dates(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.message.from_user.id
-    user_file = get_user_file_path(user_id)
     
     try:
-        if not os.path.exists(user_file):
+        if not await store.exists(user_id):
             await update.message.reply_text("У вас поки немає збережених дат.", reply_markup=get_menu_keyboard())
             return
 
-        with open(user_file, "r", encoding="utf-8") as file:
-            data = file.readlines()
-        
         # Отримуємо поточну сторінку з user_data або встановлюємо 1 за замовчуванням
-        current_page = context.user_data.get('current_page', 1)
-        
-        # Розрахунок індексів для поточної сторінки
-        items_per_page = 10
-        start_index = (current_page - 1) * items_per_page
-        end_index = min(start_index + items_per_page, len(data))
-        
-        # Отримання даних для поточної сторінки
-        page_data = data[start_index:end_index] if data else []
-        
-        # Форматування даних з HTML тегами
-        if page_data:
-            numbered_data = '\n'.join([
-                f"<b>{start_index + i + 1}.</b> <code>{line.strip()}</code>" 
-                for i, line in enumerate(page_data)
-            ])
-        else:
-            numbered_data = "<i>Немає записів на цій сторінці</i>"
-        
-        # Створення кнопок пагінації (10 сторінок)
-        keyboard = []
-        row = []
-        for page in range(1, 11):
-            # Виділяємо поточну сторінку
-            text = f"[{page}]" if page == current_page else str(page)
-            row.append(InlineKeyboardButton(text, callback_data=f"page_{page}"))
-            # Розбиваємо кнопки на ряди по 5
-            if len(row) == 5:
-                keyboard.append(row)
-                row = []
-        if row:  # Додаємо останній ряд, якщо він є
-            keyboard.append(row)
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        page_data, total, current_page = await load_page(user_id, context.user_data.get('current_page', 1))
+        message_text, reply_markup = render_page(page_data, total, current_page)
+        context.user_data['current_page'] = current_page
         
         # Відправка повідомлення з HTML форматуванням
-        message_text = f"📋 <b>Сторінка {current_page}</b>\n\n{numbered_data}"
-        await update.message.reply_text(
-            text=message_text,
-            reply_markup=reply_markup,
-            parse_mode='HTML'
-        )
-        
-    except FileNotFoundError:
-        # Якщо файл не існує, все одно показуємо сторінки
-        keyboard = []
-        row = []
-        current_page = context.user_data.get('current_page', 1)
-        for page in range(1, 11):
-            text = f"[{page}]" if page == current_page else str(page)
-            row.append(InlineKeyboardButton(text, callback_data=f"page_{page}"))
-            if len(row) == 5:
-                keyboard.append(row)
-                row = []
-        if row:
-            keyboard.append(row)
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        message_text = f"📋 <b>Немає збережених даних</b>\n\n<i>Сторінка {current_page}</i>"
         await update.message.reply_text(
             text=message_text,
             reply_markup=reply_markup,
@@ -158,7 +220,7 @@ async def show_dates(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
             parse_mode='HTML'
         )
 
-# Оновлена функція для обробки натискання кнопок
+# Обробка натискання кнопок сторінок
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         query = update.callback_query
@@ -170,72 +232,43 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         if data.startswith("page_"):
             # Отримуємо номер сторінки з callback_data
             page = int(data.split("_")[1])
-            context.user_data['current_page'] = page
             
             try:
-                user_file = get_user_file_path(user_id)
-                with open(user_file, "r", encoding="utf-8") as file:
-                    data = file.readlines()
-                
-                # Розрахунок індексів для поточної сторінки
-                items_per_page = 10
-                start_index = (page - 1) * items_per_page
-                end_index = min(start_index + items_per_page, len(data))
-                
-                # Отримання даних для поточної сторінки
-                page_data = data[start_index:end_index] if data else []
-                
-                # Форматування даних з HTML тегами
-                if page_data:
-                    numbered_data = '\n'.join([
-                        f"<b>{start_index + i + 1}.</b> <code>{line.strip()}</code>" 
-                        for i, line in enumerate(page_data)
-                    ])
-                else:
-                    numbered_data = "<i>Немає записів на цій сторінці</i>"
-                
-                # Створення кнопок пагінації
-                keyboard = []
-                row = []
-                for p in range(1, 11):
-                    text = f"[{p}]" if p == page else str(p)
-                    row.append(InlineKeyboardButton(text, callback_data=f"page_{p}"))
-                    # Розбиваємо кнопки на ряди по 5
-                    if len(row) == 5:
-                        keyboard.append(row)
-                        row = []
-                if row:
-                    keyboard.append(row)
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                message_text = f"📋 <b>Сторінка {page}</b>\n\n{numbered_data}"
-                
-                # Оновлюємо повідомлення з HTML форматуванням
+                page_data, total, page = await load_page(user_id, page)
+            except FileNotFoundError:
                 await query.edit_message_text(
-                    text=message_text,
-                    reply_markup=reply_markup,
+                    text="📋 <b>Немає збережених даних</b>",
                     parse_mode='HTML'
                 )
-                
-            except FileNotFoundError:
-                keyboard = []
-                row = []
-                for p in range(1, 11):
-                    text = f"[{p}]" if p == page else str(p)
-                    row.append(InlineKeyboardButton(text, callback_data=f"page_{p}"))
-                    if len(row) == 5:
-                        keyboard.append(row)
-                        row = []
-                if row:
-                    keyboard.append(row)
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                message_text = f"📋 <b>Немає збережених даних</b>\n\n<i>Сторінка {page}</i>"
+                return
+            
+            message_text, reply_markup = render_page(page_data, total, page)
+            context.user_data['current_page'] = page
+            
+            # Оновлюємо повідомлення з HTML форматуванням
+            try:
                 await query.edit_message_text(
                     text=message_text,
                     reply_markup=reply_markup,
                     parse_mode='HTML'
                 )
+            except BadRequest as e:
+                # Натиснули на поточну сторінку — текст не змінився, це не помилка
+                if "not modified" not in str(e):
+                    raise
+
+        elif data.startswith("search_"):
+            search = context.user_data.get('search')
+            if search is None:
+                await query.edit_message_reply_markup(reply_markup=None)
+                return
+            page_data, total, page = await load_search_page(user_id, search, int(data.split("_")[1]))
+            message_text, reply_markup = render_search_page(search, page_data, total, page)
+            try:
+                await query.edit_message_text(text=message_text, reply_markup=reply_markup, parse_mode='HTML')
+            except BadRequest as e:
+                if "not modified" not in str(e):
+                    raise
             
     except Exception as e:
         logger.error(f"Помилка в button_handler: {str(e)}")
@@ -247,81 +280,33 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 # Функція для розрахунку найближчого дня народження
 async def get_nearest_birthday(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.message.from_user.id
-    user_file = get_user_file_path(user_id)
     
     try:
-        if not os.path.exists(user_file):
+        if not await store.exists(user_id):
             await update.message.reply_text("У вас поки немає збережених дат.", reply_markup=get_menu_keyboard())
             return
 
-        with open(user_file, "r", encoding="utf-8") as file:
-            dates = file.readlines()
+        index = await store.day_index(user_id)
         
-        if not dates:
+        if not index:
             await update.message.reply_text("У вас поки немає збережених дат.", reply_markup=get_menu_keyboard())
             return
 
-        today = date.today()
-        min_days = float('inf')
-        nearest_birthdays = {}  # словник для зберігання {date: [names]}
-        
-        month_number = {
-            'Січень': 1, 'Лютий': 2, 'Березень': 3, 'Квітень': 4,
-            'Травень': 5, 'Червень': 6, 'Липень': 7, 'Серпень': 8,
-            'Вересень': 9, 'Жовтень': 10, 'Листопад': 11, 'Грудень': 12
-        }
-
-        for line in dates:
-            try:
-                # Розбираємо рядок у форматі "Ім'я: день місяць рік"
-                name, birthday = line.strip().split(': ')
-                day, month, year = birthday.strip().split()
-                
-                # Конвертуємо місяць в число, якщо він текстовий
-                if month in month_number:
-                    month = month_number[month]
-                else:
-                    month = int(month)
-                
-                # Створюємо об'єкт дати
-                birthday_date = date(today.year, int(month), int(day))
-                
-                # Якщо день народження вже пройшов цього року, додаємо рік
-                if birthday_date < today:
-                    birthday_date = date(today.year + 1, int(month), int(day))
-                
-                # Розраховуємо кількість днів до дня народження
-                days_until = (birthday_date - today).days
-                
-                if days_until < min_days:
-                    min_days = days_until
-                    nearest_birthdays.clear()
-                    nearest_birthdays[birthday_date] = [name]
-                elif days_until == min_days:
-                    if birthday_date not in nearest_birthdays:
-                        nearest_birthdays[birthday_date] = []
-                    nearest_birthdays[birthday_date].append(name)
-
-            except (ValueError, IndexError) as e:
-                logger.error(f"Помилка при обробці дати: {line.strip()} - {str(e)}")
-                continue
+        # Бінарний пошук по відсортованому індексу дат (з переходом через кінець року)
+        today = local_today(user_id)
+        nearest = index.nearest(today)
         
-        if nearest_birthdays:
-            # Беремо першу дату (вони всі однакові, бо мають однакову кількість днів)
-            nearest_date = list(nearest_birthdays.keys())[0]
-            names = nearest_birthdays[nearest_date]
+        if nearest:
+            nearest_date, records = nearest
+            # Імена екрануються: відповідь надсилається як HTML
+            names = [html.escape(record.name) for record in records]
+            min_days = (nearest_date - today).days
             
             # Форматуємо місяць для виводу
-            month_names = {v: k for k, v in month_number.items()}
-            month_name = month_names.get(nearest_date.month, str(nearest_date.month))
+            month_name = MONTHS[nearest_date.month - 1]
             
             # Форматуємо список імен
-            if len(names) == 1:
-                names_text = names[0]
-            elif len(names) == 2:
-                names_text = f"{names[0]} та {names[1]}"
-            else:
-                names_text = ", ".join(names[:-1]) + f" та {names[-1]}"
+            names_text = join_names(names)
             
             # Визначаємо текст для днів
             if min_days == 0:
@@ -336,12 +321,11 @@ async def get_nearest_birthday(update: Update, context: ContextTypes.DEFAULT_TYP
                     f"📅 {nearest_date.day} {month_name}"
                 )
             else:
-                days_word = "день" if min_days % 10 == 1 and min_days != 11 else "дні" if 2 <= min_days % 10 <= 4 and (min_days < 10 or min_days > 20) else "днів"
                 message = (
                     f"🎂 <b>Найближчий день народження:</b>\n"
                     f"👥 {names_text}\n"
                     f"📅 {nearest_date.day} {month_name}\n"
-                    f"⏰ через {min_days} {days_word}"
+                    f"⏰ через {min_days} {days_word(min_days)}"
                 )
             
             await update.message.reply_text(message, parse_mode='HTML')
@@ -358,6 +342,165 @@ async def get_nearest_birthday(update: Update, context: ContextTypes.DEFAULT_TYP
             parse_mode='HTML'
         )
 
+def upcoming_lines(today: date, groups: list[tuple[date, list[Birthday]]]):
+    """Рядки відповіді /upcoming: дата з відстанню, під нею імена з віком"""
+    for birthday_date, records in groups:
+        days = (birthday_date - today).days
+        when = "сьогодні" if days == 0 else "завтра" if days == 1 else f"через {days} {days_word(days)}"
+        yield f"\n📅 <b>{birthday_date.day} {MONTHS[birthday_date.month - 1]}</b> — {when}"
+        for record in records:
+            age = birthday_date.year - record.year
+            yield f"  • {html.escape(record.name)} — {age} {years_word(age)}"
+
+# Дні народження на найближчі N днів: /upcoming або /upcoming 30
+async def upcoming_birthdays(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    user_id = update.message.from_user.id
+    try:
+        days = int(context.args[0]) if context.args else UPCOMING_DEFAULT_DAYS
+        if not 1 <= days <= UPCOMING_MAX_DAYS:
+            raise ValueError
+    except ValueError:
+        await update.message.reply_text(f"Використання: /upcoming <кількість днів від 1 до {UPCOMING_MAX_DAYS}>")
+        return
+
+    try:
+        if not await store.exists(user_id):
+            await update.message.reply_text("У вас поки немає збережених дат.", reply_markup=get_menu_keyboard())
+            return
+        today = local_today(user_id)
+        # Діапазонний запит до відсортованого індексу дат, кешується до півночі або до зміни записів
+        groups = await store.upcoming(user_id, today, days)
+    except Exception as e:
+        logger.error(f"Помилка при пошуку найближчих днів народження: {str(e)}")
+        await update.message.reply_text(
+            "❌ <b>Сталася помилка при пошуку найближчих днів народження.</b>", parse_mode='HTML'
+        )
+        return
+
+    header = f"🎂 <b>Дні народження на {days} {days_word(days)}:</b>"
+    if not groups:
+        await update.message.reply_text(f"{header}\n\n<i>Немає днів народження</i>", parse_mode='HTML')
+        return
+    for text in with_header(header, tuple(iter_chunks(upcoming_lines(today, groups)))):
+        await update.message.reply_text(text, parse_mode='HTML')
+
+def bar(count: int, largest: int, width: int = 10) -> str:
+    """Смужка гістограми, пропорційна count (непорожня для ненульових значень)"""
+    return "▇" * max(1, round(width * count / largest)) if count else ""
+
+def stats_lines(stats: BirthdayStats):
+    """Рядки відповіді /stats"""
+    yield "\n<b>За місяцями:</b>"
+    largest = max(stats.months)
+    for month, count in enumerate(stats.months):
+        yield f"{MONTHS[month]}: {count} {bar(count, largest)}".rstrip()
+
+    yield "\n<b>За віком:</b>"
+    largest = max(stats.ages)
+    for group, count in enumerate(stats.ages):
+        if count:
+            start = group * AGE_STEP
+            title = f"{start}+" if group == AGE_GROUPS else f"{start}–{start + AGE_STEP - 1}"
+            yield f"{title}: {count} {bar(count, largest)}"
+
+    yield f"\n<b>Ювілеї за рік:</b> {stats.milestone_count}"
+    for birthday_date, record, age in stats.milestones:
+        yield (f"  • {birthday_date.day} {MONTHS[birthday_date.month - 1]} — "
+               f"{html.escape(record.name)}: {age} {years_word(age)}")
+
+    yield "\n<b>Найнасиченіші тижні:</b>"
+    for monday, count in stats.weeks:
+        sunday = monday + timedelta(days=6)
+        yield f"  • {monday.day} {MONTHS[monday.month - 1]} – {sunday.day} {MONTHS[sunday.month - 1]}: {count}"
+
+# Статистика списку дат: /stats
+async def birthday_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    user_id = update.message.from_user.id
+    try:
+        if not await store.exists(user_id):
+            await update.message.reply_text("У вас поки немає збережених дат.", reply_markup=get_menu_keyboard())
+            return
+        # Один пакетний прохід по стовпцях записів, кешується до півночі або до зміни записів
+        stats = await store.stats(user_id, local_today(user_id))
+    except Exception as e:
+        logger.error(f"Помилка при підрахунку статистики: {str(e)}")
+        await update.message.reply_text("❌ <b>Сталася помилка при підрахунку статистики.</b>", parse_mode='HTML')
+        return
+
+    if not stats.total:
+        await update.message.reply_text("У вас поки немає збережених дат.", reply_markup=get_menu_keyboard())
+        return
+    header = f"📊 <b>Статистика</b>\nУсього дат: {stats.total}"
+    for text in with_header(header, tuple(iter_chunks(stats_lines(stats)))):
+        await update.message.reply_text(text, parse_mode='HTML')
+
+def parse_month(text: str) -> int | None:
+    """Номер місяця з числа (1-12) або назви чи її початку («берез», «Листопад»)"""
+    text = normalize_name(text)
+    if text.isdigit():
+        return int(text) if 1 <= int(text) <= 12 else None
+    matches = [number for number, name in enumerate(MONTHS, 1) if text and normalize_name(name).startswith(text)]
+    return matches[0] if len(matches) == 1 else None
+
+async def load_search_page(user_id: int, search: dict, page: int) -> tuple[list[Birthday], int, int]:
+    """Сторінка результатів /find або /month з індексів у кеші (без перебору всіх записів)"""
+    if search['kind'] == 'month':
+        index = await store.day_index(user_id)
+        query = lambda start: index.month(search['query'], start, ITEMS_PER_PAGE)
+    else:
+        index = await store.name_index(user_id)
+        query = lambda start: index.search(search['query'], start, ITEMS_PER_PAGE)
+    page = max(page, 1)
+    page_data, total = query((page - 1) * ITEMS_PER_PAGE)
+    if page > count_pages(total):
+        page = count_pages(total)
+        page_data, total = query((page - 1) * ITEMS_PER_PAGE)
+    return page_data, total, page
+
+def render_search_page(search: dict, page_data, total: int, page: int) -> tuple[str, InlineKeyboardMarkup | None]:
+    """Текст і кнопки сторінки результатів пошуку"""
+    if search['kind'] == 'month':
+        title = f"📅 <b>{MONTHS[search['query'] - 1]}</b>"
+    else:
+        title = f"🔎 <b>Пошук «{html.escape(search['query'])}»</b>"
+    if not total:
+        return f"{title}\n\n<i>Нічого не знайдено</i>", None
+    lines = '\n'.join(f"<code>{html.escape(str(birthday))}</code>" for birthday in page_data)
+    message_text = f"{title}: {total}, сторінка {page} з {count_pages(total)}\n\n{lines}"
+    return message_text, get_pagination_keyboard(page, count_pages(total), "search")
+
+async def reply_search(update: Update, context: ContextTypes.DEFAULT_TYPE, search: dict) -> None:
+    user_id = update.message.from_user.id
+    try:
+        if not await store.exists(user_id):
+            await update.message.reply_text("У вас поки немає збережених дат.", reply_markup=get_menu_keyboard())
+            return
+        page_data, total, page = await load_search_page(user_id, search, 1)
+    except Exception as e:
+        logger.error(f"Помилка при пошуку: {str(e)}")
+        await update.message.reply_text("❌ <b>Сталася помилка при пошуку.</b>", parse_mode='HTML')
+        return
+    # Запит зберігається, щоб кнопки сторінок знали, що гортати
+    context.user_data['search'] = search
+    message_text, reply_markup = render_search_page(search, page_data, total, page)
+    await update.message.reply_text(message_text, reply_markup=reply_markup, parse_mode='HTML')
+
+# Пошук записів за початком імені: /find Оле
+async def find_birthdays(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    prefix = " ".join(context.args or ())
+    if not normalize_name(prefix):
+        await update.message.reply_text("Використання: /find <початок імені>, наприклад /find Оле")
+        return
+    await reply_search(update, context, {'kind': 'find', 'query': prefix})
+
+# Записи одного місяця в порядку днів: /month травень або /month 5
+async def month_birthdays(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    month = parse_month(" ".join(context.args or ()))
+    if month is None:
+        await update.message.reply_text("Використання: /month <назва або номер місяця>, наприклад /month травень")
+        return
+    await reply_search(update, context, {'kind': 'month', 'query': month})
+
 async def add_birthday_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Початок розмови для додавання дня народження"""
     await update.message.reply_text(
@@ -368,10 +511,10 @@ async def add_birthday_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def get_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Отримуємо ім'я та запитуємо день"""
-    name = update.message.text.strip()
-    
-    if not name:
-        await update.message.reply_text("❌ Ім'я не може бути порожнім. Спробуйте ще раз:")
+    try:
+        name = validate_name(update.message.text)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {str(e).capitalize()}. Спробуйте ще раз:")
         return NAME
     
     context.user_data['name'] = name
@@ -391,22 +534,8 @@ async def get_day(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         
         context.user_data['day'] = day
         
-        # Створюємо клавіатуру з місяцями
-        months = [
-            ('Січень', 'Лютий', 'Березень'),
-            ('Квітень', 'Травень', 'Червень'),
-            ('Липень', 'Серпень', 'Вересень'),
-            ('Жовтень', 'Листопад', 'Грудень')
-        ]
-        
-        keyboard = []
-        for row in months:
-            keyboard_row = []
-            for month in row:
-                keyboard_row.append(InlineKeyboardButton(month, callback_data=month))
-            keyboard.append(keyboard_row)
-            
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Клавіатура з місяцями створюється один раз і береться з кешу
+        reply_markup = get_month_keyboard()
         
         await update.message.reply_text(
             "📅 Виберіть місяць:",
@@ -419,6 +548,9 @@ async def get_day(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         await update.message.reply_text("❌ Будь ласка, введіть число від 1 до 31:")
         return DAY
 
+# callback_data кнопок з місяцями
+MONTH_PATTERN = f"^({'|'.join(MONTHS)})$"
+
 async def get_month(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Отримуємо місяць та запитуємо рік"""
     query = update.callback_query
@@ -435,16 +567,15 @@ async def get_month(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 async def get_year(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.message.from_user.id
-    user_file = get_user_file_path(user_id)
     
     try:
         year = int(update.message.text)
-        current_year = datetime.now().year
+        current_year = local_today(user_id).year
         
-        if year < 1900 or year > current_year:
+        if year < MIN_YEAR or year > current_year:
             await update.message.reply_text(
-                f"Будь ласка, введіть рік між 1900 та {current_year}",
-                reply_markup=ReplyKeyboardMarkup([[KeyboardButton("Скасувати")]], resize_keyboard=True)
+                f"Будь ласка, введіть рік між {MIN_YEAR} та {current_year}",
+                reply_markup=get_cancel_keyboard()
             )
             return YEAR
 
@@ -453,8 +584,7 @@ async def get_year(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         month = context.user_data['month']
         
         # Зберігаємо дані у файл користувача з пробілами замість крапок
-        with open(user_file, "a", encoding="utf-8") as file:
-            file.write(f"{name}: {day} {month} {year}\n")
+        await store.append(user_id, Birthday(name, day, MONTH_NUMBER[month], year))
         
         await update.message.reply_text(
             f"✅ День народження додано успішно:\n"
@@ -471,7 +601,7 @@ async def get_year(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     except ValueError:
         await update.message.reply_text(
             "❌ Будь ласка, введіть правильний рік (наприклад, 1990)",
-            reply_markup=ReplyKeyboardMarkup([[KeyboardButton("Скасувати")]], resize_keyboard=True)
+            reply_markup=get_cancel_keyboard()
         )
         return YEAR
 
@@ -490,22 +620,51 @@ async def delete_birthday_start(update: Update, context: ContextTypes.DEFAULT_TY
     
     # Показуємо список дат перед видаленням
     user_id = message.from_user.id
-    user_file = get_user_file_path(user_id)
-    
-    with open(user_file, "r", encoding="utf-8") as file:
-        dates = file.readlines()
+    try:
+        dates = await store.read(user_id)
+    except FileNotFoundError:
+        dates = []
     
     if not dates:
         await message.reply_text("У вас немає збережених дат.", reply_markup=get_menu_keyboard())
         return ConversationHandler.END
     
-    text = "🗑 <b>Виберіть номер дати для видалення:</b>\n\n"
-    for i, date in enumerate(dates, 1):
-        text += f"{i}. {date.strip()}\n"
-    
-    await message.reply_text(text, parse_mode='HTML')
+    # Довгий список надсилається кількома повідомленнями в межах ліміту Telegram
+    version = await store.version(user_id)
+    chunks = render_cache.render(user_id, version, dates)
+    message_ids = []
+    for text in with_header("🗑 <b>Виберіть номер дати для видалення:</b>\n", chunks):
+        message_ids.append((await message.reply_text(text, parse_mode='HTML')).message_id)
+
+    # Після видалення ці повідомлення редагуються замість надсилання нового списку
+    context.user_data['delete_listing'] = {
+        'chat_id': message.chat_id, 'message_ids': message_ids, 'version': repr(version)
+    }
     return AWAITING_DELETE_NUMBER
 
+async def update_delete_listing(context: ContextTypes.DEFAULT_TYPE, listing: dict | None, old_version,
+                                header: str, old_chunks: tuple[str, ...], new_chunks: tuple[str, ...]) -> bool:
+    """Редагує повідомлення зі списком після видалення: лише ті, текст яких змінився
+    (перше — завжди, бо в ньому новий заголовок), зайві видаляються.
+    False, якщо повідомлення показують іншу версію списку або редагування не вдалося"""
+    if listing is None or listing.get('version') != repr(old_version):
+        return False
+    chat_id, message_ids = listing['chat_id'], listing['message_ids']
+    old_texts = with_header("", old_chunks)
+    try:
+        for i, text in enumerate(with_header(header, new_chunks)):
+            if i == 0 or text != old_texts[i]:
+                await context.bot.edit_message_text(
+                    chat_id=chat_id, message_id=message_ids[i], text=text, parse_mode='HTML'
+                )
+        for message_id in message_ids[len(new_chunks):]:
+            await context.bot.delete_message(chat_id=chat_id, message_id=message_id)
+    except BadRequest as e:
+        # Повідомлення вже видалене або надто старе для редагування
+        logger.info(f"Не вдалося оновити список у чаті {chat_id}: {str(e)}")
+        return False
+    return True
+
 async def handle_delete_number(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обробка номера дати для видалення"""
     message = update.message
@@ -513,55 +672,63 @@ async def handle_delete_number(update: Update, context: ContextTypes.DEFAULT_TYP
     
     try:
         user_id = message.from_user.id
-        user_file = get_user_file_path(user_id)
         
-        if not os.path.exists(user_file):
+        if not await store.exists(user_id):
             await update.message.reply_text(
                 "У вас немає збережених дат для видалення.",
                 reply_markup=get_menu_keyboard()
             )
             return ConversationHandler.END
 
-        with open(user_file, "r", encoding="utf-8") as file:
-            lines = file.readlines()
+        lines = await store.read(user_id)
         
         try:
             number = int(update.message.text)
             if number < 1 or number > len(lines):
                 await update.message.reply_text(
                     f"Будь ласка, введіть число від 1 до {len(lines)}",
-                    reply_markup=ReplyKeyboardMarkup([[KeyboardButton("Скасувати")]], resize_keyboard=True)
+                    reply_markup=get_cancel_keyboard()
                 )
                 return AWAITING_DELETE_NUMBER
 
-            # Видаляємо вибраний рядок
-            deleted_line = lines.pop(number - 1)
-            
-            # Перезаписуємо файл без видаленого рядка
-            with open(user_file, "w", encoding="utf-8") as file:
-                file.writelines(lines)
-            
-            await update.message.reply_text(
-                f"✅ <b>Успішно видалено:</b>\n"
-                f"<code>{deleted_line.strip()}</code>",
-                parse_mode='HTML'
-            )
-            
-            # Показуємо оновлений список
-            if lines:
-                text = "📅 <b>Оновлений список дат:</b>\n\n"
-                for i, date in enumerate(lines, 1):
-                    text += f"{i}. {date.strip()}\n"
-                await update.message.reply_text(text, parse_mode='HTML')
-            else:
-                await update.message.reply_text("У вас немає збережених дат.", reply_markup=get_menu_keyboard())
-            
+            # Видаляємо вибраний запис зі сховища (список зі сховища не змінюємо);
+            # сховище перевіряє, що під цим номером досі той самий запис
+            old_version = await store.version(user_id)
+            try:
+                deleted_line = await store.delete(user_id, number - 1, expected=lines[number - 1])
+            except RecordChangedError:
+                await update.message.reply_text(
+                    "⚠️ Список дат щойно змінився. Відкрийте його ще раз і виберіть номер.",
+                    reply_markup=get_menu_keyboard()
+                )
+                return ConversationHandler.END
+            listing = context.user_data.pop('delete_listing', None)
+            old_chunks = render_cache.render(user_id, old_version, lines)
+            lines = await store.read(user_id)
+
+            deleted_text = f"✅ <b>Успішно видалено:</b>\n<code>{shorten(html.escape(str(deleted_line)), 256)}</code>\n"
+            if not lines:
+                if not await update_delete_listing(context, listing, old_version, deleted_text, old_chunks,
+                                                   ("У вас немає збережених дат.",)):
+                    await update.message.reply_text(
+                        f"{deleted_text}\nУ вас немає збережених дат.", parse_mode='HTML',
+                        reply_markup=get_menu_keyboard()
+                    )
+                return ConversationHandler.END
+
+            # Оновлений список — редагуванням уже надісланого (зазвичай один запит до API)
+            header = f"{deleted_text}\n📅 <b>Оновлений список дат:</b>\n"
+            new_chunks = render_cache.render(user_id, await store.version(user_id), lines)
+            if not await update_delete_listing(context, listing, old_version, header, old_chunks, new_chunks):
+                for text in with_header(header, new_chunks):
+                    await update.message.reply_text(text, parse_mode='HTML')
+
             return ConversationHandler.END
             
         except ValueError:
             await update.message.reply_text(
                 "Будь ласка, введіть числовий номер дати або натисніть /cancel для скасування.",
-                reply_markup=ReplyKeyboardMarkup([[KeyboardButton("Скасувати")]], resize_keyboard=True)
+                reply_markup=get_cancel_keyboard()
             )
             return AWAITING_DELETE_NUMBER
             
@@ -573,20 +740,215 @@ async def handle_delete_number(update: Update, context: ContextTypes.DEFAULT_TYP
         )
         return ConversationHandler.END
 
+async def reminder_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Налаштування нагадувань: /reminders 0 1 7 або /reminders off"""
+    user_id = update.message.from_user.id
+    
+    if context.args:
+        try:
+            if context.args == ['off']:
+                offsets = []
+            else:
+                offsets = [int(arg) for arg in context.args]
+            if any(offset < 0 or offset > REMINDER_MAX_OFFSET for offset in offsets):
+                raise ValueError
+        except ValueError:
+            await update.message.reply_text(
+                f"❌ Вкажіть, за скільки днів нагадувати (від 0 до {REMINDER_MAX_OFFSET}), "
+                f"наприклад: /reminders 0 1 7, або /reminders off",
+                parse_mode='HTML'
+            )
+            return
+        await user_settings.set_offsets(user_id, offsets)
+    
+    offsets = user_settings.get_offsets(user_id)
+    if offsets:
+        offsets_text = ", ".join("у сам день" if offset == 0 else f"за {offset} {days_word(offset)}" for offset in offsets)
+        text = (
+            f"🔔 <b>Нагадування:</b> {offsets_text}\n"
+            f"⏰ Щодня о {REMINDER_TIME.strftime('%H:%M')} ({user_settings.get_timezone(user_id)})"
+        )
+    else:
+        text = "🔕 <b>Нагадування вимкнено.</b>"
+    await update.message.reply_text(text, parse_mode='HTML', reply_markup=get_menu_keyboard())
+
+# Часовий пояс користувача: /timezone Europe/Kyiv
+async def timezone_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    user_id = update.message.from_user.id
+    if context.args:
+        try:
+            timezone = parse_timezone(context.args[0])
+        except ValueError:
+            await update.message.reply_text(
+                "❌ Невідомий часовий пояс. Вкажіть назву зі списку IANA, наприклад: /timezone Europe/Kyiv"
+            )
+            return
+        old_timezone = user_settings.get_timezone(user_id)
+        if timezone != old_timezone:
+            # Записи користувача переходять у календар нагадувань нового поясу
+            records = await store.read(user_id) if await store.exists(user_id) else []
+            await user_settings.set_timezone(user_id, timezone)
+            calendar_index.move(user_id, records, old_timezone, timezone)
+
+    local = user_settings.local_now(user_id, clock.now())
+    await update.message.reply_text(
+        f"🌍 <b>Часовий пояс:</b> {user_settings.get_timezone(user_id)}\n"
+        f"🕒 Місцевий час: {local:%H:%M}, {local.day} {MONTHS[local.month - 1]}",
+        parse_mode='HTML', reply_markup=get_menu_keyboard()
+    )
+
 async def cancel_delete(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Скасовує процес видалення"""
+    context.user_data.pop('delete_listing', None)
     await update.message.reply_text(
         "❌ Видалення скасовано.",
         parse_mode='HTML'
     )
     return ConversationHandler.END
 
-# Основна функція для запуску бота
-def main() -> None:
-    application = Application.builder().token(TOKEN).build()
+async def import_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Початок імпорту: очікуємо файл CSV або .ics"""
+    await update.message.reply_text(
+        "📥 <b>Надішліть файл для імпорту:</b>\n"
+        "• CSV зі стовпцями <code>ім'я, день, місяць, рік</code> або <code>ім'я, дата</code>\n"
+        "• календар <code>.ics</code>\n"
+        "Для скасування — /cancel",
+        parse_mode='HTML'
+    )
+    return AWAITING_IMPORT_FILE
+
+async def handle_import_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Розбирає надісланий файл і додає всі коректні записи одним записом у сховище"""
+    message = update.message
+    document = message.document
+    
+    file_format = detect_format(document.file_name, document.mime_type)
+    if file_format is None:
+        await message.reply_text("❌ Підтримуються лише файли .csv та .ics. Надішліть інший файл або /cancel")
+        return AWAITING_IMPORT_FILE
+    if document.file_size and document.file_size > IMPORT_MAX_FILE_SIZE:
+        await message.reply_text(
+            f"❌ Файл завеликий (максимум {IMPORT_MAX_FILE_SIZE // (1024 * 1024)} МБ).",
+            reply_markup=get_menu_keyboard()
+        )
+        return ConversationHandler.END
+    
+    # Файл завантажується на диск і розбирається потоково, не в пам'яті
+    fd, path = tempfile.mkstemp(suffix=f".{file_format}")
+    os.close(fd)
+    try:
+        telegram_file = await document.get_file()
+        await telegram_file.download_to_drive(path)
+        records, errors = await asyncio.to_thread(
+            read_import, path, file_format, local_today(message.from_user.id).year, IMPORT_MAX_RECORDS
+        )
+        await store.append_many(message.from_user.id, records)
+    except Exception as e:
+        logger.error(f"Помилка при імпорті: {str(e)}")
+        await message.reply_text(
+            f"❌ <b>Сталася помилка при імпорті:</b>\n<code>{html.escape(str(e))}</code>",
+            parse_mode='HTML',
+            reply_markup=get_menu_keyboard()
+        )
+        return ConversationHandler.END
+    finally:
+        os.remove(path)
+    
+    text = f"✅ <b>Імпортовано записів:</b> {len(records)}"
+    if errors:
+        text += f"\n⚠️ <b>Пропущено рядків з помилками:</b> {len(errors)}\n"
+        text += "\n".join(
+            f"{row_number}: {html.escape(error[:100])}" for row_number, error in errors[:IMPORT_ERRORS_SHOWN]
+        )
+        if len(errors) > IMPORT_ERRORS_SHOWN:
+            text += f"\n… та ще {len(errors) - IMPORT_ERRORS_SHOWN}"
+    await message.reply_text(text, parse_mode='HTML', reply_markup=get_menu_keyboard())
+    return ConversationHandler.END
+
+async def import_expect_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Під час імпорту прийшов текст замість файлу"""
+    await update.message.reply_text("📎 Надішліть файл .csv або .ics, або /cancel для скасування.")
+    return AWAITING_IMPORT_FILE
+
+async def cancel_import(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Скасовує імпорт"""
+    await update.message.reply_text("❌ Імпорт скасовано.", reply_markup=get_menu_keyboard())
+    return ConversationHandler.END
+
+async def export_birthdays(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Експорт усіх дат файлом: /export або /export ics"""
+    user_id = update.message.from_user.id
+    file_format = context.args[0].lower() if context.args else 'csv'
+    if file_format not in ('csv', 'ics'):
+        await update.message.reply_text("Використання: /export csv або /export ics")
+        return
+    
+    try:
+        records = await store.read(user_id)
+    except FileNotFoundError:
+        records = []
+    if not records:
+        await update.message.reply_text("У вас поки немає збережених дат.", reply_markup=get_menu_keyboard())
+        return
+    
+    file = await asyncio.to_thread(export_to_file, records, file_format, user_id)
+    try:
+        await update.message.reply_document(document=file, filename=f"birthdays.{file_format}")
+    except Exception as e:
+        logger.error(f"Помилка при експорті: {str(e)}")
+        await update.message.reply_text("❌ <b>Не вдалося надіслати файл.</b>", parse_mode='HTML')
+    finally:
+        file.close()
+
+# Завантаження налаштувань і побудова індексу нагадувань перед запуском бота
+async def on_startup(application: Application) -> None:
+    await asyncio.to_thread(user_settings.load)
+    await asyncio.to_thread(reminder_scheduler.load_state)
+    calendar_index.load(await store.scan())
+    logger.info(f"Індекс нагадувань побудовано: {calendar_index.size} записів у {len(calendar_index.zones)} поясах")
+    if metrics_server is not None:
+        await metrics_server.start()
+
+# Після application.stop() усі оновлення, що обробляються, вже завершені
+async def on_stop(application: Application) -> None:
+    logger.info("Обробку оновлень завершено, очікуємо запис даних на диск")
+
+# Закриття сховища після зупинки бота (чекає завершення всіх дискових операцій)
+async def on_shutdown(application: Application) -> None:
+    if metrics_server is not None:
+        await metrics_server.stop()
+    await store.close()
+
+def build_application(receive_updates: bool = True) -> Application:
+    """Бот з усіма обробниками; receive_updates=False — без власного отримання оновлень
+    (робочий процес шардованого режиму, оновлення йому передає sharding.py)"""
+    create_services()
+    # Усі вихідні запити проходять через диспетчер з обмеженням швидкості та пріоритетами
+    dispatcher = OutboundDispatcher(
+        global_rate=OUTBOUND_GLOBAL_RATE,
+        chat_rate=OUTBOUND_CHAT_RATE,
+        chat_burst=OUTBOUND_CHAT_BURST
+    )
+    builder = (
+        Application.builder()
+        .token(TOKEN)
+        .base_url(f"{BOT_API_URL}/bot")
+        .base_file_url(f"{BOT_API_URL}/file/bot")
+        .rate_limiter(dispatcher)
+        .concurrent_updates(PerUserUpdateProcessor(CONCURRENT_UPDATES, InboundThrottle(INBOUND_RATE, INBOUND_BURST)))
+        .persistence(SqlitePersistence(PERSISTENCE_PATH, PERSISTENCE_UPDATE_INTERVAL, PERSISTENCE_FLUSH_DELAY))
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+    )
+    if not receive_updates:
+        builder = builder.updater(None)
+    application = builder.build()
 
     # Створюємо обробник розмови для додавання дня народження
     add_conv_handler = ConversationHandler(
+        name='add_birthday',
+        persistent=True,
         entry_points=[
             CommandHandler('add', add_birthday_start),
             MessageHandler(filters.Regex('^Додати дату$'), add_birthday_start)
@@ -594,7 +956,8 @@ def main() -> None:
         states={
             NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND & ~filters.Regex('^Показати дати$|^Найближчий день народження$|^Видалити дату$'), get_name)],
             DAY: [MessageHandler(filters.TEXT & ~filters.COMMAND & ~filters.Regex('^Показати дати$|^Найближчий день народження$|^Видалити дату$'), get_day)],
-            MONTH: [CallbackQueryHandler(get_month)],
+            # Лише кнопки місяців: застарілі кнопки сторінок тощо сюди не потрапляють
+            MONTH: [CallbackQueryHandler(get_month, pattern=MONTH_PATTERN)],
             YEAR: [MessageHandler(filters.TEXT & ~filters.COMMAND & ~filters.Regex('^Показати дати$|^Найближчий день народження$|^Видалити дату$'), get_year)],
         },
         fallbacks=[
@@ -605,6 +968,8 @@ def main() -> None:
 
     # Створюємо обробник розмови для видалення дня народження
     delete_conv_handler = ConversationHandler(
+        name='delete_birthday',
+        persistent=True,
         entry_points=[
             CommandHandler('delete', delete_birthday_start),
             MessageHandler(filters.Regex('^Видалити дату$'), delete_birthday_start)
@@ -615,10 +980,32 @@ def main() -> None:
         fallbacks=[CommandHandler('cancel', cancel_delete)],
     )
 
+    # Обробник розмови для імпорту дат з файлу
+    import_conv_handler = ConversationHandler(
+        name='import_birthdays',
+        persistent=True,
+        entry_points=[CommandHandler('import', import_start)],
+        states={
+            AWAITING_IMPORT_FILE: [
+                MessageHandler(filters.Document.ALL, handle_import_file),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, import_expect_file)
+            ],
+        },
+        fallbacks=[CommandHandler('cancel', cancel_import)],
+    )
+
     # Додаємо обробники в правильному порядку
     application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("reminders", reminder_settings))
+    application.add_handler(CommandHandler("timezone", timezone_settings))
+    application.add_handler(CommandHandler("export", export_birthdays))
+    application.add_handler(CommandHandler("find", find_birthdays))
+    application.add_handler(CommandHandler("upcoming", upcoming_birthdays))
+    application.add_handler(CommandHandler("stats", birthday_stats))
+    application.add_handler(CommandHandler("month", month_birthdays))
     application.add_handler(add_conv_handler)
     application.add_handler(delete_conv_handler)
+    application.add_handler(import_conv_handler)
     
     # Обробка текстових повідомлень, які не є командами
     application.add_handler(MessageHandler(
@@ -629,8 +1016,65 @@ def main() -> None:
     # Обробка натискання кнопок
     application.add_handler(CallbackQueryHandler(button_handler))
 
-    # Запуск бота
-    application.run_polling()
+    # Заміри часу всіх обробників і переходів між станами розмов
+    instrument_application(application, {
+        'add_birthday': STATE_NAMES,
+        'delete_birthday': DELETE_STATE_NAMES,
+        'import_birthdays': IMPORT_STATE_NAMES
+    })
+
+    # Щоденна розсилка нагадувань
+    # Перевірка нагадувань на кожній межі такту: розсилка йде лише в пояси, де настав REMINDER_TIME
+    application.job_queue.run_repeating(
+        reminder_scheduler.send_reminders,
+        interval=reminder_scheduler.tick,
+        first=reminder_scheduler.first_tick()
+    )
+    # Розсилка, пропущена, поки бот не працював (стан розсилки завантажує on_startup)
+    application.job_queue.run_once(reminder_scheduler.send_missed, when=0)
+    return application
+
+# Робочий процес шардованого режиму: оновлення своїх користувачів приходять з черги
+def run_shard_worker(updates) -> None:
+    asyncio.run(consume_updates(build_application(receive_updates=False), updates))
+
+async def consume_updates(application: Application, updates) -> None:
+    """Запускає бота без Updater і передає йому оновлення з черги, доки не прийде None"""
+    loop = asyncio.get_running_loop()
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    try:
+        while (data := await loop.run_in_executor(None, updates.get)) is not None:
+            await application.update_queue.put(Update.de_json(data, application.bot))
+    finally:
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+# Основна функція для запуску бота
+def main() -> None:
+    if SHARD_COUNT > 1:
+        raise ValueError("SHARD_COUNT > 1: бот запускається через python sharding.py")
+    application = build_application()
+
+    # Запуск бота: вебхук (локальний HTTP-сервер за проксі) або опитування
+    if RUN_MODE == 'webhook':
+        application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=WEBHOOK_URL or None,
+            secret_token=WEBHOOK_SECRET_TOKEN or None
+        )
+    elif RUN_MODE == 'polling':
+        application.run_polling()
+    else:
+        raise ValueError(f"Невідомий режим запуску: {RUN_MODE}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,203 @@
+"""Метрики у форматі Prometheus без зовнішніх залежностей.
+
+Лічильники, гістограми та показники з мітками; оновлюються з будь-якого потоку
+(сховище працює в пулі потоків). Усі метрики бота оголошені тут і віддаються
+функцією render() на локальній адресі /metrics (див. instrumentation.py).
+"""
+import threading
+
+# Межі кошиків гістограм затримок, у секундах
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _CounterValue:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeValue(_CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+
+class Metric:
+    """Метрика з необов'язковими мітками; labels(...) повертає значення для набору міток"""
+
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._values.get(values)
+        if child is None:
+            with self._lock:
+                child = self._values.setdefault(values, self._new_value())
+        return child
+
+    def _samples(self):
+        """Рядки (суфікс імені, мітки, значення)"""
+        for values, child in list(self._values.items()):
+            yield "", _format_labels(self.labelnames, values), child.value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def _new_value(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    """Показник; якщо передано function, значення береться з неї при кожному зчитуванні"""
+
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def _new_value(self):
+        return _GaugeValue()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, function) -> None:
+        self.function = function
+
+    def _samples(self):
+        if self.function is not None:
+            yield "", "", self.function()
+        else:
+            yield from super()._samples()
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self):
+        for values, child in list(self._values.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield "_bucket", _format_labels(self.labelnames, values, f'le="{bound}"'), cumulative
+            yield "_bucket", _format_labels(self.labelnames, values, 'le="+Inf"'), count
+            yield "_sum", _format_labels(self.labelnames, values), total
+            yield "_count", _format_labels(self.labelnames, values), count
+
+
+REGISTRY = []
+
+
+def render() -> str:
+    """Усі метрики в текстовому форматі Prometheus"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# Обробники оновлень
+HANDLER_LATENCY = Histogram('bot_handler_seconds', 'Час виконання обробника', ('handler',))
+HANDLER_IN_FLIGHT = Gauge('bot_handler_in_flight', 'Обробники, що виконуються зараз', ('handler',))
+HANDLER_ERRORS = Counter('bot_handler_errors_total', 'Винятки, що вийшли з обробника', ('handler',))
+INBOUND_THROTTLED = Counter(
+    'bot_inbound_throttled_total', 'Вхідні оновлення, відкинуті обмеженням частоти', ('reason',)
+)
+CONVERSATION_TRANSITIONS = Counter(
+    'bot_conversation_transitions_total', 'Переходи між станами розмов', ('conversation', 'from_state', 'to_state')
+)
+
+# Сховище
+STORAGE_LATENCY = Histogram('bot_storage_seconds', 'Час виконання операції сховища', ('operation',))
+STORAGE_ERRORS = Counter('bot_storage_errors_total', 'Помилки операцій сховища', ('operation',))
+STORAGE_BYTES_READ = Counter('bot_storage_read_bytes_total', 'Байти, прочитані файловим сховищем')
+STORAGE_BYTES_WRITTEN = Counter('bot_storage_written_bytes_total', 'Байти, записані файловим сховищем')
+
+# Кеш записів
+CACHE_REQUESTS = Counter('bot_cache_requests_total', 'Звернення до кешу записів', ('result',))
+CACHE_EVICTIONS = Counter('bot_cache_evictions_total', 'Витіснення з кешу записів')
+CACHE_USERS = Gauge('bot_cache_users', 'Користувачі в кеші записів')
+CACHE_RECORDS = Gauge('bot_cache_records', 'Записи в кеші записів')
+
+# Вихідні запити до Bot API
+OUTBOUND_LATENCY = Histogram('bot_outbound_seconds', 'Час виконання запиту до Bot API', ('endpoint',))
+OUTBOUND_QUEUE_WAIT = Histogram('bot_outbound_queue_seconds', 'Час очікування запиту в черзі', ('priority',))
+OUTBOUND_REQUESTS = Counter('bot_outbound_requests_total', 'Запити до Bot API', ('endpoint', 'result'))
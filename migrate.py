@@ -0,0 +1,86 @@
+"""Одноразове перенесення файлів user_data/user_N.txt у базу SQLite.
+
+Використання: python migrate.py [--source user_data] [--db birthdays.db] [--batch-size 5000]
+
+Файли обробляються по одному, живі записи з журналів вставляються пакетами
+в окремих транзакціях. Користувачі, які вже є в базі, пропускаються, тож перерване
+перенесення можна просто запустити ще раз.
+"""
+import argparse
+import logging
+import os
+
+from config import USER_DATA_DIR, SQLITE_PATH
+from sqlite_store import connect
+from storage import USER_FILE_PATTERN, FileBirthdayStore
+
+logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                    level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def iter_user_files(source: str):
+    """Потоково перебирає файли користувачів, не складаючи весь список у пам'ять"""
+    with os.scandir(source) as entries:
+        for entry in entries:
+            match = USER_FILE_PATTERN.match(entry.name)
+            if match and entry.is_file():
+                yield int(match.group(1)), entry.path
+
+
+def iter_records(user_id: int, path: str):
+    # Файл — журнал з позначками видалення, тож переносимо лише живі записи
+    for birthday in FileBirthdayStore._read(path):
+        yield (user_id, *birthday)
+
+
+def flush(connection, users: list, rows: list) -> None:
+    with connection:
+        connection.execute("BEGIN")
+        connection.executemany(
+            "INSERT INTO birthdays (user_id, name, day, month, year) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        connection.executemany("INSERT INTO users (user_id, version) VALUES (?, 1)", users)
+
+
+def migrate(source: str, db_path: str, batch_size: int = 5000) -> tuple[int, int]:
+    """Переносить усі файли з source у базу; повертає (користувачів, записів)"""
+    connection = connect(db_path)
+    users, rows = [], []
+    total_users = total_records = 0
+
+    try:
+        for user_id, path in iter_user_files(source):
+            if connection.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone():
+                continue
+
+            # Користувач і всі його записи потрапляють в одну транзакцію
+            users.append((user_id,))
+            for row in iter_records(user_id, path):
+                rows.append(row)
+            total_users += 1
+
+            if len(rows) >= batch_size or len(users) >= batch_size:
+                total_records += len(rows)
+                flush(connection, users, rows)
+                users, rows = [], []
+                logger.info(f"Перенесено користувачів: {total_users}, записів: {total_records}")
+
+        if users:
+            total_records += len(rows)
+            flush(connection, users, rows)
+    finally:
+        connection.close()
+
+    logger.info(f"Готово. Користувачів: {total_users}, записів: {total_records}")
+    return total_users, total_records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Перенесення даних користувачів з файлів у SQLite")
+    parser.add_argument("--source", default=USER_DATA_DIR, help="директорія з файлами user_N.txt")
+    parser.add_argument("--db", default=SQLITE_PATH, help="шлях до бази SQLite")
+    parser.add_argument("--batch-size", type=int, default=5000, help="кількість записів в одній транзакції")
+    args = parser.parse_args()
+    migrate(args.source, args.db, args.batch_size)
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from sqlite_store import connect
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (name, key)
+);
+"""
+
+
+class SqlitePersistence(BasePersistence):
+    """Збереження context.user_data та станів розмов у SQLite.
+
+    user_data кожного користувача — окремий рядок JSON, що завантажується лише
+    при першому оновленні від цього користувача (refresh_user_data), тож запуск
+    не читає дані всіх користувачів. Станів розмов мало (лише незавершені),
+    вони читаються при запуску. Зміни лише позначаються як «брудні»; незмінені
+    дані не пишуться, а всі зміни за flush_delay секунд записуються однією
+    транзакцією в окремому потоці, тож обробка оновлень запису не чекає.
+    """
+
+    def __init__(self, path: str = "bot_state.db", update_interval: float = 10, flush_delay: float = 1.0):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.path = path
+        self.flush_delay = flush_delay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persistence")
+        self._connection = connect(path, SCHEMA)
+        self._loaded = set()  # користувачі, чиї дані вже завантажено
+        self._written = {}  # user_id -> хеш JSON, що зараз у базі
+        self._dirty_users = {}  # user_id -> JSON або None (видалити)
+        self._dirty_conversations = {}  # (назва, ключ JSON) -> стан JSON або None (розмову завершено)
+        self._flush_task = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def get_user_data(self) -> dict:
+        # Дані користувачів завантажуються ліниво в refresh_user_data
+        return {}
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        if user_id in self._loaded:
+            return
+        self._loaded.add(user_id)
+        if user_id in self._dirty_users:
+            return
+        text = await self._run(self._load_user, user_id)
+        if text is None:
+            return
+        self._written[user_id] = hash(text)
+        for key, value in json.loads(text).items():
+            user_data.setdefault(key, value)
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        try:
+            text = json.dumps(data, ensure_ascii=False, sort_keys=True) if data else None
+        except (TypeError, ValueError) as e:
+            logger.warning(f"user_data користувача {user_id} не зберігається: {str(e)}")
+            return
+        if (hash(text) if text is not None else None) == self._written.get(user_id):
+            # Дані не змінилися відносно бази — скасовуємо запис, якщо він був запланований
+            self._dirty_users.pop(user_id, None)
+            return
+        self._dirty_users[user_id] = text
+        self._schedule_flush()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._dirty_users[user_id] = None
+        self._schedule_flush()
+
+    async def get_conversations(self, name: str) -> dict:
+        rows = await self._run(self._load_conversations, name)
+        return {tuple(json.loads(key)): json.loads(state) for key, state in rows}
+
+    async def update_conversation(self, name: str, key: tuple, new_state: object | None) -> None:
+        state = json.dumps(new_state) if new_state is not None else None
+        self._dirty_conversations[(name, json.dumps(list(key)))] = state
+        self._schedule_flush()
+
+    # Дані чатів, бота та callback_data не зберігаються
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        self._flush_task = None
+        await self._write_dirty()
+
+    async def _write_dirty(self) -> None:
+        users, self._dirty_users = self._dirty_users, {}
+        conversations, self._dirty_conversations = self._dirty_conversations, {}
+        if not users and not conversations:
+            return
+        try:
+            await self._run(self._write, users, conversations)
+        except Exception as e:
+            logger.error(f"Помилка при збереженні стану бота: {str(e)}")
+            # Повертаємо зміни в чергу, якщо їх тим часом не замінили новіші
+            for user_id, text in users.items():
+                self._dirty_users.setdefault(user_id, text)
+            for key, state in conversations.items():
+                self._dirty_conversations.setdefault(key, state)
+            self._schedule_flush()
+            return
+        for user_id, text in users.items():
+            if text is None:
+                self._written.pop(user_id, None)
+            else:
+                self._written[user_id] = hash(text)
+
+    async def flush(self) -> None:
+        """Викликається при зупинці бота: записує всі зміни й закриває базу"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._write_dirty()
+        await self._run(self._connection.close)
+        self._executor.shutdown(wait=True)
+
+    def _load_user(self, user_id: int) -> str | None:
+        row = self._connection.execute("SELECT data FROM user_data WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def _load_conversations(self, name: str) -> list[tuple[str, str]]:
+        return self._connection.execute("SELECT key, state FROM conversations WHERE name = ?", (name,)).fetchall()
+
+    def _write(self, users: dict, conversations: dict) -> None:
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "DELETE FROM user_data WHERE user_id = ?",
+                ((user_id,) for user_id, text in users.items() if text is None)
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO user_data (user_id, data) VALUES (?, ?)",
+                ((user_id, text) for user_id, text in users.items() if text is not None)
+            )
+            self._connection.executemany(
+                "DELETE FROM conversations WHERE name = ? AND key = ?",
+                (key for key, state in conversations.items() if state is None)
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO conversations (name, key, state) VALUES (?, ?, ?)",
+                ((*key, state) for key, state in conversations.items() if state is not None)
+            )
@@ -0,0 +1,185 @@
+"""Перерозподіл даних між шардами при зміні кількості робочих процесів.
+
+Використання: python rebalance.py --from 1 --to 4   (бот має бути зупинений)
+
+Переносить усе, чим володіє шард, до нового власника за shard_of(user_id):
+файли user_N.* з директорій шардів, рядки баз SQLite (стан розмов і user_data,
+записи сховища 'sqlite') та налаштування нагадувань. Файли переносяться через
+os.replace, тож перерване перенесення можна просто запустити ще раз. Після
+перенесення змініть SHARD_COUNT у config.py на нове значення.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+
+from config import USER_DATA_DIR, SQLITE_PATH, PERSISTENCE_PATH, USER_SETTINGS_PATH, REMINDER_STATE_PATH
+from persistence import SCHEMA as PERSISTENCE_SCHEMA
+from sharding import shard_of, shard_dir, shard_file
+from sqlite_store import SCHEMA as SQLITE_SCHEMA, connect
+from storage import SNAPSHOT_NAME, atomic_write
+
+logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                    level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Журнал, індекс зсувів і карантин пошкоджених рядків користувача
+USER_DATA_FILE = re.compile(r"^user_(-?\d+)\.(txt|idx|bad)$")
+
+
+def move_user_files(source_count: int, target_count: int) -> int:
+    """Переносить файли користувачів у директорії нових шардів; повертає кількість файлів"""
+    moved = 0
+    for index in range(source_count):
+        directory = shard_dir(USER_DATA_DIR, index, source_count)
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            names = [entry.name for entry in entries if entry.is_file()]
+        for name in names:
+            match = USER_DATA_FILE.match(name)
+            if not match:
+                continue
+            user_id = int(match.group(1))
+            target = shard_dir(USER_DATA_DIR, shard_of(user_id, target_count), target_count)
+            if target == directory:
+                continue
+            os.makedirs(target, exist_ok=True)
+            os.replace(os.path.join(directory, name), os.path.join(target, name))
+            moved += 1
+        # Знімок сканування описує старий набір файлів — наступний запуск збере новий
+        snapshot = os.path.join(directory, SNAPSHOT_NAME)
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+        if directory != USER_DATA_DIR and not os.listdir(directory):
+            os.rmdir(directory)
+    return moved
+
+
+def remove_database(path: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def split_database(path: str, schema: str, tables: dict, source_count: int, target_count: int) -> int:
+    """Переносить рядки баз шардів до нових власників; повертає кількість рядків.
+    tables: назва таблиці -> (стовпці, функція, що повертає user_id рядка)"""
+    sources = [shard_file(path, index, source_count) for index in range(source_count)]
+    sources = [source for source in sources if os.path.exists(source)]
+    if not sources:
+        return 0
+    targets = [connect(shard_file(path, index, target_count), schema) for index in range(target_count)]
+    copied = 0
+    try:
+        for target in targets:
+            target.execute("BEGIN")
+        for source_path in sources:
+            source = connect(source_path, schema)
+            try:
+                for table, (columns, owner) in tables.items():
+                    # Порядок рядків зберігається: від нього залежить порядок записів користувача
+                    for row in source.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY rowid"):
+                        target = targets[shard_of(owner(row), target_count)]
+                        target.execute(
+                            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                            f"VALUES ({', '.join('?' * len(columns))})",
+                            row
+                        )
+                        copied += 1
+            finally:
+                source.close()
+        for target in targets:
+            target.execute("COMMIT")
+    finally:
+        for target in targets:
+            target.close()
+    for source_path in sources:
+        remove_database(source_path)
+    return copied
+
+
+def split_settings(source_count: int, target_count: int) -> int:
+    """Переносить налаштування нагадувань; повертає кількість користувачів"""
+    settings = {}
+    sources = [shard_file(USER_SETTINGS_PATH, index, source_count) for index in range(source_count)]
+    for source in sources:
+        if os.path.exists(source):
+            with open(source, "r", encoding="utf-8") as file:
+                settings.update(json.load(file))
+    if not settings:
+        return 0
+    targets = [{} for _ in range(target_count)]
+    for user_id, value in settings.items():
+        targets[shard_of(int(user_id), target_count)][user_id] = value
+    for index, data in enumerate(targets):
+        atomic_write(shard_file(USER_SETTINGS_PATH, index, target_count), json.dumps(data, ensure_ascii=False))
+    for source in sources:
+        if os.path.exists(source):
+            os.remove(source)
+    return len(settings)
+
+
+def split_reminder_state(source_count: int, target_count: int) -> int:
+    """Переносить дати останньої розсилки поясів; повертає кількість поясів.
+    Пояси не належать шардам, тож кожен новий шард отримує найранішу з дат,
+    щоб розсилку, пропущену хоч одним шардом, було надіслано після запуску"""
+    delivered = {}
+    sources = [shard_file(REMINDER_STATE_PATH, index, source_count) for index in range(source_count)]
+    for source in sources:
+        if os.path.exists(source):
+            with open(source, "r", encoding="utf-8") as file:
+                for zone, day in json.load(file).items():
+                    delivered[zone] = min(day, delivered.get(zone, day))
+    if not delivered:
+        return 0
+    for index in range(target_count):
+        atomic_write(shard_file(REMINDER_STATE_PATH, index, target_count), json.dumps(delivered))
+    for source in sources:
+        if os.path.exists(source):
+            os.remove(source)
+    return len(delivered)
+
+
+def rebalance(source_count: int, target_count: int) -> None:
+    files = move_user_files(source_count, target_count)
+    logger.info(f"Файлів користувачів перенесено: {files}")
+
+    # Ключ розмови — (chat_id, user_id), власник — останній елемент
+    state_rows = split_database(PERSISTENCE_PATH, PERSISTENCE_SCHEMA, {
+        'user_data': (('user_id', 'data'), lambda row: row[0]),
+        'conversations': (('name', 'key', 'state'), lambda row: json.loads(row[1])[-1]),
+    }, source_count, target_count)
+    logger.info(f"Рядків стану бота перенесено: {state_rows}")
+
+    # id записів не переносяться: у новій базі їх видасть SQLite, порядок зберігається
+    birthday_rows = split_database(SQLITE_PATH, SQLITE_SCHEMA, {
+        'users': (('user_id', 'version'), lambda row: row[0]),
+        'birthdays': (('user_id', 'name', 'day', 'month', 'year'), lambda row: row[0]),
+    }, source_count, target_count)
+    logger.info(f"Рядків сховища SQLite перенесено: {birthday_rows}")
+
+    users = split_settings(source_count, target_count)
+    logger.info(f"Налаштувань користувачів перенесено: {users}")
+
+    zones = split_reminder_state(source_count, target_count)
+    logger.info(f"Дат останньої розсилки перенесено: {zones} поясів")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Перерозподіл даних між шардами")
+    parser.add_argument("--from", dest="source", type=int, required=True, help="поточна кількість шардів")
+    parser.add_argument("--to", dest="target", type=int, required=True, help="нова кількість шардів")
+    args = parser.parse_args()
+    if args.source < 1 or args.target < 1:
+        parser.error("кількість шардів має бути додатною")
+    if args.source == args.target:
+        logger.info("Кількість шардів не змінилася")
+        return
+    rebalance(args.source, args.target)
+    logger.info(f"Готово. Встановіть SHARD_COUNT = {args.target} у config.py")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+from typing import NamedTuple
+
+# Назви місяців у тому вигляді, в якому вони зберігаються у файлах
+MONTHS = [
+    'Січень', 'Лютий', 'Березень', 'Квітень',
+    'Травень', 'Червень', 'Липень', 'Серпень',
+    'Вересень', 'Жовтень', 'Листопад', 'Грудень'
+]
+MONTH_NUMBER = {name: number for number, name in enumerate(MONTHS, 1)}
+
+# Найменший допустимий рік народження (найбільший — поточний)
+MIN_YEAR = 1900
+
+
+class Birthday(NamedTuple):
+    """Один розібраний запис про день народження"""
+    name: str
+    day: int
+    month: int
+    year: int
+
+    @property
+    def month_name(self) -> str:
+        return MONTHS[self.month - 1]
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.day} {self.month_name} {self.year}"
+
+
+def parse_line(line: str) -> Birthday:
+    """Розбирає рядок у форматі "Ім'я: день місяць рік" (ValueError, якщо формат невірний)"""
+    name, birthday = line.strip().rsplit(': ', 1)
+    day, month, year = birthday.strip().split()
+
+    # Місяць може бути збережений як назвою, так і числом
+    month = MONTH_NUMBER[month] if month in MONTH_NUMBER else int(month)
+    day, year = int(day), int(year)
+
+    if not name or not 1 <= day <= 31 or not 1 <= month <= 12 or not 1 <= year <= 9999:
+        raise ValueError(f"некоректний запис: {line.strip()}")
+    return Birthday(name, day, month, year)
+
+
+def validate_name(name: str) -> str:
+    """Ім'я без пробілів по краях; ValueError, якщо воно порожнє або містить
+    керівні символи (переведення рядка чи табуляція зламали б формат файлу)"""
+    name = name.strip()
+    if not name:
+        raise ValueError("ім'я не може бути порожнім")
+    if any(ord(char) < 32 for char in name):
+        raise ValueError("ім'я не може містити переведення рядка чи табуляцію")
+    return name
+
+
+def validate_birthday(name: str, day, month, year, current_year: int) -> Birthday:
+    """Перевіряє поля за тими ж правилами, що й покрокове додавання дати.
+    Місяць — назва або номер; ValueError з поясненням, якщо щось не так"""
+    name = validate_name(name)
+    try:
+        day = int(day)
+    except ValueError:
+        raise ValueError(f"день має бути числом: {day}") from None
+    if not 1 <= day <= 31:
+        raise ValueError(f"день має бути від 1 до 31: {day}")
+
+    month = str(month).strip()
+    if month.capitalize() in MONTH_NUMBER:
+        month = MONTH_NUMBER[month.capitalize()]
+    elif month.isdigit() and 1 <= int(month) <= 12:
+        month = int(month)
+    else:
+        raise ValueError(f"невідомий місяць: {month}")
+
+    try:
+        year = int(year)
+    except ValueError:
+        raise ValueError(f"рік має бути числом: {year}") from None
+    if not MIN_YEAR <= year <= current_year:
+        raise ValueError(f"рік має бути між {MIN_YEAR} та {current_year}: {year}")
+    return Birthday(name, day, month, year)
+
+
+def days_word(days: int) -> str:
+    """Відмінювання слова "день" для числа днів"""
+    if days % 10 == 1 and days % 100 != 11:
+        return "день"
+    if 2 <= days % 10 <= 4 and not 12 <= days % 100 <= 14:
+        return "дні"
+    return "днів"
+
+
+def years_word(years: int) -> str:
+    """Відмінювання слова "рік" для числа років"""
+    if years % 10 == 1 and years % 100 != 11:
+        return "рік"
+    if 2 <= years % 10 <= 4 and not 12 <= years % 100 <= 14:
+        return "роки"
+    return "років"
+
+
+def join_names(names: list[str]) -> str:
+    """Форматує список імен: "А", "А та Б", "А, Б та В\""""
+    if len(names) == 1:
+        return names[0]
+    return ", ".join(names[:-1]) + f" та {names[-1]}"
@@ -0,0 +1,300 @@
+import asyncio
+import calendar
+import html
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
+
+from clock import Clock
+from columns import DayColumns
+from dispatcher import SCHEDULED
+from records import Birthday, MONTHS, days_word, join_names
+from storage import atomic_write
+from user_settings import UserSettings
+
+logger = logging.getLogger(__name__)
+
+# Скільки нагадувань одночасно передається диспетчеру вихідних повідомлень
+SEND_BATCH_SIZE = 500
+
+
+class CalendarIndex:
+    """Глобальний індекс (місяць, день) -> записи всіх користувачів для щоденних нагадувань.
+
+    Оновлюється при додаванні та видаленні записів, тож щоденна перевірка
+    дивиться лише на потрібні дні, а не на всі файли користувачів.
+    Записи кожного дня зберігаються стовпцями (DayColumns), а об'єкти Birthday
+    створюються лише для дат, які запитує on().
+    """
+
+    def __init__(self):
+        self._days = defaultdict(DayColumns)
+        self.size = 0
+
+    def load(self, users) -> None:
+        """Заповнює індекс з результату BirthdayStore.scan()"""
+        for user_id, records in users:
+            for birthday in records:
+                self.add(user_id, birthday)
+
+    def add(self, user_id: int, birthday: Birthday) -> None:
+        self._days[(birthday.month, birthday.day)].add(user_id, birthday.name, birthday.year)
+        self.size += 1
+
+    def remove(self, user_id: int, birthday: Birthday) -> None:
+        key = (birthday.month, birthday.day)
+        entries = self._days.get(key)
+        if entries is None or not entries.remove(user_id, birthday.name, birthday.year):
+            return
+        self.size -= 1
+        if not entries:
+            del self._days[key]
+
+    def _entries(self, month: int, day: int) -> list[tuple[int, Birthday]]:
+        return [
+            (user_id, Birthday(name, day, month, year))
+            for user_id, name, year in self._days.get((month, day), ())
+        ]
+
+    def on(self, day: date) -> list[tuple[int, Birthday]]:
+        """Усі записи, що святкуються в цю дату"""
+        entries = self._entries(day.month, day.day)
+
+        # В останній день місяця святкуються й дні, яких у ньому немає (29 лютого, 31 квітня)
+        if day.day == calendar.monthrange(day.year, day.month)[1]:
+            for missing_day in range(day.day + 1, 32):
+                entries.extend(self._entries(day.month, missing_day))
+        return entries
+
+
+class ZonedCalendar:
+    """Календарі нагадувань (CalendarIndex), розкладені за часовими поясами користувачів.
+
+    Щоб розіслати нагадування поясу, в якому настав ранок, досить переглянути
+    лише його календар. Підписується на зміни сховища так само, як CalendarIndex;
+    при зміні поясу користувача його записи переносяться методом move().
+    """
+
+    def __init__(self, zone_of):
+        self.zone_of = zone_of  # user_id -> назва поясу
+        self.zones = defaultdict(CalendarIndex)
+
+    @property
+    def size(self) -> int:
+        return sum(calendar_index.size for calendar_index in self.zones.values())
+
+    def load(self, users) -> None:
+        """Заповнює календарі з результату BirthdayStore.scan()"""
+        for user_id, records in users:
+            calendar_index = self.zones[self.zone_of(user_id)]
+            for birthday in records:
+                calendar_index.add(user_id, birthday)
+
+    def add(self, user_id: int, birthday: Birthday) -> None:
+        self.zones[self.zone_of(user_id)].add(user_id, birthday)
+
+    def remove(self, user_id: int, birthday: Birthday) -> None:
+        zone = self.zone_of(user_id)
+        calendar_index = self.zones.get(zone)
+        if calendar_index is None:
+            return
+        calendar_index.remove(user_id, birthday)
+        if not calendar_index.size:
+            del self.zones[zone]
+
+    def move(self, user_id: int, records, old_zone: str, new_zone: str) -> None:
+        """Переносить записи користувача в календар іншого поясу"""
+        if old_zone == new_zone:
+            return
+        old_calendar = self.zones.get(old_zone)
+        new_calendar = self.zones[new_zone]
+        for birthday in records:
+            if old_calendar is not None:
+                old_calendar.remove(user_id, birthday)
+            new_calendar.add(user_id, birthday)
+        if old_calendar is not None and not old_calendar.size:
+            del self.zones[old_zone]
+
+
+def format_reminder(days: int, birthday_date: date, names: list[str]) -> str:
+    # Нагадування надсилається з parse_mode='HTML': неекранований символ в імені зірвав би всю розсилку користувачу
+    names_text = join_names([html.escape(name) for name in names])
+    if days == 0:
+        return f"🎉 <b>Сьогодні день народження у {names_text}!</b>\n🎂 Не забудьте привітати!"
+    if days == 1:
+        return (
+            f"🔔 <b>Завтра день народження:</b>\n"
+            f"👥 {names_text}\n"
+            f"📅 {birthday_date.day} {MONTHS[birthday_date.month - 1]}"
+        )
+    return (
+        f"🔔 <b>Через {days} {days_word(days)} день народження:</b>\n"
+        f"👥 {names_text}\n"
+        f"📅 {birthday_date.day} {MONTHS[birthday_date.month - 1]}"
+    )
+
+
+class ReminderScheduler:
+    """Розсилка нагадувань о delivery_time за місцевим часом кожного користувача.
+
+    JobQueue викликає send_reminders кожні tick хвилин (на межах, кратних tick, за UTC).
+    Пояси групуються за поточним зміщенням від UTC: у поясів з однаковим зміщенням
+    однаковий місцевий час, тож за один такт перевіряється кожне зміщення лише раз,
+    а переглядаються календарі лише тих поясів, де щойно настав час розсилки.
+    Перехід на літній час враховується, бо зміщення обчислюється на кожному такті;
+    повторна година при переході на зимовий час не дає повторної розсилки, бо
+    для кожного поясу запам'ятовується дата останньої розсилки.
+
+    Ці дати зберігаються у файлі state_path (до відправки, тож збій посеред розсилки
+    не повторить її), і після перезапуску в той самий день розсилка не повторюється.
+    Якщо бот не працював у час розсилки, send_missed на старті надсилає пропущене.
+    """
+
+    def __init__(self, calendar: ZonedCalendar, settings: UserSettings, delivery_time: time,
+                 tick: timedelta = timedelta(minutes=15), clock: Clock | None = None,
+                 state_path: str | None = None):
+        self.calendar = calendar
+        self.settings = settings
+        self.delivery_time = delivery_time
+        self.tick = tick
+        self.clock = clock or Clock()
+        self.state_path = state_path
+        self._delivered = {}  # пояс -> місцева дата останньої розсилки
+
+    def load_state(self) -> None:
+        """Дати останньої розсилки поясів, збережені до перезапуску"""
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        self._delivered = {zone: date.fromisoformat(day) for zone, day in data.items()}
+
+    def _save_state(self) -> None:
+        if self.state_path is not None:
+            data = {zone: day.isoformat() for zone, day in self._delivered.items()}
+            atomic_write(self.state_path, json.dumps(data))
+
+    def buckets(self, now: datetime) -> dict[timedelta, list[str]]:
+        """Пояси з записами, згруповані за їхнім зміщенням від UTC у момент now"""
+        result = defaultdict(list)
+        for zone in self.calendar.zones:
+            result[now.astimezone(ZoneInfo(zone)).utcoffset()].append(zone)
+        return result
+
+    def _is_delivery_tick(self, local: datetime) -> bool:
+        """Чи потрапляє місцевий час у такт, що починається з delivery_time"""
+        start = datetime.combine(local.date(), self.delivery_time)
+        return start <= local.replace(tzinfo=None) < start + self.tick
+
+    def due_zones(self, now: datetime) -> list[tuple[str, date]]:
+        """Пояси, де в момент now настав час розсилки, з їхньою місцевою датою"""
+        result = []
+        for utc_offset, zones in self.buckets(now).items():
+            local = (now + utc_offset).replace(tzinfo=None)
+            if not self._is_delivery_tick(local):
+                continue
+            for zone in zones:
+                if self._delivered.get(zone) != local.date():
+                    result.append((zone, local.date()))
+        return result
+
+    def due(self, zone: str, today: date) -> dict[int, list[tuple[int, date, list[str]]]]:
+        """Нагадування користувачам поясу на його місцеву дату: user_id -> [(днів до дати, дата, імена)]"""
+        calendar_index = self.calendar.zones.get(zone)
+        result = defaultdict(list)
+        if calendar_index is None:
+            return result
+        for offset in sorted(self.settings.all_offsets()):
+            birthday_date = today + timedelta(days=offset)
+            names_by_user = defaultdict(list)
+            for user_id, birthday in calendar_index.on(birthday_date):
+                if offset in self.settings.get_offsets(user_id):
+                    names_by_user[user_id].append(birthday.name)
+            for user_id, names in names_by_user.items():
+                result[user_id].append((offset, birthday_date, names))
+        return result
+
+    def collect(self) -> dict[int, list[tuple[int, date, list[str]]]]:
+        """Нагадування, які треба надіслати на цьому такті; пояси позначаються як оброблені"""
+        due = {}
+        for zone, today in self.due_zones(self.clock.now()):
+            self._delivered[zone] = today
+            due.update(self.due(zone, today))
+        return due
+
+    def missed(self) -> dict[int, list[tuple[int, date, list[str]]]]:
+        """Нагадування за дні, розсилку яких пропущено, доки бот не працював: для поясів
+        з відомою датою останньої розсилки — за дні після неї до сьогодні (сьогодні —
+        якщо delivery_time уже минув). Відлік днів ведеться від сьогоднішньої місцевої
+        дати, а дні народження, що вже минули, пропускаються"""
+        now = self.clock.now()
+        max_offset = max(self.settings.all_offsets(), default=0)
+        due = defaultdict(dict)  # user_id -> {дата: (днів до дати, дата, імена)}
+        for zone in list(self.calendar.zones):
+            last = self._delivered.get(zone)
+            if last is None:
+                continue
+            local = now.astimezone(ZoneInfo(zone))
+            today = local.date()
+            latest = today if local.time() >= self.delivery_time else today - timedelta(days=1)
+            # Пропущені дні, давніші за найбільший відступ, дали б лише дати, що вже минули
+            day = max(last + timedelta(days=1), today - timedelta(days=max_offset))
+            if day > latest:
+                continue
+            while day <= latest:
+                for user_id, reminders in self.due(zone, day).items():
+                    for _, birthday_date, names in reminders:
+                        if birthday_date >= today:
+                            due[user_id][birthday_date] = ((birthday_date - today).days, birthday_date, names)
+                day += timedelta(days=1)
+            self._delivered[zone] = latest
+        return {user_id: [dates[key] for key in sorted(dates)] for user_id, dates in due.items()}
+
+    def first_tick(self) -> float:
+        """Секунд до найближчої межі такту (кратної tick за UTC)"""
+        period = self.tick.total_seconds()
+        return period - self.clock.now().timestamp() % period
+
+    async def send_reminders(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Колбек для JobQueue.run_repeating"""
+        delivered = dict(self._delivered)
+        due = self.collect()
+        if self._delivered != delivered:
+            await asyncio.to_thread(self._save_state)
+        if not due:
+            return
+        logger.info(f"Нагадування: {len(due)} користувачів")
+        await self._deliver(context.bot, due)
+
+    async def send_missed(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Колбек для JobQueue.run_once на старті: розсилка, пропущена через зупинку бота"""
+        delivered = dict(self._delivered)
+        due = self.missed()
+        if self._delivered != delivered:
+            await asyncio.to_thread(self._save_state)
+        if not due:
+            return
+        logger.info(f"Пропущені нагадування: {len(due)} користувачів")
+        await self._deliver(context.bot, due)
+
+    async def _deliver(self, bot, due: dict[int, list[tuple[int, date, list[str]]]]) -> None:
+        # Темп відправки визначає диспетчер; розсилка має нижчий пріоритет за відповіді користувачам
+        items = list(due.items())
+        for start in range(0, len(items), SEND_BATCH_SIZE):
+            await asyncio.gather(*(
+                self._send(bot, user_id, reminders)
+                for user_id, reminders in items[start:start + SEND_BATCH_SIZE]
+            ))
+
+    async def _send(self, bot, user_id: int, reminders: list) -> None:
+        text = "\n\n".join(format_reminder(*reminder) for reminder in reminders)
+        try:
+            await bot.send_message(chat_id=user_id, text=text, parse_mode='HTML', rate_limit_args=SCHEDULED)
+        except TelegramError as e:
+            logger.warning(f"Не вдалося надіслати нагадування користувачу {user_id}: {str(e)}")
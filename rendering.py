@@ -0,0 +1,92 @@
+"""Показ довгих списків дат кількома повідомленнями в межах ліміту Telegram.
+
+Текст будується потоково, рядок за рядком (без конкатенації через +=), і ділиться
+на частини не довші за MESSAGE_LIMIT. Межі частин не залежать від заголовка (для
+нього завжди зарезервовано HEADER_LIMIT), тож після видалення запису змінюються лише
+частини, починаючи з тієї, де він був, і лише їх треба редагувати. Готові частини
+кешуються за (користувач, версія даних), тож повторний показ нічого не рендерить.
+"""
+import html
+import re
+from collections import OrderedDict
+
+from records import Birthday
+
+# Максимальна довжина тексту повідомлення Telegram (у символах UTF-16)
+MESSAGE_LIMIT = 4096
+# Місце, зарезервоване в першій частині для заголовка списку
+HEADER_LIMIT = 512
+
+
+def text_length(text: str) -> int:
+    """Довжина так, як її рахує Telegram: у кодових одиницях UTF-16.
+    Теги HTML теж рахуються, тож оцінка лише завищена, а не занижена"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def numbered_lines(records):
+    """Рядки списку «номер. запис» з екранованим HTML"""
+    for number, birthday in enumerate(records, 1):
+        yield f"{number}. {html.escape(str(birthday))}"
+
+
+def shorten(line: str, limit: int) -> str:
+    """Обрізає рядок до limit разом з «…», не розриваючи сутність HTML (&amp; тощо)"""
+    if text_length(line) <= limit:
+        return line
+    while text_length(line) > limit - 1:
+        # Символ займає одну чи дві одиниці UTF-16, тож відрізаємо не більше, ніж треба
+        line = line[:len(line) - max(1, (text_length(line) - limit + 2) // 2)]
+    return re.sub(r"&[#\w]*$", "", line) + "…"
+
+
+def iter_chunks(lines, limit: int = MESSAGE_LIMIT, first_limit: int = MESSAGE_LIMIT - HEADER_LIMIT):
+    """Рядки, зібрані в частини тексту: перша не довша за first_limit, решта — за limit;
+    рядки не розриваються"""
+    parts, size, current_limit = [], 0, first_limit
+    for line in lines:
+        line_size = text_length(line) + 1
+        if line_size > first_limit:
+            # Рядок довший за ціле повідомлення (дуже довге ім'я з імпорту)
+            line = shorten(line, first_limit - 1)
+            line_size = text_length(line) + 1
+        if parts and size + line_size > current_limit:
+            yield "\n".join(parts)
+            parts, size, current_limit = [], 0, limit
+        parts.append(line)
+        size += line_size
+    yield "\n".join(parts)
+
+
+class RenderCache:
+    """LRU-кеш відрендерених списків: (user_id, версія) -> частини тексту.
+    Обмежений кількістю списків і сумарною довжиною тексту"""
+
+    def __init__(self, max_entries: int = 1000, max_chars: int = 10_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries = OrderedDict()
+        self._chars = 0
+
+    def render(self, user_id: int, version, records: list[Birthday]) -> tuple[str, ...]:
+        """Нумерований список записів частинами; заголовок додає with_header"""
+        key = (user_id, version)
+        chunks = self._entries.get(key)
+        if chunks is not None:
+            self._entries.move_to_end(key)
+            return chunks
+        chunks = tuple(iter_chunks(numbered_lines(records)))
+        if version is None:
+            # Без версії не можна перевірити, що кеш актуальний
+            return chunks
+        self._entries[key] = chunks
+        self._chars += sum(map(len, chunks))
+        while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+            _, evicted = self._entries.popitem(last=False)
+            self._chars -= sum(map(len, evicted))
+        return chunks
+
+
+def with_header(header: str, chunks: tuple[str, ...]) -> list[str]:
+    """Тексти повідомлень: заголовок (не довший за HEADER_LIMIT) перед першою частиною"""
+    return [f"{header}\n{chunks[0]}", *chunks[1:]]
@@ -0,0 +1,214 @@
+"""Шардований запуск бота: приймач оновлень і SHARD_COUNT робочих процесів.
+
+Використання: python sharding.py   (кількість процесів — config.SHARD_COUNT)
+
+Приймач лише отримує оновлення (опитуванням getUpdates або вебхуком, як у
+RUN_MODE) у вигляді JSON і за хешем user_id передає кожне в чергу одного з
+робочих процесів. Робочий процес — звичайний бот (main.py) без власного
+отримання оновлень, що володіє своєю частиною даних: окрема директорія
+user_data/shard-I-of-N/, окремі бази та файл налаштувань, власні кеші й індекс
+нагадувань. Оновлення одного користувача завжди потрапляють в один процес
+у порядку надходження, тож міжпроцесних блокувань не потрібно.
+
+Змінити кількість процесів можна лише разом з перенесенням даних: див. rebalance.py.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import zlib
+from urllib.parse import urlencode
+
+from telegram.request import HTTPXRequest
+
+import config
+
+logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                    level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Довге опитування getUpdates, с
+POLL_TIMEOUT = 30
+
+
+def shard_of(user_id: int, count: int) -> int:
+    """Номер шарда користувача; crc32 стабільний між запусками, на відміну від hash()"""
+    return zlib.crc32(str(user_id).encode("ascii")) % count
+
+
+def shard_dir(path: str, index: int, count: int) -> str:
+    """Директорія даних шарда (при одному шарді — сама path)"""
+    return path if count == 1 else os.path.join(path, f"shard-{index}-of-{count}")
+
+
+def shard_file(path: str, index: int, count: int) -> str:
+    """Файл шарда: bot_state.db -> bot_state.shard-0-of-4.db (при одному шарді — сам path)"""
+    if count == 1:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.shard-{index}-of-{count}{extension}"
+
+
+def configure_shard(index: int, count: int) -> None:
+    """Переналаштовує config на дані й ресурси одного шарда.
+    Викликається в робочому процесі до імпорту main"""
+    config.USER_DATA_DIR = shard_dir(config.USER_DATA_DIR, index, count)
+    config.SQLITE_PATH = shard_file(config.SQLITE_PATH, index, count)
+    config.PERSISTENCE_PATH = shard_file(config.PERSISTENCE_PATH, index, count)
+    config.USER_SETTINGS_PATH = shard_file(config.USER_SETTINGS_PATH, index, count)
+    config.REMINDER_STATE_PATH = shard_file(config.REMINDER_STATE_PATH, index, count)
+    # Спільні обмеження діляться між процесами: загальний ліміт відправки Telegram та пам'ять кешів
+    config.OUTBOUND_GLOBAL_RATE = config.OUTBOUND_GLOBAL_RATE / count
+    config.CACHE_MAX_USERS = max(1, config.CACHE_MAX_USERS // count)
+    config.CACHE_MAX_RECORDS = max(1, config.CACHE_MAX_RECORDS // count)
+    config.RENDER_CACHE_MAX_CHARS = max(1, config.RENDER_CACHE_MAX_CHARS // count)
+    if config.METRICS_PORT:
+        config.METRICS_PORT += index
+
+
+def update_owner(data: dict) -> int:
+    """user_id (або id чату, якщо користувача немає) з JSON оновлення без його повного розбору"""
+    for key, value in data.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+        for field in ('from', 'user', 'chat'):
+            owner = value.get(field)
+            if isinstance(owner, dict) and 'id' in owner:
+                return owner['id']
+    return 0
+
+
+def run_worker(index: int, count: int, updates) -> None:
+    """Точка входу робочого процесу"""
+    # Зупинкою керує приймач через черги, тож сигнали терміналу процес ігнорує
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    configure_shard(index, count)
+    import main
+    logger.info(f"Шард {index} з {count}: дані в {config.USER_DATA_DIR}")
+    main.run_shard_worker(updates)
+
+
+class UpdateRouter:
+    """Приймач оновлень, що розподіляє їх між робочими процесами"""
+
+    def __init__(self, count: int, queue_size: int):
+        context = multiprocessing.get_context("spawn")
+        self.count = count
+        self.queues = [context.Queue(queue_size) for _ in range(count)]
+        self.processes = [
+            context.Process(target=run_worker, args=(index, count, self.queues[index]), name=f"shard-{index}")
+            for index in range(count)
+        ]
+        self._stopping = asyncio.Event()
+        self._offset = 0
+
+    async def route(self, data: dict) -> None:
+        updates = self.queues[shard_of(update_owner(data), self.count)]
+        try:
+            updates.put_nowait(data)
+        except queue.Full:
+            # Процес не встигає — чекаємо місця в черзі, не блокуючи цикл подій
+            await asyncio.get_running_loop().run_in_executor(None, updates.put, data)
+
+    async def _poll(self, request, base_url: str) -> None:
+        await request.post(f"{base_url}/deleteWebhook")
+        while not self._stopping.is_set():
+            query = urlencode({'offset': self._offset, 'timeout': POLL_TIMEOUT})
+            try:
+                updates = await request.post(f"{base_url}/getUpdates?{query}", read_timeout=POLL_TIMEOUT + 10)
+            except Exception as e:
+                logger.warning(f"Помилка отримання оновлень: {str(e)}")
+                await asyncio.sleep(1)
+                continue
+            for data in updates:
+                await self.route(data)
+                self._offset = data['update_id'] + 1
+
+    async def _confirm(self, request, base_url: str) -> None:
+        """Підтверджує Telegram уже передані процесам оновлення, щоб після перезапуску вони не повторились"""
+        if self._offset:
+            query = urlencode({'offset': self._offset, 'timeout': 0, 'limit': 1})
+            try:
+                await request.post(f"{base_url}/getUpdates?{query}")
+            except Exception as e:
+                # Зупинку це не скасовує: після перезапуску частина оновлень лише прийде повторно
+                logger.warning(f"Не вдалося підтвердити отримані оновлення: {str(e)}")
+
+    async def _serve_webhook(self, request, base_url: str) -> None:
+        server = await asyncio.start_server(self._handle_webhook, config.WEBHOOK_LISTEN, config.WEBHOOK_PORT)
+        if config.WEBHOOK_URL:
+            parameters = {'url': config.WEBHOOK_URL}
+            if config.WEBHOOK_SECRET_TOKEN:
+                parameters['secret_token'] = config.WEBHOOK_SECRET_TOKEN
+            await request.post(f"{base_url}/setWebhook?{urlencode(parameters)}")
+        async with server:
+            await self._stopping.wait()
+
+    async def _handle_webhook(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            parts = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            if len(parts) < 2 or parts[0] != 'POST' or parts[1].lstrip("/") != config.WEBHOOK_PATH:
+                status = '404 Not Found'
+            elif (config.WEBHOOK_SECRET_TOKEN
+                  and headers.get('x-telegram-bot-api-secret-token') != config.WEBHOOK_SECRET_TOKEN):
+                status = '403 Forbidden'
+            else:
+                await self.route(json.loads(body))
+                status = '200 OK'
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"Помилка вебхука: {str(e)}")
+        finally:
+            writer.close()
+
+    async def run(self) -> None:
+        for process in self.processes:
+            process.start()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, self._stopping.set)
+
+        request = HTTPXRequest()
+        await request.initialize()
+        base_url = f"{config.BOT_API_URL}/bot{config.TOKEN}"
+        try:
+            if config.RUN_MODE == 'webhook':
+                receiver = asyncio.create_task(self._serve_webhook(request, base_url))
+            elif config.RUN_MODE == 'polling':
+                receiver = asyncio.create_task(self._poll(request, base_url))
+            else:
+                raise ValueError(f"Невідомий режим запуску: {config.RUN_MODE}")
+            await self._stopping.wait()
+            receiver.cancel()
+            await asyncio.gather(receiver, return_exceptions=True)
+            if config.RUN_MODE == 'polling':
+                await self._confirm(request, base_url)
+        finally:
+            await request.shutdown()
+            # None у черзі — сигнал процесу завершити обробку отриманих оновлень і зупинитись
+            for updates in self.queues:
+                await loop.run_in_executor(None, updates.put, None)
+            for process in self.processes:
+                await loop.run_in_executor(None, process.join)
+        logger.info("Усі шарди зупинено")
+
+
+def main() -> None:
+    if config.SHARD_COUNT < 2:
+        raise ValueError("SHARD_COUNT має бути щонайменше 2; для одного процесу запускайте python main.py")
+    logger.info(f"Запуск {config.SHARD_COUNT} шардів")
+    asyncio.run(UpdateRouter(config.SHARD_COUNT, config.SHARD_QUEUE_SIZE).run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from records import Birthday
+from storage import BirthdayStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS birthdays (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    year INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_birthdays_user ON birthdays (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_birthdays_month_day ON birthdays (month, day);
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def connect(path: str, schema: str = SCHEMA) -> sqlite3.Connection:
+    """Відкриває базу в режимі WAL і створює схему, якщо її немає"""
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(schema)
+    return connection
+
+
+class SqliteBirthdayStore(BirthdayStore):
+    """Сховище в SQLite: записи зберігаються типізованими колонками.
+
+    Усі запити виконуються в одному окремому потоці, тож з'єднання ніколи
+    не використовується паралельно, а цикл подій не блокується.
+    """
+
+    def __init__(self, path: str = "birthdays.db"):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._connection = connect(path)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def exists(self, user_id: int) -> bool:
+        return await self.version(user_id) is not None
+
+    async def version(self, user_id: int):
+        return await self._run(self._version, user_id)
+
+    async def read(self, user_id: int) -> list[Birthday]:
+        return await self._run(self._read, user_id)
+
+    async def read_page(self, user_id: int, start: int, count: int) -> tuple[list[Birthday], int]:
+        return await self._run(self._read_page, user_id, start, count)
+
+    async def append(self, user_id: int, birthday: Birthday) -> None:
+        await self._run(self._append, user_id, [birthday])
+
+    async def append_many(self, user_id: int, birthdays: list[Birthday]) -> None:
+        if birthdays:
+            await self._run(self._append, user_id, birthdays)
+
+    async def delete(self, user_id: int, index: int) -> Birthday:
+        return await self._run(self._delete, user_id, index)
+
+    async def scan(self) -> list[tuple[int, list[Birthday]]]:
+        return await self._run(self._scan)
+
+    async def close(self) -> None:
+        await self._run(self._connection.close)
+        self._executor.shutdown(wait=True)
+
+    def _version(self, user_id: int):
+        row = self._connection.execute(
+            "SELECT version FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _bump_version(self, user_id: int) -> None:
+        self._connection.execute(
+            "INSERT INTO users (user_id, version) VALUES (?, 1) "
+            "ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+            (user_id,)
+        )
+
+    def _read(self, user_id: int) -> list[Birthday]:
+        if self._version(user_id) is None:
+            raise FileNotFoundError(user_id)
+        rows = self._connection.execute(
+            "SELECT name, day, month, year FROM birthdays WHERE user_id = ? ORDER BY id",
+            (user_id,)
+        )
+        return [Birthday(*row) for row in rows]
+
+    def _read_page(self, user_id: int, start: int, count: int) -> tuple[list[Birthday], int]:
+        if self._version(user_id) is None:
+            raise FileNotFoundError(user_id)
+        (total,) = self._connection.execute(
+            "SELECT COUNT(*) FROM birthdays WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        rows = self._connection.execute(
+            "SELECT name, day, month, year FROM birthdays WHERE user_id = ? ORDER BY id LIMIT ? OFFSET ?",
+            (user_id, count, start)
+        )
+        return [Birthday(*row) for row in rows], total
+
+    def _scan(self) -> list[tuple[int, list[Birthday]]]:
+        result = {user_id: [] for (user_id,) in self._connection.execute("SELECT user_id FROM users")}
+        rows = self._connection.execute(
+            "SELECT user_id, name, day, month, year FROM birthdays ORDER BY user_id, id"
+        )
+        for user_id, *fields in rows:
+            result.setdefault(user_id, []).append(Birthday(*fields))
+        return list(result.items())
+
+    def _append(self, user_id: int, birthdays: list[Birthday]) -> None:
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "INSERT INTO birthdays (user_id, name, day, month, year) VALUES (?, ?, ?, ?, ?)",
+                ((user_id, *birthday) for birthday in birthdays)
+            )
+            self._bump_version(user_id)
+
+    def _delete(self, user_id: int, index: int) -> Birthday:
+        with self._connection:
+            self._connection.execute("BEGIN")
+            row = self._connection.execute(
+                "SELECT id, name, day, month, year FROM birthdays "
+                "WHERE user_id = ? ORDER BY id LIMIT 1 OFFSET ?",
+                (user_id, index)
+            ).fetchone()
+            if row is None:
+                raise IndexError(index)
+            self._connection.execute("DELETE FROM birthdays WHERE id = ?", (row[0],))
+            self._bump_version(user_id)
+        return Birthday(*row[1:])
@@ -0,0 +1,654 @@
+import asyncio
+import logging
+import mmap
+import os
+import pickle
+import re
+import struct
+import zlib
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import date
+
+from birthday_index import BirthdayIndex, NameIndex
+from birthday_stats import BirthdayStats, compute_stats
+from columns import BirthdayColumns
+from metrics import STORAGE_BYTES_READ, STORAGE_BYTES_WRITTEN
+from locks import UserLockManager
+from records import Birthday, parse_line
+
+logger = logging.getLogger(__name__)
+
+USER_FILE_PATTERN = re.compile(r"^user_(-?\d+)\.txt$")
+
+# Початок рядка журналу, що позначає видалений запис
+TOMBSTONE_PREFIX = "-\t"
+TOMBSTONE_MARK = TOMBSTONE_PREFIX.encode("utf-8")
+
+# Заголовок індексу зсувів: версія журналу (mtime_ns, розмір), далі масив зсувів по 8 байтів
+INDEX_HEADER = struct.Struct("<qQ")
+OFFSET_SIZE = 8
+
+# Знімок результату сканування: {'format', 'generation', 'users': {user_id: (версія, записи)}}
+SNAPSHOT_NAME = ".scan_snapshot.pickle"
+SNAPSHOT_FORMAT = 2
+
+
+def parse_tombstone(line: str) -> tuple[int, int | None] | None:
+    """(id запису, контрольна сума його рядка) з позначки видалення; сума None у старих
+    позначках без неї. None, якщо позначка пошкоджена"""
+    parts = line[len(TOMBSTONE_PREFIX):].split("\t")
+    try:
+        if len(parts) == 1:
+            return int(parts[0]), None
+        if len(parts) == 2:
+            return int(parts[0]), int(parts[1], 16)
+    except ValueError:
+        pass
+    return None
+
+
+def line_checksum(raw_line: bytes) -> int:
+    """Контрольна сума рядка-запису без пробілів по краях (і без переведення рядка)"""
+    return zlib.crc32(raw_line.strip())
+
+
+class RecordChangedError(Exception):
+    """Запис, який користувач бачив у списку, вже змінився або видалений"""
+
+
+def atomic_write(path: str, text: str) -> None:
+    """Перезаписує файл через тимчасовий файл і rename, щоб збій не залишив його обрізаним"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+class BirthdayStore:
+    """Асинхронний інтерфейс сховища днів народження.
+
+    Списки, які повертає read(), можуть бути спільними з кешем — їх не можна змінювати.
+    """
+
+    async def exists(self, user_id: int) -> bool:
+        """Чи є у користувача збережені дані"""
+        raise NotImplementedError
+
+    async def version(self, user_id: int):
+        """Мітка версії даних користувача (None, якщо даних немає)"""
+        raise NotImplementedError
+
+    async def read(self, user_id: int) -> list[Birthday]:
+        """Повертає всі записи користувача (FileNotFoundError, якщо даних немає)"""
+        raise NotImplementedError
+
+    async def day_index(self, user_id: int) -> BirthdayIndex:
+        """Відсортований за днем року індекс записів користувача"""
+        return BirthdayIndex(await self.read(user_id))
+
+    async def upcoming(self, user_id: int, today: date, days: int) -> list[tuple[date, list[Birthday]]]:
+        """Дні народження користувача в найближчі days днів, згруповані за датою"""
+        return (await self.day_index(user_id)).upcoming(today, days)
+
+    async def name_index(self, user_id: int) -> NameIndex:
+        """Відсортований за ім'ям індекс записів користувача"""
+        return NameIndex(await self.read(user_id))
+
+    async def stats(self, user_id: int, today: date) -> BirthdayStats:
+        """Статистика записів користувача на дату today"""
+        return compute_stats(await self.read(user_id), today)
+
+    async def read_page(self, user_id: int, start: int, count: int) -> tuple[list[Birthday], int]:
+        """Записи [start, start + count) та загальна кількість записів"""
+        records = await self.read(user_id)
+        return records[start:start + count], len(records)
+
+    async def append(self, user_id: int, birthday: Birthday) -> None:
+        """Додає один запис у кінець списку"""
+        raise NotImplementedError
+
+    async def append_many(self, user_id: int, birthdays: list[Birthday]) -> None:
+        """Додає кілька записів у кінець списку одним записом (транзакцією)"""
+        for birthday in birthdays:
+            await self.append(user_id, birthday)
+
+    async def delete(self, user_id: int, index: int) -> Birthday:
+        """Видаляє запис за індексом (з нуля) і повертає його"""
+        raise NotImplementedError
+
+    async def scan(self) -> list[tuple[int, list[Birthday]]]:
+        """Повне читання всіх користувачів (для побудови глобальних індексів на старті)"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Звільняє ресурси сховища"""
+
+
+class JournalState:
+    """Розібраний стан журналу одного користувача для певної версії файлу:
+    id, записи та зсуви рядків у файлі для живих записів у порядку показу,
+    кількість пошкоджених рядків, які ще не перенесено в карантин, і чи змінювали
+    файл поза ботом (позначки видалення вказують не на ті рядки)"""
+
+    __slots__ = ('version', 'ids', 'records', 'offsets', 'next_id', 'entries', 'tombstones', 'malformed', 'edited')
+
+    def __init__(self, version, ids: array, records: BirthdayColumns, offsets: array,
+                 next_id: int, entries: int, tombstones: int, malformed: int = 0, edited: bool = False):
+        self.version = version
+        self.ids = ids
+        self.records = records
+        self.offsets = offsets
+        self.next_id = next_id
+        self.entries = entries
+        self.tombstones = tombstones
+        self.malformed = malformed
+        self.edited = edited
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Пошкоджені рядки треба перенести в карантин, а змінений вручну журнал —
+        переписати, щоб позначки видалення знову відповідали номерам рядків"""
+        return bool(self.malformed) or self.edited
+
+    @property
+    def tombstone_ratio(self) -> float:
+        return self.tombstones / self.entries if self.entries else 0.0
+
+
+class FileBirthdayStore(BirthdayStore):
+    """Сховище у вигляді текстового файлу-журналу на кожного користувача.
+
+    Кожен рядок журналу — або запис "Ім'я: день місяць рік" (старі файли є коректними
+    журналами), або позначка видалення "-<TAB><id><TAB><crc32>", де id — порядковий номер
+    рядка-запису, а crc32 — контрольна сума цього рядка (у старих позначках її немає).
+    Видалення лише дописує позначку в кінець файлу, а фонове ущільнення переписує
+    журнал, коли частка позначок перевищує compaction_ratio.
+
+    Якщо файл відредагували вручну і рядки зсунулись, контрольна сума не збігається
+    з рядком за номером id; тоді видаляється живий запис з тим самим вмістом (або
+    нічого, якщо такого вже немає), а журнал ущільнюється, щоб номери знову збігались.
+
+    Рядки розбираються й перевіряються один раз при завантаженні журналу, записи
+    зберігаються стовпцями (BirthdayColumns). Пошкоджені рядки при першому ж
+    завантаженні переносяться ущільненням у карантинний файл user_N.bad, тож
+    попередження про них не повторюються при кожному читанні.
+
+    Поруч із журналом лежить індекс user_N.idx: версія журналу та масив зсувів
+    (у байтах) рядків живих записів. Він доповнюється при додаванні й перебудовується
+    при ущільненні, тож сторінка списку читається прямо за зсувами. Видалення індекс
+    не переписує: поки стан журналу є в пам'яті, сторінки беруться з нього, а
+    застарілий індекс перебудовується при першому читанні сторінки без такого стану.
+
+    Уся робота з диском виконується в обмеженому пулі потоків, щоб повільне
+    читання чи перезапис файлу одного користувача не блокували цикл подій.
+
+    Повне сканування (scan) зберігає знімок розібраних записів із версіями файлів,
+    тож наступного разу перечитуються лише змінені файли; якщо таких багато
+    (від scan_parallel_threshold), вони розбираються паралельно в пулі процесів.
+    """
+
+    def __init__(self, directory: str = "user_data", max_workers: int = 4,
+                 compaction_ratio: float = 0.3, compaction_min_entries: int = 32, max_journals: int = 10000,
+                 scan_processes: int | None = None, scan_parallel_threshold: int = 1000, snapshot: bool = True):
+        self.directory = directory
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_entries = compaction_min_entries
+        self.max_journals = max_journals
+        self.scan_processes = scan_processes
+        self.scan_parallel_threshold = scan_parallel_threshold
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME) if snapshot else None
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+        self._journals = OrderedDict()  # user_id -> JournalState, щоб видалення не перечитувало файл
+        self._locks = UserLockManager()
+        self._compactions = {}  # user_id -> фонове завдання ущільнення
+
+    def get_user_file_path(self, user_id: int) -> str:
+        """Повертає шлях до файлу даних конкретного користувача"""
+        return os.path.join(self.directory, f"user_{user_id}.txt")
+
+    def get_user_index_path(self, user_id: int) -> str:
+        """Повертає шлях до індексу зсувів рядків конкретного користувача"""
+        return os.path.join(self.directory, f"user_{user_id}.idx")
+
+    def get_user_quarantine_path(self, user_id: int) -> str:
+        """Повертає шлях до файлу з пошкодженими рядками конкретного користувача"""
+        return os.path.join(self.directory, f"user_{user_id}.bad")
+
+    def _load_snapshot(self) -> tuple[int, dict]:
+        """Покоління та записи зі знімка попереднього сканування (порожньо, якщо знімка немає чи він пошкоджений)"""
+        if self.snapshot_path is None:
+            return 0, {}
+        try:
+            with open(self.snapshot_path, "rb") as file:
+                snapshot = pickle.load(file)
+            if snapshot['format'] == SNAPSHOT_FORMAT:
+                return snapshot['generation'], snapshot['users']
+            logger.info("Знімок сканування іншого формату, виконується повне сканування")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Не вдалося прочитати знімок сканування: {str(e)}")
+        return 0, {}
+
+    def _save_snapshot(self, generation: int, users: dict) -> None:
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "wb") as file:
+            pickle.dump(
+                {'format': SNAPSHOT_FORMAT, 'generation': generation, 'users': users},
+                file, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(temp_path, self.snapshot_path)
+
+    def _parse_changed(self, files: list[tuple[int, str]]) -> list[tuple[int, tuple, BirthdayColumns, bool]]:
+        if len(files) < self.scan_parallel_threshold or self.scan_processes == 1:
+            return _parse_files(files)
+
+        # Список файлів ділиться на частини, щоб процеси отримували роботу рівномірно
+        workers = self.scan_processes or os.cpu_count() or 1
+        chunk_size = max(1, -(-len(files) // (workers * 8)))
+        chunks = [files[start:start + chunk_size] for start in range(0, len(files), chunk_size)]
+        result = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for parsed in pool.map(_parse_files, chunks):
+                result.extend(parsed)
+        return result
+
+    def _scan(self) -> tuple[list[tuple[int, list[Birthday]]], list[int]]:
+        """(записи кожного користувача, id користувачів, чиї журнали треба ущільнити)"""
+        generation, previous = self._load_snapshot()
+        users = {}
+        changed = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                match = USER_FILE_PATTERN.match(entry.name)
+                if not match or not entry.is_file():
+                    continue
+                user_id = int(match.group(1))
+                stat = entry.stat()
+                cached = previous.get(user_id)
+                if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+                    users[user_id] = cached
+                else:
+                    changed.append((user_id, entry.path))
+
+        malformed = []
+        for user_id, version, records, needs_compaction in self._parse_changed(changed):
+            users[user_id] = (version, records)
+            if needs_compaction:
+                malformed.append(user_id)
+
+        if self.snapshot_path is not None and (changed or len(users) != len(previous)):
+            generation += 1
+            self._save_snapshot(generation, users)
+        logger.info(
+            f"Сканування {self.directory}: {len(users)} файлів, перечитано {len(changed)}, "
+            f"покоління знімка {generation}"
+        )
+        return [(user_id, records) for user_id, (_, records) in users.items()], malformed
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _remember(self, user_id: int, state: JournalState) -> None:
+        self._journals[user_id] = state
+        self._journals.move_to_end(user_id)
+        while len(self._journals) > self.max_journals:
+            self._journals.popitem(last=False)
+
+    async def exists(self, user_id: int) -> bool:
+        return await self._run(os.path.exists, self.get_user_file_path(user_id))
+
+    async def version(self, user_id: int):
+        return await self._run(self._version, self.get_user_file_path(user_id))
+
+    async def read(self, user_id: int) -> list[Birthday]:
+        state = await self._run(self._load, self.get_user_file_path(user_id))
+        self._remember(user_id, state)
+        if state.needs_compaction:
+            self._schedule_compaction(user_id)
+        return state.records
+
+    async def read_page(self, user_id: int, start: int, count: int) -> tuple[list[Birthday], int]:
+        # Під замком, бо застарілий індекс зсувів тут же перебудовується
+        async with self._locks.lock(user_id):
+            page, total, state = await self._run(
+                self._read_page, self.get_user_file_path(user_id), self.get_user_index_path(user_id),
+                start, count, self._journals.get(user_id)
+            )
+            if state is not None:
+                self._remember(user_id, state)
+            return page, total
+
+    async def append(self, user_id: int, birthday: Birthday) -> None:
+        await self.append_many(user_id, [birthday])
+
+    async def append_many(self, user_id: int, birthdays: list[Birthday]) -> None:
+        if not birthdays:
+            return
+        async with self._locks.lock(user_id):
+            self._journals.pop(user_id, None)
+            await self._run(
+                self._append, self.get_user_file_path(user_id), self.get_user_index_path(user_id), birthdays
+            )
+
+    async def delete(self, user_id: int, index: int) -> Birthday:
+        async with self._locks.lock(user_id):
+            state = self._journals.pop(user_id, None)
+            deleted, state = await self._run(self._delete, self.get_user_file_path(user_id), index, state)
+            self._remember(user_id, state)
+
+        if state.needs_compaction or (state.entries >= self.compaction_min_entries
+                               and state.tombstone_ratio > self.compaction_ratio):
+            self._schedule_compaction(user_id)
+        return deleted
+
+    def _schedule_compaction(self, user_id: int) -> None:
+        if user_id not in self._compactions:
+            self._compactions[user_id] = asyncio.create_task(self._compact_in_background(user_id))
+
+    async def _compact_in_background(self, user_id: int) -> None:
+        try:
+            async with self._locks.lock(user_id):
+                self._journals.pop(user_id, None)
+                await self._run(
+                    self._compact,
+                    self.get_user_file_path(user_id),
+                    self.get_user_index_path(user_id),
+                    self.get_user_quarantine_path(user_id)
+                )
+        except Exception as e:
+            logger.error(f"Помилка при ущільненні журналу користувача {user_id}: {str(e)}")
+        finally:
+            del self._compactions[user_id]
+
+    async def scan(self) -> list[tuple[int, list[Birthday]]]:
+        result, malformed = await self._run(self._scan)
+        for user_id in malformed:
+            self._schedule_compaction(user_id)
+        return result
+
+    async def close(self) -> None:
+        await asyncio.gather(*self._compactions.values(), return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _version(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _replay(path: str, lines) -> tuple[dict[int, tuple[Birthday, int]], dict[int, int], int, int, int, bool]:
+        """Відтворює журнал (рядки в байтах): повертає живі записи {id: (запис, зсув рядка)},
+        пошкоджені невидалені рядки {id: зсув}, наступний id, кількість рядків журналу
+        та позначок видалення і чи змінювали файл поза ботом"""
+        records = {}
+        malformed = {}
+        checksums = {}  # id -> контрольна сума рядка-запису
+        deleted = []  # (id, контрольна сума або None) з позначок
+        next_id = entries = tombstones = offset = 0
+        for line_number, raw_line in enumerate(lines):
+            line_offset = offset
+            offset += len(raw_line)
+            if not raw_line.strip():
+                continue
+            entries += 1
+            if raw_line.startswith(TOMBSTONE_MARK):
+                tombstones += 1
+                tombstone = parse_tombstone(raw_line.decode("utf-8", errors="replace"))
+                if tombstone is None:
+                    logger.warning(f"Пропущено пошкоджену позначку видалення {path}:{line_number + 1}")
+                else:
+                    deleted.append(tombstone)
+                continue
+
+            record_id = next_id
+            next_id += 1
+            checksums[record_id] = line_checksum(raw_line)
+            try:
+                records[record_id] = (parse_line(raw_line.decode("utf-8")), line_offset)
+            except ValueError:
+                malformed[record_id] = line_offset
+                text = raw_line.decode("utf-8", errors="replace").strip()
+                logger.warning(f"Пропущено пошкоджений рядок {path}:{line_number + 1}: {text}")
+
+        edited = False
+        by_checksum = None
+        for record_id, checksum in deleted:
+            if checksum is not None and checksums.get(record_id) != checksum:
+                # Рядки зсунуто ручним редагуванням: шукаємо живий запис з тим самим вмістом
+                edited = True
+                if by_checksum is None:
+                    by_checksum = {}
+                    for live_id, live_checksum in checksums.items():
+                        by_checksum.setdefault(live_checksum, []).append(live_id)
+                candidates = [live_id for live_id in by_checksum.get(checksum, ())
+                              if live_id in records or live_id in malformed]
+                if not candidates:
+                    logger.warning(f"Позначка видалення запису {record_id} у {path} не відповідає жодному рядку")
+                    continue
+                record_id = candidates[0]
+            records.pop(record_id, None)
+            malformed.pop(record_id, None)
+        if edited:
+            logger.warning(f"Журнал {path} змінено поза ботом, його буде ущільнено")
+        return records, malformed, next_id, entries, tombstones, edited
+
+    @classmethod
+    def _load(cls, path: str) -> JournalState:
+        with open(path, "rb") as file:
+            version = cls._version(path)
+            records, malformed, next_id, entries, tombstones, edited = cls._replay(path, file)
+            STORAGE_BYTES_READ.inc(file.tell())
+        return JournalState(
+            version,
+            array('Q', records),
+            BirthdayColumns(birthday for birthday, _ in records.values()),
+            array('Q', (offset for _, offset in records.values())),
+            next_id,
+            entries,
+            tombstones,
+            len(malformed),
+            edited
+        )
+
+    @classmethod
+    def _read(cls, path: str) -> list[Birthday]:
+        return cls._load(path).records
+
+    @staticmethod
+    def _write_index(index_path: str, version, offsets: array) -> None:
+        temp_path = f"{index_path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(INDEX_HEADER.pack(*version))
+            file.write(offsets.tobytes())
+        os.replace(temp_path, index_path)
+        STORAGE_BYTES_WRITTEN.inc(INDEX_HEADER.size + len(offsets) * OFFSET_SIZE)
+
+    @classmethod
+    def _read_index(cls, index_path: str, version, start: int, count: int) -> tuple[array, int] | None:
+        """Зсуви записів [start, start + count) та їх загальна кількість;
+        None, якщо індексу немає або він не відповідає поточній версії журналу"""
+        try:
+            with open(index_path, "rb") as file:
+                header = file.read(INDEX_HEADER.size)
+                if len(header) != INDEX_HEADER.size or INDEX_HEADER.unpack(header) != version:
+                    return None
+                total = (os.fstat(file.fileno()).st_size - INDEX_HEADER.size) // OFFSET_SIZE
+                offsets = array('Q')
+                if start < total:
+                    file.seek(INDEX_HEADER.size + start * OFFSET_SIZE)
+                    offsets.frombytes(file.read(min(count, total - start) * OFFSET_SIZE))
+                STORAGE_BYTES_READ.inc(INDEX_HEADER.size + len(offsets) * OFFSET_SIZE)
+                return offsets, total
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def _read_page(cls, path: str, index_path: str, start: int, count: int,
+                   state: JournalState | None) -> tuple[list[Birthday], int, JournalState | None]:
+        """Записи [start, start + count), їх загальна кількість і стан журналу,
+        якщо його довелося завантажити для перебудови індексу"""
+        version = cls._version(path)
+        if version is None:
+            raise FileNotFoundError(path)
+        if state is not None and state.version == version:
+            return state.records[start:start + count], len(state.records), None
+
+        page = cls._read_index(index_path, version, start, count)
+        if page is None:
+            # Індекс застарів (після видалення або ручного редагування) — перебудовуємо його
+            state = cls._load(path)
+            cls._write_index(index_path, state.version, state.offsets)
+            return state.records[start:start + count], len(state.records), state
+
+        offsets, total = page
+        if not offsets:
+            return [], total, None
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            records = []
+            for offset in offsets:
+                end = data.find(b"\n", offset)
+                line = data[offset:end if end != -1 else len(data)]
+                STORAGE_BYTES_READ.inc(len(line))
+                records.append(parse_line(line.decode("utf-8")))
+        return records, total, None
+
+    @classmethod
+    def _write_entries(cls, path: str, entries: list[str]) -> list[int]:
+        """Дописує рядки в журнал одним записом і повертає їх зсуви у файлі"""
+        with open(path, "a+b") as file:
+            offset = file.seek(0, os.SEEK_END)
+            # Якщо файл редагували вручну і останній рядок без переведення рядка — додаємо його
+            if offset > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    file.write(b"\n")
+                    offset += 1
+            lines = [f"{entry}\n".encode("utf-8") for entry in entries]
+            offsets = []
+            for line in lines:
+                offsets.append(offset)
+                offset += len(line)
+            data = b"".join(lines)
+            file.write(data)
+        STORAGE_BYTES_WRITTEN.inc(len(data))
+        return offsets
+
+    @classmethod
+    def _write_entry(cls, path: str, entry: str) -> int:
+        """Дописує рядок у журнал і повертає його зсув у файлі"""
+        return cls._write_entries(path, [entry])[0]
+
+    @classmethod
+    def _append(cls, path: str, index_path: str, birthdays: list[Birthday]) -> None:
+        old_version = cls._version(path)
+        offsets = array('Q', cls._write_entries(path, [str(birthday) for birthday in birthdays]))
+
+        # Доповнюємо індекс зсувів, лише якщо він відповідав журналу до запису
+        try:
+            with open(index_path, "r+b") as file:
+                header = file.read(INDEX_HEADER.size)
+                if len(header) != INDEX_HEADER.size or INDEX_HEADER.unpack(header) != old_version:
+                    return
+                file.seek(0, os.SEEK_END)
+                file.write(offsets.tobytes())
+                file.seek(0)
+                file.write(INDEX_HEADER.pack(*cls._version(path)))
+                STORAGE_BYTES_WRITTEN.inc(INDEX_HEADER.size + len(offsets) * OFFSET_SIZE)
+        except FileNotFoundError:
+            if old_version is None:
+                cls._write_index(index_path, cls._version(path), offsets)
+
+    @classmethod
+    def _delete(cls, path: str, index: int,
+                state: JournalState | None) -> tuple[Birthday, JournalState]:
+        # Розібраний стан журналу використовуємо, лише якщо файл відтоді не змінювався
+        if state is None or state.version != cls._version(path):
+            state = cls._load(path)
+
+        # Індекс рахується лише по живих коректних записах; IndexError, якщо такого запису вже немає
+        record_id, deleted = state.ids[index], state.records[index]
+        with open(path, "rb") as file:
+            file.seek(state.offsets[index])
+            raw_line = file.readline()
+        STORAGE_BYTES_READ.inc(len(raw_line))
+        cls._write_entry(path, f"{TOMBSTONE_PREFIX}{record_id}\t{line_checksum(raw_line):08x}")
+
+        state = JournalState(
+            cls._version(path),
+            state.ids[:index] + state.ids[index + 1:],
+            state.records.without(index),
+            state.offsets[:index] + state.offsets[index + 1:],
+            state.next_id,
+            state.entries + 1,
+            state.tombstones + 1,
+            state.malformed,
+            state.edited
+        )
+        # Індекс зсувів не переписується: він застаріває і перебудується при читанні сторінки
+        return deleted, state
+
+    @classmethod
+    def _compact(cls, path: str, index_path: str, quarantine_path: str) -> None:
+        """Переписує журнал без позначок видалення та видалених записів;
+        пошкоджені рядки дописуються в карантинний файл, щоб не втратити дані"""
+        with open(path, "rb") as file:
+            lines = file.readlines()
+        STORAGE_BYTES_READ.inc(sum(map(len, lines)))
+
+        # Позначки видалення розбираються так само, як при читанні (з перевіркою контрольних сум)
+        records, malformed, *_ = cls._replay(path, lines)
+        live = set(records) | set(malformed)
+        kept = []
+        quarantined = []
+        record_id = 0
+        for line in lines:
+            if not line.strip() or line.startswith(TOMBSTONE_MARK):
+                continue
+            if record_id in live:
+                line = line if line.endswith(b"\n") else line + b"\n"
+                (quarantined if record_id in malformed else kept).append(line)
+            record_id += 1
+
+        # Карантин пишеться першим: якщо збій станеться до заміни журналу, рядок
+        # опиниться в обох файлах, але не зникне
+        if quarantined:
+            with open(quarantine_path, "ab") as file:
+                file.writelines(quarantined)
+                file.flush()
+                os.fsync(file.fileno())
+            STORAGE_BYTES_WRITTEN.inc(sum(map(len, quarantined)))
+            logger.warning(f"{len(quarantined)} пошкоджених рядків з {path} перенесено в {quarantine_path}")
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.writelines(kept)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+        STORAGE_BYTES_WRITTEN.inc(sum(map(len, kept)))
+
+        state = cls._load(path)
+        cls._write_index(index_path, state.version, state.offsets)
+        logger.info(f"Журнал {path} ущільнено: {len(lines)} -> {len(kept)} рядків")
+
+
+def _parse_files(files: list[tuple[int, str]]) -> list[tuple[int, tuple, BirthdayColumns, bool]]:
+    """Розбирає файли користувачів; виконується і в окремих процесах, тому на рівні модуля"""
+    result = []
+    for user_id, path in files:
+        try:
+            state = FileBirthdayStore._load(path)
+        except FileNotFoundError:
+            continue
+        result.append((user_id, state.version, state.records, state.needs_compaction))
+    return result
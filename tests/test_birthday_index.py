@@ -0,0 +1,91 @@
+from datetime import date
+
+from birthday_index import BirthdayIndex, NameIndex, normalize_name
+from records import Birthday
+
+NEW_YEAR = [
+    Birthday("Грудень-30", 30, 12, 1980),
+    Birthday("Грудень-31", 31, 12, 1981),
+    Birthday("Січень-1", 1, 1, 1982),
+    Birthday("Січень-3", 3, 1, 1983),
+    Birthday("Січень-4", 4, 1, 1984),
+]
+
+
+def dates(groups) -> list[date]:
+    return [birthday_date for birthday_date, _ in groups]
+
+
+def test_upcoming_covers_exactly_n_days():
+    index = BirthdayIndex(NEW_YEAR)
+    assert dates(index.upcoming(date(2026, 12, 30), 1)) == [date(2026, 12, 30)]
+    # 5 днів: 30, 31 грудня, 1, 2, 3 січня — 4 січня вже не входить
+    assert dates(index.upcoming(date(2026, 12, 30), 5)) == [
+        date(2026, 12, 30), date(2026, 12, 31), date(2027, 1, 1), date(2027, 1, 3)
+    ]
+
+
+def test_upcoming_across_new_year():
+    index = BirthdayIndex(NEW_YEAR)
+    groups = index.upcoming(date(2026, 12, 31), 4)
+    assert groups == [
+        (date(2026, 12, 31), [NEW_YEAR[1]]),
+        (date(2027, 1, 1), [NEW_YEAR[2]]),
+        (date(2027, 1, 3), [NEW_YEAR[3]]),
+    ]
+
+
+def test_upcoming_full_year_does_not_repeat_today():
+    index = BirthdayIndex(NEW_YEAR)
+    groups = index.upcoming(date(2026, 12, 30), 365)
+    assert dates(groups) == [
+        date(2026, 12, 30), date(2026, 12, 31), date(2027, 1, 1), date(2027, 1, 3), date(2027, 1, 4)
+    ]
+
+
+def test_february_29_in_non_leap_year():
+    leap_day = Birthday("Високосна", 29, 2, 2000)
+    index = BirthdayIndex([leap_day, Birthday("Лютий-28", 28, 2, 1990)])
+    # У 2027 році 29 лютого святкується 28 лютого, разом з іншими записами цього дня
+    assert index.upcoming(date(2027, 2, 20), 9) == [(date(2027, 2, 28), [index.records[0], index.records[1]])]
+    # Діапазон, що закінчується 27 лютого, 29 лютого не містить
+    assert index.upcoming(date(2027, 2, 20), 8) == []
+    # Від 1 березня — наступне 29 лютого у 2028 році (високосному)
+    assert dates(index.upcoming(date(2027, 3, 1), 366)) == [date(2028, 2, 28), date(2028, 2, 29)]
+    assert index.nearest(date(2027, 3, 1)) == (date(2028, 2, 28), [Birthday("Лютий-28", 28, 2, 1990)])
+
+
+APOSTROPHE_NAMES = [
+    Birthday("Мар'яна", 1, 3, 1990),
+    Birthday("Мар’ян", 2, 3, 1991),
+    Birthday("Марʼяна Коваль", 3, 3, 1992),
+    Birthday("Марта", 4, 3, 1993),
+    Birthday("МАР`ЯНКА", 5, 3, 1994),
+]
+
+
+def test_normalize_name_unifies_apostrophes_and_case():
+    variants = ["Мар'яна", "Мар’яна", "Марʼяна", "Мар‘яна", "Мар`яна", "Мар´яна", "  МАР'ЯНА "]
+    assert {normalize_name(name) for name in variants} == {"мар'яна"}
+
+
+def test_name_search_ignores_apostrophe_variant():
+    index = NameIndex(APOSTROPHE_NAMES)
+    for prefix in ("мар'я", "Мар’я", "МАРʼЯ", "мар`я"):
+        found, total = index.search(prefix, 0, 10)
+        assert total == 4
+        assert set(found) == set(APOSTROPHE_NAMES) - {APOSTROPHE_NAMES[3]}
+    assert index.search("мар", 0, 10)[1] == 5
+    assert index.search("мар'янка", 0, 10) == ([APOSTROPHE_NAMES[4]], 1)
+
+
+def test_name_search_pages_and_updates():
+    index = NameIndex(APOSTROPHE_NAMES)
+    first, total = index.search("мар'", 0, 2)
+    second, _ = index.search("мар'", 2, 2)
+    assert total == 4 and len(first) == 2 and len(second) == 2
+    assert not set(first) & set(second)
+    index.remove(APOSTROPHE_NAMES[1])
+    index.add(Birthday("Мар’яна", 6, 3, 1995))
+    assert index.search("мар'яна", 0, 10)[1] == 3
+    assert len(index) == 5
@@ -0,0 +1,68 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import birthday_stats
+from birthday_stats import compute_stats
+from records import Birthday
+
+TODAYS = [date(2026, 10, 18), date(2026, 12, 31), date(2027, 2, 28), date(2028, 2, 29), date(2028, 3, 1)]
+
+
+def random_records(count: int, seed: int = 1) -> list[Birthday]:
+    generator = random.Random(seed)
+    records = []
+    for i in range(count):
+        month = generator.randint(1, 12)
+        day = generator.randint(1, 29 if month == 2 else 30)
+        records.append(Birthday(f"Людина {i}", day, month, generator.randint(1920, 2025)))
+    # Граничні дати: 29 лютого, кінець і початок року, ювілеї
+    records += [Birthday("Високосна", 29, 2, 1996), Birthday("Новорічна", 31, 12, 1976),
+                Birthday("Січнева", 1, 1, 1977), Birthday("Сьогодні", 18, 10, 1996)]
+    return records
+
+
+def as_tuple(stats) -> tuple:
+    return (stats.today, stats.total, stats.months, stats.ages, stats.milestones, stats.milestone_count, stats.weeks)
+
+
+def compute_without_numpy(records, today, monkeypatch) -> tuple:
+    with monkeypatch.context() as patch:
+        patch.setattr(birthday_stats, 'numpy', None)
+        return as_tuple(compute_stats(records, today))
+
+
+@pytest.mark.parametrize("today", TODAYS)
+def test_numpy_and_array_paths_agree(today, monkeypatch):
+    pytest.importorskip("numpy")
+    records = random_records(2000)
+    assert as_tuple(compute_stats(records, today)) == compute_without_numpy(records, today, monkeypatch)
+
+
+def test_stats_by_hand(monkeypatch):
+    today = date(2026, 10, 18)
+    records = [
+        Birthday("Сьогодні", 18, 10, 1996),  # виповнюється 30 сьогодні
+        Birthday("Завтра", 19, 10, 1986),  # виповниться 40 завтра, поки 39
+        Birthday("Вчора", 17, 10, 2008),  # уже 18, наступний ювілей не скоро
+        Birthday("Високосна", 29, 2, 1977),  # 50 — 28 лютого 2027, бо рік не високосний
+    ]
+    stats = compute_stats(records, today)
+    assert as_tuple(stats) == compute_without_numpy(records, today, monkeypatch)
+    assert stats.total == 4
+    assert stats.months[9] == 3 and stats.months[1] == 1
+    assert stats.ages[1] == 1 and stats.ages[3] == 2 and stats.ages[4] == 1
+    assert [(when, birthday.name, turning) for when, birthday, turning in stats.milestones] == [
+        (today, "Сьогодні", 30), (date(2026, 10, 19), "Завтра", 40), (date(2027, 2, 28), "Високосна", 50)
+    ]
+    assert stats.milestone_count == 3
+    # 18 жовтня 2026 — неділя, тож «Завтра» вже наступного тижня; за рівної кількості раніший тиждень перший
+    monday = today - timedelta(days=today.weekday())
+    assert stats.weeks == [(monday, 1), (monday + timedelta(weeks=1), 1), (date(2027, 2, 22), 1)]
+
+
+def test_empty_list(monkeypatch):
+    stats = compute_stats([], date(2026, 10, 18))
+    assert as_tuple(stats) == compute_without_numpy([], date(2026, 10, 18), monkeypatch)
+    assert stats.total == 0 and stats.milestones == [] and stats.weeks == []
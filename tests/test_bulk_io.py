@@ -0,0 +1,78 @@
+import io
+
+from bulk_io import detect_format, export_to_file, iter_csv, iter_ics, read_import
+from records import Birthday
+
+YEAR = 2026
+
+
+def csv_rows(text: str) -> list:
+    return list(iter_csv(io.StringIO(text), YEAR))
+
+
+def ics_rows(text: str) -> list:
+    return list(iter_ics(io.StringIO(text), YEAR))
+
+
+def test_detect_format():
+    assert detect_format("dates.CSV", None) == 'csv'
+    assert detect_format(None, "text/calendar") == 'ics'
+    assert detect_format("dates.txt", "text/plain") is None
+
+
+def test_csv_header_and_columns():
+    rows = csv_rows("ім'я,день,місяць,рік\nАнна,5,Травень,1990\nБогдан,17,12,1985\n")
+    assert rows == [(2, Birthday("Анна", 5, 5, 1990)), (3, Birthday("Богдан", 17, 12, 1985))]
+
+
+def test_csv_semicolon_delimiter_and_date_column():
+    rows = csv_rows("Анна;1990-05-17\nБогдан, Іванович;17.05.1985\n\n")
+    assert rows == [(1, Birthday("Анна", 17, 5, 1990)), (2, Birthday("Богдан, Іванович", 17, 5, 1985))]
+
+
+def test_csv_row_errors_keep_row_numbers():
+    rows = csv_rows("Анна,5,5,1990\nБогдан,40,5,1990\nВіра,5,Травнень,1990\nГалина\nДмитро,05/17/1990\n")
+    assert rows[0] == (1, Birthday("Анна", 5, 5, 1990))
+    assert [(number, type(result)) for number, result in rows[1:]] == [(2, str), (3, str), (4, str), (5, str)]
+    assert "від 1 до 31" in rows[1][1]
+    assert "невідомий місяць" in rows[2][1]
+    assert "невідомий формат дати" in rows[4][1]
+
+
+def test_ics_unfolds_continuation_lines():
+    text = (
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART;VALUE=DATE:19900517\r\n"
+        "SUMMARY:Олександра \r\n"
+        " Петрівна\\, сестра\r\n"
+        "END:VEVENT\r\n"
+        "BEGIN:VEVENT\r\n"
+        "SUMMARY:Без дати\r\n"
+        "END:VEVENT\r\n"
+        "END:VCALENDAR\r\n"
+    )
+    assert ics_rows(text) == [
+        (2, Birthday("Олександра Петрівна, сестра", 17, 5, 1990)),
+        (7, "немає дати DTSTART"),
+    ]
+
+
+def test_export_import_round_trip(tmp_path):
+    records = [Birthday("Анна; \"Ганнуся\"", 29, 2, 2000), Birthday("Довге ім'я " * 10, 1, 1, 1990)]
+    for file_format in ('csv', 'ics'):
+        path = tmp_path / f"export.{file_format}"
+        with export_to_file(records, file_format, 1) as file:
+            path.write_bytes(file.read())
+        imported, errors = read_import(str(path), file_format, YEAR, 100)
+        assert errors == []
+        assert [(birthday.day, birthday.month, birthday.year) for birthday in imported] == [(29, 2, 2000), (1, 1, 1990)]
+        assert [birthday.name for birthday in imported] == [record.name.strip() for record in records]
+
+
+def test_import_stops_at_record_limit(tmp_path):
+    path = tmp_path / "many.csv"
+    path.write_text("".join(f"Людина {i},1,1,1990\n" for i in range(5)), encoding="utf-8")
+    records, errors = read_import(str(path), 'csv', YEAR, 3)
+    assert len(records) == 3
+    assert errors == [(4, "перевищено ліміт у 3 записів, решту файлу пропущено")]
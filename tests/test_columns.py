@@ -0,0 +1,67 @@
+import pytest
+
+from columns import BirthdayColumns, DayColumns
+from records import Birthday
+
+PEOPLE = [
+    Birthday("Анна", 5, 5, 1990),
+    Birthday("Богдан Іванович", 29, 2, 2000),
+    Birthday("Zoë", 31, 12, 1985),
+]
+
+
+def test_behaves_like_a_list():
+    columns = BirthdayColumns(PEOPLE)
+    assert len(columns) == 3
+    assert list(columns) == PEOPLE
+    assert columns == PEOPLE
+    assert columns[-1] == PEOPLE[-1]
+    assert columns[1:] == PEOPLE[1:]
+    with pytest.raises(IndexError):
+        columns[3]
+    assert BirthdayColumns.of(columns) is columns
+
+
+def test_appended_returns_a_copy():
+    columns = BirthdayColumns(PEOPLE[:1])
+    longer = columns.appended(PEOPLE[1:])
+    assert columns == PEOPLE[:1]
+    assert longer == PEOPLE
+    assert columns + [PEOPLE[2]] == [PEOPLE[0], PEOPLE[2]]
+
+
+@pytest.mark.parametrize("index", range(len(PEOPLE)))
+def test_without_keeps_other_names_intact(index):
+    columns = BirthdayColumns(PEOPLE)
+    shorter = columns.without(index)
+    assert shorter == PEOPLE[:index] + PEOPLE[index + 1:]
+    assert columns == PEOPLE
+    # Після видалення з середини імена з багатобайтовими символами не зсуваються
+    assert shorter.appended([PEOPLE[index]]) == PEOPLE[:index] + PEOPLE[index + 1:] + [PEOPLE[index]]
+
+
+def test_without_rejects_bad_index():
+    with pytest.raises(IndexError):
+        BirthdayColumns(PEOPLE).without(3)
+    with pytest.raises(IndexError):
+        BirthdayColumns(PEOPLE).without(-1)
+
+
+def test_day_columns_remove_and_compact():
+    day = DayColumns()
+    for user_id in range(40):
+        day.add(user_id, f"Ім'я {user_id}", 1990)
+    assert day.remove(3, "Ім'я 3", 1990)
+    assert not day.remove(3, "Ім'я 3", 1990)
+    assert not day.remove(4, "Ім'я 4", 1991)
+    for user_id in range(10, 20):
+        assert day.remove(user_id, f"Ім'я {user_id}", 1990)
+    # 11 видалених із 40 — більше чверті, але менше 32, тож масиви ще не переписано
+    assert len(day.owners) == 40 and day.dead == 11
+    for user_id in range(20, 40):
+        day.remove(user_id, f"Ім'я {user_id}", 1990)
+    assert day.dead == 31
+    day.remove(0, "Ім'я 0", 1990)
+    assert len(day.owners) == 8 and day.dead == 0
+    assert list(day) == [(user_id, f"Ім'я {user_id}", 1990) for user_id in (1, 2, 4, 5, 6, 7, 8, 9)]
+    assert len(day) == 8
@@ -0,0 +1,29 @@
+import asyncio
+from types import SimpleNamespace
+
+from telegram.ext import ConversationHandler
+
+import main
+
+
+class NoFileStore:
+    async def read(self, user_id: int):
+        raise FileNotFoundError(user_id)
+
+
+class Message:
+    def __init__(self):
+        self.from_user = SimpleNamespace(id=1)
+        self.chat_id = 1
+        self.replies = []
+
+    async def reply_text(self, text: str, **kwargs):
+        self.replies.append(text)
+
+
+def test_delete_without_saved_dates(monkeypatch):
+    monkeypatch.setattr(main, 'store', NoFileStore())
+    message = Message()
+    state = asyncio.run(main.delete_birthday_start(SimpleNamespace(message=message), SimpleNamespace(user_data={})))
+    assert state == ConversationHandler.END
+    assert message.replies == ["У вас немає збережених дат."]
@@ -0,0 +1,60 @@
+import asyncio
+
+from dispatcher import OutboundDispatcher, SCHEDULED
+from fake_bot import FakeBot
+
+
+def busiest_second(times: list[float]) -> int:
+    """Найбільша кількість відправок за будь-яку секунду — так рахує FakeBot"""
+    return max(sum(1 for other in times if time - 1 < other <= time) for time in times)
+
+
+def run(dispatcher: OutboundDispatcher, bot: FakeBot, chat_ids: list[int]) -> None:
+    async def scenario():
+        await dispatcher.initialize()
+        try:
+            await asyncio.gather(*(bot.send_message(chat_id, f"msg {chat_id}", rate_limit_args=SCHEDULED)
+                                   for chat_id in chat_ids))
+        finally:
+            await dispatcher.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_global_rate_respected():
+    dispatcher = OutboundDispatcher(global_rate=50, chat_rate=1, chat_burst=3)
+    bot = FakeBot(dispatcher, global_limit=50)
+    run(dispatcher, bot, list(range(1, 81)))
+
+    assert len(bot.sent) == 80
+    assert bot.rejected == 0
+    assert busiest_second([time for time, _, _ in bot.sent]) <= 50
+
+
+def test_chat_limit_respected_without_blocking_other_chats():
+    dispatcher = OutboundDispatcher(global_rate=1000, chat_rate=10, chat_burst=3)
+    bot = FakeBot(dispatcher, global_limit=1000, chat_limit=10, chat_burst=3)
+    run(dispatcher, bot, [1] * 20 + [2] * 5)
+
+    assert len(bot.sent) == 25
+    assert bot.rejected == 0
+    for chat_id in (1, 2):
+        assert busiest_second([time for time, chat, _ in bot.sent if chat == chat_id]) <= 10 + 3
+    # Черга чату 1 не затримує чат 2
+    last = {chat: time for time, chat, _ in bot.sent}
+    assert last[2] < last[1]
+
+
+def test_retry_after_pauses_and_resends():
+    # Диспетчер не знає справжнього ліміту «сервера», тож отримує RetryAfter(1)
+    dispatcher = OutboundDispatcher(global_rate=1000, chat_rate=1, chat_burst=3)
+    bot = FakeBot(dispatcher, global_limit=5)
+    run(dispatcher, bot, list(range(1, 9)))
+
+    assert len(bot.sent) == 8
+    assert bot.rejected >= 1
+    assert dispatcher.retries >= 1
+    times = [time for time, _, _ in bot.sent]
+    # Після відмови нічого не надсилається, доки не мине retry_after
+    assert times[5] - times[4] >= 0.99
+    assert busiest_second(times) <= 5
@@ -0,0 +1,195 @@
+import asyncio
+
+from records import Birthday
+from storage import FileBirthdayStore, INDEX_HEADER, TOMBSTONE_PREFIX
+
+PEOPLE = [Birthday(name, day, month, 1990) for name, day, month in
+          [("Анна", 1, 1), ("Богдан", 2, 2), ("Віра", 3, 3), ("Галина", 4, 4), ("Дмитро", 5, 5), ("Олег", 6, 6)]]
+
+
+def make_store(tmp_path, **kwargs) -> FileBirthdayStore:
+    return FileBirthdayStore(str(tmp_path), snapshot=False, **kwargs)
+
+
+def run(store: FileBirthdayStore, scenario):
+    """Виконує сценарій і чекає фонових ущільнень (close)"""
+    async def wrapped():
+        try:
+            return await scenario(store)
+        finally:
+            await store.close()
+
+    return asyncio.run(wrapped())
+
+
+def journal_lines(store: FileBirthdayStore, user_id: int = 1) -> list[str]:
+    with open(store.get_user_file_path(user_id), encoding="utf-8") as file:
+        return file.read().splitlines()
+
+
+def test_append_delete_compaction(tmp_path):
+    store = make_store(tmp_path, compaction_ratio=0.3, compaction_min_entries=8)
+
+    async def scenario(store):
+        await store.append_many(1, PEOPLE)
+        assert await store.delete(1, 1) == PEOPLE[1]
+        assert await store.delete(1, 0) == PEOPLE[0]
+        # Видалення лише дописують позначки, ущільнення ще не запускалось
+        assert sum(line.startswith(TOMBSTONE_PREFIX) for line in journal_lines(store)) == 2
+        assert await store.delete(1, 2) == PEOPLE[4]
+        return list(await store.read(1))
+
+    remaining = [PEOPLE[2], PEOPLE[3], PEOPLE[5]]
+    assert run(store, scenario) == remaining
+    # 3 позначки з 9 рядків > 0.3: журнал переписано без позначок і видалених записів
+    assert journal_lines(store) == [str(birthday) for birthday in remaining]
+
+    async def reread(store):
+        return list(await store.read(1)), await store.read_page(1, 1, 5)
+
+    records, (page, total) = run(make_store(tmp_path), reread)
+    assert records == remaining
+    assert (page, total) == (remaining[1:], 3)
+
+
+def test_missing_final_newline(tmp_path):
+    store = make_store(tmp_path)
+    with open(store.get_user_file_path(1), "w", encoding="utf-8") as file:
+        file.write(str(PEOPLE[0]))
+
+    async def scenario(store):
+        await store.append(1, PEOPLE[1])
+        await store.delete(1, 0)
+        return list(await store.read(1))
+
+    assert run(store, scenario) == [PEOPLE[1]]
+    lines = journal_lines(store)
+    assert lines[:2] == [str(PEOPLE[0]), str(PEOPLE[1])]
+    assert lines[2].startswith(f"{TOMBSTONE_PREFIX}0\t")
+
+
+def test_malformed_line_is_quarantined(tmp_path):
+    store = make_store(tmp_path)
+    with open(store.get_user_file_path(1), "w", encoding="utf-8") as file:
+        file.write(f"{PEOPLE[0]}\nбез дати\n{PEOPLE[1]}\n")
+
+    async def scenario(store):
+        records = list(await store.read(1))
+        # Індекси видалення рахуються лише по коректних записах
+        assert await store.delete(1, 1) == PEOPLE[1]
+        return records
+
+    assert run(store, scenario) == [PEOPLE[0], PEOPLE[1]]
+    assert journal_lines(store) == [str(PEOPLE[0])]
+    with open(store.get_user_quarantine_path(1), encoding="utf-8") as file:
+        assert file.read() == "без дати\n"
+
+
+def test_tombstones_survive_hand_edits(tmp_path):
+    store = make_store(tmp_path)
+
+    async def delete_second(store):
+        await store.append_many(1, PEOPLE[:4])
+        await store.delete(1, 1)
+
+    run(store, delete_second)
+    # Рядок, вставлений вручну на початок, зсуває номери записів після нього
+    lines = journal_lines(store)
+    with open(store.get_user_file_path(1), "w", encoding="utf-8") as file:
+        file.write("\n".join([str(PEOPLE[5])] + lines) + "\n")
+
+    async def read(store):
+        return list(await store.read(1))
+
+    expected = [PEOPLE[5], PEOPLE[0], PEOPLE[2], PEOPLE[3]]
+    store = make_store(tmp_path)
+    assert run(store, read) == expected
+    # Змінений поза ботом журнал ущільнено, позначок більше немає
+    assert journal_lines(store) == [str(birthday) for birthday in expected]
+
+
+def test_legacy_tombstone_without_checksum(tmp_path):
+    store = make_store(tmp_path)
+    with open(store.get_user_file_path(1), "w", encoding="utf-8") as file:
+        file.write(f"{PEOPLE[0]}\n{PEOPLE[1]}\n{TOMBSTONE_PREFIX}0\n")
+
+    async def read(store):
+        return list(await store.read(1))
+
+    assert run(store, read) == [PEOPLE[1]]
+
+
+def index_header(store: FileBirthdayStore, user_id: int = 1):
+    with open(store.get_user_index_path(user_id), "rb") as file:
+        return INDEX_HEADER.unpack(file.read(INDEX_HEADER.size))
+
+
+def many(count: int) -> list[Birthday]:
+    return [Birthday(f"Людина {i}", i % 28 + 1, i % 12 + 1, 1950 + i % 50) for i in range(count)]
+
+
+def test_read_page_from_index(tmp_path):
+    records = many(25)
+
+    async def fill(store):
+        await store.append_many(1, records[:20])
+        await store.append_many(1, records[20:])
+
+    store = make_store(tmp_path)
+    run(store, fill)
+    # Додавання доповнює індекс, і він відповідає поточній версії журналу
+    assert index_header(store) == FileBirthdayStore._version(store.get_user_file_path(1))
+
+    async def pages(store):
+        return [await store.read_page(1, start, 10) for start in (0, 10, 20, 30)]
+
+    assert run(make_store(tmp_path), pages) == [
+        (records[:10], 25), (records[10:20], 25), (records[20:], 25), ([], 25)
+    ]
+
+
+def test_delete_leaves_index_stale_until_page_read(tmp_path):
+    records = many(300)
+    store = make_store(tmp_path)
+
+    async def fill(store):
+        await store.append_many(1, records)
+
+    run(store, fill)
+    with open(store.get_user_index_path(1), "rb") as file:
+        index_before = file.read()
+
+    async def delete_and_page(store):
+        await store.read(1)
+        await store.delete(1, 0)
+        return await store.read_page(1, 0, 3)
+
+    store = make_store(tmp_path)
+    # Сторінка після видалення береться зі стану журналу в пам'яті
+    assert run(store, delete_and_page) == (records[1:4], 299)
+    with open(store.get_user_index_path(1), "rb") as file:
+        assert file.read() == index_before
+
+    async def page(store):
+        return await store.read_page(1, 297, 5)
+
+    # Без стану в пам'яті застарілий індекс перебудовується
+    assert run(make_store(tmp_path), page) == (records[298:], 299)
+    assert index_header(store) == FileBirthdayStore._version(store.get_user_file_path(1))
+
+
+def test_hand_edited_journal_rebuilds_index(tmp_path):
+    store = make_store(tmp_path)
+
+    async def fill(store):
+        await store.append_many(1, PEOPLE[:3])
+
+    run(store, fill)
+    with open(store.get_user_file_path(1), "a", encoding="utf-8") as file:
+        file.write(f"{PEOPLE[5]}\n")
+
+    async def page(store):
+        return await store.read_page(1, 2, 5)
+
+    assert run(make_store(tmp_path), page) == ([PEOPLE[2], PEOPLE[5]], 4)
+    assert index_header(store) == FileBirthdayStore._version(store.get_user_file_path(1))
@@ -0,0 +1,72 @@
+import asyncio
+
+from persistence import SqlitePersistence
+
+
+def make_persistence(tmp_path, flush_delay=0.05) -> tuple:
+    persistence = SqlitePersistence(str(tmp_path / "state.db"), flush_delay=flush_delay)
+    writes = []
+    original = persistence._write
+
+    def counting_write(users, conversations):
+        writes.append((dict(users), dict(conversations)))
+        original(users, conversations)
+
+    persistence._write = counting_write
+    return persistence, writes
+
+
+def test_changes_are_batched_into_one_delayed_write(tmp_path):
+    async def scenario():
+        persistence, writes = make_persistence(tmp_path)
+        await persistence.update_user_data(1, {"zone": "Europe/Kyiv"})
+        await persistence.update_user_data(2, {"zone": "UTC"})
+        await persistence.update_conversation("add", (1, 1), 3)
+        assert writes == []
+        await asyncio.sleep(0.2)
+        assert len(writes) == 1
+        assert set(writes[0][0]) == {1, 2}
+        await persistence.flush()
+
+    asyncio.run(scenario())
+
+
+def test_unchanged_data_is_not_written(tmp_path):
+    async def scenario():
+        persistence, writes = make_persistence(tmp_path)
+        await persistence.update_user_data(1, {"zone": "UTC"})
+        await asyncio.sleep(0.2)
+        await persistence.update_user_data(1, {"zone": "UTC"})
+        await asyncio.sleep(0.2)
+        assert len(writes) == 1
+        # Зміна, яку повернули до записаного стану до запису, скасовується
+        await persistence.update_user_data(1, {"zone": "Europe/Kyiv"})
+        await persistence.update_user_data(1, {"zone": "UTC"})
+        await asyncio.sleep(0.2)
+        assert len(writes) == 1
+        await persistence.flush()
+
+    asyncio.run(scenario())
+
+
+def test_data_survives_restart_and_loads_lazily(tmp_path):
+    async def scenario():
+        persistence, writes = make_persistence(tmp_path, flush_delay=60)
+        await persistence.update_user_data(1, {"zone": "UTC"})
+        await persistence.update_conversation("add", (1, 1), 3)
+        await persistence.flush()
+        assert len(writes) == 1
+
+        persistence, writes = make_persistence(tmp_path)
+        assert await persistence.get_user_data() == {}
+        user_data = {}
+        await persistence.refresh_user_data(1, user_data)
+        assert user_data == {"zone": "UTC"}
+        assert await persistence.get_conversations("add") == {(1, 1): 3}
+        # Дані, щойно прочитані з бази, повторно не пишуться
+        await persistence.update_user_data(1, user_data)
+        await persistence.drop_user_data(2)
+        await persistence.flush()
+        assert writes == [({2: None}, {})]
+
+    asyncio.run(scenario())
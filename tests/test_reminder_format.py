@@ -0,0 +1,36 @@
+import asyncio
+from datetime import date, time
+
+import pytest
+
+from reminders import format_reminder, ReminderScheduler, ZonedCalendar
+from user_settings import UserSettings
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        self.sent.append((chat_id, text, kwargs))
+
+
+@pytest.mark.parametrize("days", [0, 1, 5])
+def test_names_are_html_escaped(days):
+    text = format_reminder(days, date(2026, 5, 12), ["Tom & <b>", "Оля"])
+    assert "Tom &amp; &lt;b&gt;" in text
+    assert "Tom & <b>" not in text
+    assert "Оля" in text
+
+
+def test_send_uses_escaped_text(tmp_path):
+    bot = RecordingBot()
+    settings = UserSettings(str(tmp_path / "settings.json"), (0, 1))
+    scheduler = ReminderScheduler(ZonedCalendar(settings.get_timezone), settings, time(9, 0))
+    reminder = (0, date(2026, 5, 12), ["<script>", "A&B"])
+    asyncio.run(scheduler._send(bot, 42, [reminder]))
+
+    (chat_id, text, kwargs), = bot.sent
+    assert chat_id == 42
+    assert kwargs['parse_mode'] == 'HTML'
+    assert "&lt;script&gt;" in text and "A&amp;B" in text
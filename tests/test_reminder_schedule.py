@@ -0,0 +1,198 @@
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from clock import ManualClock
+from records import Birthday
+from reminders import ReminderScheduler, ZonedCalendar
+from user_settings import UserSettings
+
+DELIVERY_TIME = time(9, 0)
+TICK = timedelta(minutes=15)
+
+# Користувач -> часовий пояс: з переходом на літній час і з нецілогодинними зміщеннями
+ZONES = {
+    1: 'Europe/Kyiv',
+    2: 'America/New_York',
+    3: 'Asia/Kathmandu',  # +5:45
+    4: 'Asia/Kolkata',  # +5:30
+}
+
+
+class RecordingBot:
+    """Запам'ятовує, кому й коли (за годинником планувальника) надіслано нагадування"""
+
+    def __init__(self, clock: ManualClock):
+        self.clock = clock
+        self.sent = defaultdict(list)  # user_id -> [UTC-час відправки]
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        self.sent[chat_id].append(self.clock.now())
+
+
+def every_day() -> list[Birthday]:
+    """По запису на кожен день року, щоб нагадування було щодня"""
+    return [Birthday(f"Д{month}-{day}", day, month, 1990) for month in range(1, 13) for day in range(1, 32)
+            if (month, day) not in ((2, 30), (2, 31), (4, 31), (6, 31), (9, 31), (11, 31))]
+
+
+@pytest.fixture
+def scheduler_parts(tmp_path):
+    settings = UserSettings(str(tmp_path / "settings.json"), (0,), 'Europe/Kyiv')
+
+    async def configure():
+        for user_id, zone in ZONES.items():
+            await settings.set_timezone(user_id, zone)
+
+    asyncio.run(configure())
+    calendar = ZonedCalendar(settings.get_timezone)
+    for user_id in ZONES:
+        for birthday in every_day():
+            calendar.add(user_id, birthday)
+    clock = ManualClock(datetime(2026, 1, 1, tzinfo=timezone.utc))
+    scheduler = ReminderScheduler(calendar, settings, DELIVERY_TIME, TICK, clock, str(tmp_path / "state.json"))
+    return scheduler, calendar, settings, clock
+
+
+def run(scheduler: ReminderScheduler, clock: ManualClock, start: datetime, end: datetime) -> RecordingBot:
+    """Викликає розсилку на кожному такті від start до end, як JobQueue.run_repeating"""
+    bot = RecordingBot(clock)
+    context = SimpleNamespace(bot=bot)
+    clock.set(start)
+
+    async def ticks():
+        while clock.now() < end:
+            await scheduler.send_reminders(context)
+            clock.advance(TICK)
+
+    asyncio.run(ticks())
+    return bot
+
+
+def restart(scheduler: ReminderScheduler) -> ReminderScheduler:
+    """Новий планувальник з тим самим файлом стану, як після перезапуску бота"""
+    restarted = ReminderScheduler(scheduler.calendar, scheduler.settings, scheduler.delivery_time,
+                                  scheduler.tick, scheduler.clock, scheduler.state_path)
+    restarted.load_state()
+    return restarted
+
+
+def send_missed(scheduler: ReminderScheduler) -> RecordingBot:
+    bot = RecordingBot(scheduler.clock)
+    asyncio.run(scheduler.send_missed(SimpleNamespace(bot=bot)))
+    return bot
+
+
+def expected_days(zone: str, start: datetime, end: datetime) -> list[date]:
+    """Місцеві дати, чия 09:00 потрапляє в [start, end)"""
+    tz = ZoneInfo(zone)
+    result = []
+    day = start.astimezone(tz).date() - timedelta(days=1)
+    while day <= end.astimezone(tz).date():
+        moment = datetime.combine(day, DELIVERY_TIME, tzinfo=tz)
+        if start <= moment < end:
+            result.append(day)
+        day += timedelta(days=1)
+    return result
+
+
+@pytest.mark.parametrize("start", [
+    datetime(2026, 3, 7, tzinfo=timezone.utc),  # New York: літній час з 8 березня
+    datetime(2026, 3, 28, tzinfo=timezone.utc),  # Київ: літній час з 29 березня
+    datetime(2026, 10, 24, tzinfo=timezone.utc),  # Київ: зимовий час з 25 жовтня
+    datetime(2026, 10, 31, tzinfo=timezone.utc),  # New York: зимовий час з 1 листопада
+])
+def test_one_reminder_per_local_day_at_delivery_time(scheduler_parts, start):
+    scheduler, _, _, clock = scheduler_parts
+    end = start + timedelta(days=3)
+    bot = run(scheduler, clock, start, end)
+
+    for user_id, zone in ZONES.items():
+        local_times = [moment.astimezone(ZoneInfo(zone)) for moment in bot.sent[user_id]]
+        assert all(local.time() == DELIVERY_TIME for local in local_times), (zone, local_times)
+        assert [local.date() for local in local_times] == expected_days(zone, start, end)
+
+
+def test_reminder_is_for_local_date(scheduler_parts):
+    scheduler, _, _, clock = scheduler_parts
+    # 03:15 UTC: у Катманду вже 09:00 2 квітня, у Нью-Йорку ще 1 квітня, ніч
+    clock.set(datetime(2026, 4, 2, 3, 15, tzinfo=timezone.utc))
+    due = scheduler.collect()
+    assert set(due) == {3}
+    assert due[3] == [(0, date(2026, 4, 2), ["Д4-2"])]
+    # Той самий такт удруге нічого не надсилає
+    assert scheduler.collect() == {}
+
+
+def test_zones_grouped_by_current_offset(scheduler_parts):
+    scheduler, _, _, _ = scheduler_parts
+    winter = scheduler.buckets(datetime(2026, 3, 7, 12, tzinfo=timezone.utc))
+    summer = scheduler.buckets(datetime(2026, 3, 9, 12, tzinfo=timezone.utc))
+    assert winter[timedelta(hours=-5)] == ['America/New_York']
+    assert summer[timedelta(hours=-4)] == ['America/New_York']
+    assert winter[timedelta(hours=5, minutes=45)] == ['Asia/Kathmandu']
+    assert winter[timedelta(hours=5, minutes=30)] == ['Asia/Kolkata']
+
+
+def test_timezone_change_moves_reminders(scheduler_parts):
+    scheduler, calendar, settings, clock = scheduler_parts
+    records = every_day()
+    asyncio.run(settings.set_timezone(2, 'Asia/Kathmandu'))
+    calendar.move(2, records, 'America/New_York', 'Asia/Kathmandu')
+    assert 'America/New_York' not in calendar.zones
+
+    start = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    bot = run(scheduler, clock, start, start + timedelta(days=1))
+    assert bot.sent[2] == bot.sent[3] == [datetime(2026, 6, 1, 3, 15, tzinfo=timezone.utc)]
+
+
+def test_restart_same_day_does_not_repeat(scheduler_parts):
+    scheduler, _, _, clock = scheduler_parts
+    start = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    first = run(scheduler, clock, start, start + timedelta(hours=12))
+    assert len(first.sent[1]) == 1  # Київ: 06:00 UTC
+
+    # Перезапуск о 12:00 UTC того ж дня: ні пропущеної, ні повторної розсилки для Києва
+    scheduler = restart(scheduler)
+    assert 1 not in send_missed(scheduler).sent
+    assert 1 not in run(scheduler, clock, start + timedelta(hours=12), start + timedelta(days=1)).sent
+
+
+def test_restart_over_delivery_time_sends_missed_day(scheduler_parts):
+    scheduler, _, _, clock = scheduler_parts
+    start = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    run(scheduler, clock, start, start + timedelta(days=1))
+
+    # Бот не працював 2 червня з 05:00 до 07:00 UTC — 09:00 у Києві минула без розсилки
+    clock.set(datetime(2026, 6, 2, 7, tzinfo=timezone.utc))
+    scheduler = restart(scheduler)
+    assert scheduler.missed()[1] == [(0, date(2026, 6, 2), ["Д6-2"])]
+    # Для Нью-Йорка 09:00 2 червня ще не настала — надішле звичайний такт
+    assert 2 not in scheduler.missed()
+
+    later = run(scheduler, clock, clock.now(), datetime(2026, 6, 3, tzinfo=timezone.utc))
+    assert 1 not in later.sent
+    assert later.sent[2] == [datetime(2026, 6, 2, 13, tzinfo=timezone.utc)]
+
+
+def test_missed_days_skip_past_birthdays(scheduler_parts):
+    scheduler, _, settings, clock = scheduler_parts
+    asyncio.run(settings.set_offsets(1, (0, 1)))
+    clock.set(datetime(2026, 6, 1, 6, 5, tzinfo=timezone.utc))
+    run(scheduler, clock, clock.now(), clock.now() + TICK)
+
+    # Три дні простою: минулі дні народження пропускаються, відлік — від сьогодні
+    clock.set(datetime(2026, 6, 4, 10, tzinfo=timezone.utc))
+    scheduler = restart(scheduler)
+    assert scheduler.missed()[1] == [(0, date(2026, 6, 4), ["Д6-4"]), (1, date(2026, 6, 5), ["Д6-5"])]
+    assert scheduler.missed() == {}
+
+
+def test_no_saved_state_sends_nothing_missed(scheduler_parts):
+    scheduler, _, _, clock = scheduler_parts
+    clock.set(datetime(2026, 6, 4, 10, tzinfo=timezone.utc))
+    assert send_missed(scheduler).sent == {}
@@ -0,0 +1,58 @@
+import html
+
+import pytest
+
+from records import Birthday
+from rendering import RenderCache, iter_chunks, numbered_lines, shorten, text_length, with_header
+
+
+def test_text_length_counts_utf16_units():
+    assert text_length("Анна") == 4
+    assert text_length("🎂") == 2
+    assert text_length("Анна 🎂") == 7
+
+
+def test_chunks_respect_utf16_limit():
+    # Кожен емодзі — дві одиниці UTF-16, тож у символах Python рядки вдвічі коротші за ліміт
+    lines = [f"{i}. " + "🎂" * 30 for i in range(200)]
+    chunks = list(iter_chunks(lines, limit=500, first_limit=300))
+    assert text_length(chunks[0]) <= 300
+    assert all(text_length(chunk) <= 500 for chunk in chunks[1:])
+    assert len(chunks) > 2
+    assert "\n".join(chunks).split("\n") == lines
+
+
+def test_line_longer_than_message_is_shortened():
+    line = "1. " + "🎂" * 100
+    chunks = list(iter_chunks([line, "2. Анна"], limit=100, first_limit=50))
+    assert chunks[0].startswith("1. 🎂") and chunks[0].endswith("…")
+    assert text_length(chunks[0]) <= 49
+    assert chunks[1:] == ["2. Анна"]
+
+
+@pytest.mark.parametrize("limit", range(8, 40))
+def test_shorten_does_not_cut_html_entity(limit):
+    line = html.escape("1. Том & Джеррі <кіт> \"миша\" 🎂")
+    shortened = shorten(line, limit)
+    assert text_length(shortened) <= limit
+    assert shortened.endswith("…")
+    body = shortened[:-1]
+    # Після обрізання лишаються лише цілі сутності
+    assert html.escape(html.unescape(body)) == body
+
+
+def test_render_cache_reuses_and_evicts():
+    cache = RenderCache(max_entries=2)
+    records = [Birthday("Анна & Ко", 5, 5, 1990)]
+    chunks = cache.render(1, 1, records)
+    assert chunks == ("1. Анна &amp; Ко: 5 Травень 1990",)
+    assert cache.render(1, 1, []) is chunks
+    cache.render(2, 1, records)
+    cache.render(3, 1, records)
+    assert cache.render(1, 1, []) == ("",)
+    assert with_header("Дати:", chunks)[0].startswith("Дати:\n1. ")
+
+
+def test_numbered_lines_escape_html():
+    lines = list(numbered_lines([Birthday("<b>", 1, 1, 2000)]))
+    assert lines[0].startswith("1. &lt;b&gt;")
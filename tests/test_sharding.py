@@ -0,0 +1,151 @@
+import json
+import os
+import zlib
+
+import pytest
+
+import config
+import rebalance
+from persistence import SCHEMA as PERSISTENCE_SCHEMA
+from sharding import configure_shard, shard_dir, shard_file, shard_of, update_owner
+from sqlite_store import SCHEMA as SQLITE_SCHEMA, connect
+
+USERS = [1, 2, 3, 42, 1000, 123456789, -100500]
+
+
+def test_shard_of_is_crc32_of_user_id():
+    for user_id in USERS:
+        assert shard_of(user_id, 4) == zlib.crc32(str(user_id).encode("ascii")) % 4
+    # Значення зафіксовані: зміна хешу переселила б користувачів без перенесення даних
+    assert [shard_of(user_id, 4) for user_id in USERS] == [3, 1, 3, 0, 3, 2, 1]
+    assert all(shard_of(user_id, 1) == 0 for user_id in USERS)
+    assert {shard_of(user_id, 4) for user_id in range(100)} == {0, 1, 2, 3}
+
+
+def test_update_owner():
+    assert update_owner({'update_id': 1, 'message': {'from': {'id': 7}, 'chat': {'id': -5}}}) == 7
+    assert update_owner({'update_id': 2, 'callback_query': {'id': 'x', 'from': {'id': 8}}}) == 8
+    assert update_owner({'update_id': 3, 'channel_post': {'chat': {'id': -9}}}) == -9
+    assert update_owner({'update_id': 4, 'poll': {'id': 'p'}}) == 0
+
+
+def test_shard_paths():
+    assert shard_dir("user_data", 0, 1) == "user_data"
+    assert shard_dir("user_data", 2, 4) == os.path.join("user_data", "shard-2-of-4")
+    assert shard_file("bot_state.db", 0, 1) == "bot_state.db"
+    assert shard_file("bot_state.db", 1, 4) == "bot_state.shard-1-of-4.db"
+
+
+def test_configure_shard_splits_resources(monkeypatch):
+    for name in ('USER_DATA_DIR', 'SQLITE_PATH', 'PERSISTENCE_PATH', 'USER_SETTINGS_PATH', 'REMINDER_STATE_PATH',
+                 'OUTBOUND_GLOBAL_RATE', 'CACHE_MAX_USERS', 'CACHE_MAX_RECORDS', 'RENDER_CACHE_MAX_CHARS',
+                 'METRICS_PORT'):
+        monkeypatch.setattr(config, name, getattr(config, name))
+    monkeypatch.setattr(config, 'METRICS_PORT', 9000)
+    configure_shard(1, 2)
+    assert config.USER_DATA_DIR.endswith("shard-1-of-2")
+    assert config.SQLITE_PATH == "birthdays.shard-1-of-2.db"
+    assert config.REMINDER_STATE_PATH == "reminder_state.shard-1-of-2.json"
+    assert config.OUTBOUND_GLOBAL_RATE == 15
+    assert config.METRICS_PORT == 9001
+
+
+@pytest.fixture
+def layout(tmp_path, monkeypatch):
+    """Дані бота в tmp_path: rebalance бере шляхи з config при імпорті"""
+    paths = {
+        'USER_DATA_DIR': str(tmp_path / "user_data"),
+        'SQLITE_PATH': str(tmp_path / "birthdays.db"),
+        'PERSISTENCE_PATH': str(tmp_path / "bot_state.db"),
+        'USER_SETTINGS_PATH': str(tmp_path / "user_settings.json"),
+        'REMINDER_STATE_PATH': str(tmp_path / "reminder_state.json"),
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(rebalance, name, path)
+    return paths
+
+
+def write_single_shard(paths) -> None:
+    os.makedirs(paths['USER_DATA_DIR'])
+    for user_id in USERS:
+        for extension in ("txt", "idx"):
+            with open(os.path.join(paths['USER_DATA_DIR'], f"user_{user_id}.{extension}"), "w") as file:
+                file.write(f"{user_id}\n")
+    with open(os.path.join(paths['USER_DATA_DIR'], "notes.txt"), "w") as file:
+        file.write("не дані користувача\n")
+    with open(paths['USER_SETTINGS_PATH'], "w", encoding="utf-8") as file:
+        json.dump({str(user_id): {'hour': user_id % 24} for user_id in USERS}, file)
+    with open(paths['REMINDER_STATE_PATH'], "w", encoding="utf-8") as file:
+        json.dump({'Europe/Kyiv': '2026-10-17', 'UTC': '2026-10-16'}, file)
+    connection = connect(paths['PERSISTENCE_PATH'], PERSISTENCE_SCHEMA)
+    for user_id in USERS:
+        connection.execute("INSERT INTO user_data VALUES (?, ?)", (user_id, json.dumps({'id': user_id})))
+        connection.execute("INSERT INTO conversations VALUES ('add', ?, '1')", (json.dumps([user_id, user_id]),))
+    connection.close()
+    connection = connect(paths['SQLITE_PATH'], SQLITE_SCHEMA)
+    for user_id in USERS:
+        connection.execute("INSERT INTO users VALUES (?, 1)", (user_id,))
+        for name in ("Перший", "Другий"):
+            connection.execute("INSERT INTO birthdays (user_id, name, day, month, year) VALUES (?, ?, 1, 1, 1990)",
+                               (user_id, f"{name} {user_id}"))
+    connection.close()
+
+
+def owners(path: str, query: str) -> list:
+    if not os.path.exists(path):
+        return []
+    connection = connect(path)
+    try:
+        return [row[0] for row in connection.execute(query)]
+    finally:
+        connection.close()
+
+
+def check_layout(paths, count: int) -> None:
+    for index in range(count):
+        directory = shard_dir(paths['USER_DATA_DIR'], index, count)
+        expected = {f"user_{user_id}.{extension}" for user_id in USERS if shard_of(user_id, count) == index
+                    for extension in ("txt", "idx")}
+        names = set(os.listdir(directory)) - {"notes.txt"} if os.path.isdir(directory) else set()
+        assert names == expected
+        for name in expected:
+            with open(os.path.join(directory, name)) as file:
+                assert file.read() == name[5:].split(".")[0] + "\n"
+
+        user_data = owners(shard_file(paths['PERSISTENCE_PATH'], index, count), "SELECT user_id FROM user_data")
+        assert sorted(user_data) == sorted(u for u in USERS if shard_of(u, count) == index)
+        records = owners(shard_file(paths['SQLITE_PATH'], index, count), "SELECT name FROM birthdays ORDER BY id")
+        # Порядок записів кожного користувача зберігається
+        for user_id in USERS:
+            mine = [name for name in records if name.endswith(f" {user_id}")]
+            assert mine == ([f"Перший {user_id}", f"Другий {user_id}"] if shard_of(user_id, count) == index else [])
+
+        with open(shard_file(paths['USER_SETTINGS_PATH'], index, count), encoding="utf-8") as file:
+            assert sorted(map(int, json.load(file))) == sorted(u for u in USERS if shard_of(u, count) == index)
+        with open(shard_file(paths['REMINDER_STATE_PATH'], index, count), encoding="utf-8") as file:
+            assert json.load(file) == {'Europe/Kyiv': '2026-10-17', 'UTC': '2026-10-16'}
+
+
+def test_rebalance_moves_data_between_layouts(layout):
+    write_single_shard(layout)
+    rebalance.rebalance(1, 3)
+    check_layout(layout, 3)
+    # Старих баз і налаштувань одного шарда не лишилося
+    assert not os.path.exists(layout['PERSISTENCE_PATH'])
+    assert not os.path.exists(layout['USER_SETTINGS_PATH'])
+    rebalance.rebalance(3, 2)
+    check_layout(layout, 2)
+    assert not any(name.startswith("shard-") and name.endswith("of-3") for name in os.listdir(layout['USER_DATA_DIR']))
+    rebalance.rebalance(2, 1)
+    check_layout(layout, 1)
+    assert os.path.exists(os.path.join(layout['USER_DATA_DIR'], "notes.txt"))
+
+
+def test_rebalance_keeps_earliest_delivery_date(layout):
+    for index, day in enumerate(('2026-10-17', '2026-10-15')):
+        with open(shard_file(layout['REMINDER_STATE_PATH'], index, 2), "w", encoding="utf-8") as file:
+            json.dump({'UTC': day}, file)
+    assert rebalance.split_reminder_state(2, 3) == 1
+    for index in range(3):
+        with open(shard_file(layout['REMINDER_STATE_PATH'], index, 3), encoding="utf-8") as file:
+            assert json.load(file) == {'UTC': '2026-10-15'}
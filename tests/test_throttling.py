@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import throttling
+from throttling import InboundThrottle, RATE_LIMITED_TEXT
+from update_processor import PerUserUpdateProcessor
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class Replies:
+    def __init__(self):
+        self.texts = []
+
+    async def reply_text(self, text: str, **kwargs):
+        self.texts.append(text)
+
+    async def answer(self, text: str | None = None, **kwargs):
+        self.texts.append(text)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(throttling, 'time', fake)
+    return fake
+
+
+def message_from(user_id: int, replies: Replies | None = None):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=user_id), callback_query=None,
+                           effective_message=replies or Replies())
+
+
+def button_from(user_id: int, message_id: int, data: str, replies: Replies | None = None):
+    replies = replies or Replies()
+    query = SimpleNamespace(data=data, message=SimpleNamespace(message_id=message_id), inline_message_id=None,
+                            answer=replies.answer)
+    return SimpleNamespace(effective_user=SimpleNamespace(id=user_id), callback_query=query,
+                           effective_message=query.message)
+
+
+def test_token_bucket_burst_then_rate(clock):
+    throttle = InboundThrottle(rate=2, burst=3)
+    assert [throttle.check(message_from(1)) for _ in range(4)] == [None, None, None, 'rate']
+    # Інший користувач має власне відро
+    assert throttle.check(message_from(2)) is None
+
+    clock.now += 0.5  # один токен за 1 / rate секунд
+    assert throttle.check(message_from(1)) is None
+    assert throttle.check(message_from(1)) == 'rate'
+    clock.now += 10
+    assert [throttle.check(message_from(1)) for _ in range(4)] == [None, None, None, 'rate']
+
+
+def test_duplicate_callback_is_coalesced(clock):
+    throttle = InboundThrottle(rate=100, burst=100)
+    first = button_from(1, 7, "page_2")
+    assert throttle.check(first) is None
+    assert throttle.check(button_from(1, 7, "page_2")) == 'duplicate'
+    # Інша кнопка, інше повідомлення чи інший користувач — не дублікат
+    assert throttle.check(button_from(1, 7, "page_3")) is None
+    assert throttle.check(button_from(1, 8, "page_2")) is None
+    assert throttle.check(button_from(2, 7, "page_2")) is None
+
+    replies = Replies()
+    asyncio.run(throttle.reject(button_from(1, 7, "page_2", replies), 'duplicate'))
+    assert replies.texts == [None]  # лише прибрати індикатор, без тексту
+
+    throttle.done(first)
+    assert throttle.check(button_from(1, 7, "page_2")) is None
+
+
+def test_please_wait_sent_once_per_refill(clock):
+    throttle = InboundThrottle(rate=1, burst=1)
+    replies = Replies()
+
+    def flood():
+        for _ in range(3):
+            update = message_from(1, replies)
+            reason = throttle.check(update)
+            if reason is not None:
+                asyncio.run(throttle.reject(update, reason))
+
+    flood()
+    assert replies.texts == [RATE_LIMITED_TEXT]
+    clock.now += 1  # відро відновилось: наступне відкинуте знову отримає відповідь
+    flood()
+    assert replies.texts == [RATE_LIMITED_TEXT] * 2
+
+    # Натискання кнопки понад ліміт відповідається щоразу, інакше в клієнті крутиться індикатор
+    button_replies = Replies()
+    for _ in range(2):
+        update = button_from(1, 7, "page_2", button_replies)
+        asyncio.run(throttle.reject(update, throttle.check(update)))
+    assert button_replies.texts == [RATE_LIMITED_TEXT] * 2
+
+
+def test_flooding_user_holds_one_slot():
+    async def scenario():
+        processor = PerUserUpdateProcessor(2, InboundThrottle(rate=2, burst=10))
+        release = asyncio.Event()
+        replies = Replies()
+        handled = []
+
+        async def blocked():
+            await release.wait()
+            handled.append(1)
+
+        async def quick():
+            handled.append(2)
+
+        flood = [asyncio.create_task(processor.process_update(message_from(1, replies), blocked()))
+                 for _ in range(30)]
+        await asyncio.sleep(0)
+        assert processor.current_concurrent_updates == 1
+        await asyncio.wait_for(processor.process_update(message_from(2), quick()), timeout=1)
+
+        release.set()
+        await asyncio.gather(*flood)
+        assert handled == [2] + [1] * 10
+        assert replies.texts == [RATE_LIMITED_TEXT]
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+from telegram.ext import BaseUpdateProcessor
+
+from update_processor import PerUserUpdateProcessor
+
+
+def update_from(user_id: int):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=user_id), callback_query=None)
+
+
+def test_process_update_is_not_overridden():
+    assert PerUserUpdateProcessor.process_update is BaseUpdateProcessor.process_update
+
+
+def test_same_user_serialized_other_users_concurrent():
+    events = []
+
+    async def handle(name: str):
+        events.append(f"start {name}")
+        await asyncio.sleep(0.01)
+        events.append(f"end {name}")
+
+    async def scenario():
+        processor = PerUserUpdateProcessor(8)
+        await asyncio.gather(
+            processor.process_update(update_from(1), handle("1a")),
+            processor.process_update(update_from(1), handle("1b")),
+            processor.process_update(update_from(2), handle("2")),
+        )
+
+    asyncio.run(scenario())
+    # Оновлення користувача 1 — по черзі, користувач 2 не чекає на нього
+    assert events.index("end 1a") < events.index("start 1b")
+    assert events.index("start 2") < events.index("end 1a")
+
+
+def test_queued_updates_of_one_user_do_not_hold_slots():
+    async def scenario():
+        processor = PerUserUpdateProcessor(2)
+        release = asyncio.Event()
+        handled = []
+
+        async def blocked(name: str):
+            await release.wait()
+            handled.append(name)
+
+        async def quick():
+            handled.append("other user")
+
+        busy = [asyncio.create_task(processor.process_update(update_from(1), blocked(f"1-{i}")))
+                for i in range(5)]
+        await asyncio.sleep(0)
+        # Перше оновлення виконується, решта чекає в черзі користувача без слота
+        assert processor.current_concurrent_updates == 1
+        await asyncio.wait_for(processor.process_update(update_from(2), quick()), timeout=1)
+        assert handled == ["other user"]
+
+        release.set()
+        await asyncio.gather(*busy)
+        assert handled[1:] == [f"1-{i}" for i in range(5)]
+        assert processor.current_concurrent_updates == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_update_does_not_stop_user_queue():
+    handled = []
+
+    async def failing():
+        raise RuntimeError("handler failed")
+
+    async def handle():
+        handled.append("next")
+
+    async def scenario():
+        processor = PerUserUpdateProcessor(4)
+        await asyncio.gather(
+            processor.process_update(update_from(1), failing()),
+            processor.process_update(update_from(1), handle()),
+        )
+
+    asyncio.run(scenario())
+    assert handled == ["next"]
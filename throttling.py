@@ -0,0 +1,92 @@
+import logging
+import time
+
+from telegram.error import TelegramError
+
+from dispatcher import TokenBucket
+from metrics import INBOUND_THROTTLED
+
+logger = logging.getLogger(__name__)
+
+# Як часто забувати відра користувачів, що давно нічого не надсилали, с
+FORGET_INTERVAL = 60
+
+RATE_LIMITED_TEXT = "⏳ Забагато запитів. Зачекайте кілька секунд."
+
+
+class InboundThrottle:
+    """Обмеження вхідних оновлень на користувача, до того як вони потраплять в обробники.
+
+    Кожен користувач має відро токенів (rate оновлень за секунду, burst про запас);
+    оновлення понад ліміт відкидаються з короткою відповіддю «зачекайте», яка
+    надсилається лише раз, доки ліміт не відновиться. Натискання тієї самої кнопки,
+    поки попереднє таке саме ще обробляється, не обробляється вдруге.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # user_id -> TokenBucket
+        self._warned = set()  # користувачі, яким уже відповіли «зачекайте»
+        self._in_flight = set()  # (user_id, id повідомлення, callback_data) кнопок, що обробляються
+        self._forget_at = 0.0
+
+    def _bucket(self, user_id: int, now: float) -> TokenBucket:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.rate, self.burst, now)
+        return bucket
+
+    def _forget_idle(self, now: float) -> None:
+        """Повні відра нічим не відрізняються від нових, тож їх можна не тримати в пам'яті"""
+        for user_id in [user_id for user_id, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[user_id]
+            self._warned.discard(user_id)
+
+    @staticmethod
+    def callback_key(update) -> tuple | None:
+        query = update.callback_query
+        if query is None:
+            return None
+        message_id = query.message.message_id if query.message is not None else query.inline_message_id
+        return update.effective_user.id, message_id, query.data
+
+    def check(self, update) -> str | None:
+        """None, якщо оновлення можна обробляти, інакше причина відмови: 'duplicate' або 'rate'.
+        Для дозволеного натискання кнопки після обробки треба викликати done()"""
+        user_id = update.effective_user.id
+        key = self.callback_key(update)
+        if key is not None and key in self._in_flight:
+            return 'duplicate'
+
+        now = time.monotonic()
+        if now >= self._forget_at:
+            self._forget_idle(now)
+            self._forget_at = now + FORGET_INTERVAL
+        bucket = self._bucket(user_id, now)
+        if bucket.wait_time(now) > 0:
+            return 'rate'
+        bucket.take(now)
+        self._warned.discard(user_id)
+        if key is not None:
+            self._in_flight.add(key)
+        return None
+
+    def done(self, update) -> None:
+        key = self.callback_key(update)
+        if key is not None:
+            self._in_flight.discard(key)
+
+    async def reject(self, update, reason: str) -> None:
+        """Дешева відповідь на відкинуте оновлення без звернення до сховища"""
+        INBOUND_THROTTLED.labels(reason).inc()
+        user_id = update.effective_user.id
+        try:
+            if update.callback_query is not None:
+                # На натискання кнопки треба відповісти, інакше в клієнті крутиться індикатор
+                await update.callback_query.answer(RATE_LIMITED_TEXT if reason == 'rate' else None)
+            elif reason == 'rate' and user_id not in self._warned and update.effective_message is not None:
+                self._warned.add(user_id)
+                await update.effective_message.reply_text(RATE_LIMITED_TEXT)
+        except TelegramError as e:
+            logger.debug(f"Не вдалося відповісти на відкинуте оновлення від {user_id}: {str(e)}")
@@ -0,0 +1,79 @@
+import logging
+from collections import deque
+
+from telegram.ext import BaseUpdateProcessor
+
+from throttling import InboundThrottle
+
+logger = logging.getLogger(__name__)
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Паралельна обробка оновлень: різні користувачі обробляються одночасно
+    (не більше max_concurrent_updates), а оновлення одного користувача — по черзі,
+    щоб ConversationHandler бачив їх у правильному порядку.
+
+    Кожен користувач займає не більше одного слота: якщо його оновлення вже
+    обробляється, наступне лише стає в чергу користувача і слот одразу звільняється,
+    а чергу по порядку виконує той самий таск, що вже тримає слот.
+
+    Якщо передано throttle, оновлення понад ліміт користувача відкидаються ще
+    до черги, тож флуд одного користувача не доходить до сховища, а відповідь
+    «зачекайте» виконується в його ж слоті, якщо він зайнятий.
+
+    Підключається через Application.builder().concurrent_updates(...).
+    process_update (слот семафора) лишається за PTB, уся логіка — в do_process_update.
+    """
+
+    def __init__(self, max_concurrent_updates: int, throttle: InboundThrottle | None = None):
+        super().__init__(max_concurrent_updates)
+        self.throttle = throttle
+        self._pending = {}  # user_id -> deque[(корутина, оновлення для throttle.done або None)]
+
+    async def do_process_update(self, update, coroutine) -> None:
+        user = getattr(update, 'effective_user', None)
+        if user is None:
+            await coroutine
+            return
+
+        accepted = update
+        if self.throttle is not None:
+            reason = self.throttle.check(update)
+            if reason is not None:
+                coroutine.close()
+                coroutine, accepted = self.throttle.reject(update, reason), None
+
+        pending = self._pending.get(user.id)
+        if pending is not None:
+            pending.append((coroutine, accepted))
+            return
+
+        pending = self._pending[user.id] = deque([(coroutine, accepted)])
+        try:
+            while pending:
+                await self._run(*pending.popleft())
+        finally:
+            del self._pending[user.id]
+            # Лишається непорожньою, лише якщо таск скасовано
+            for coroutine, accepted in pending:
+                coroutine.close()
+                self._done(accepted)
+
+    async def _run(self, coroutine, update) -> None:
+        try:
+            await coroutine
+        except Exception:
+            # Помилка одного оновлення не повинна зупинити решту черги користувача
+            logger.exception("Помилка обробки оновлення")
+        finally:
+            self._done(update)
+
+    def _done(self, update) -> None:
+        if update is not None and self.throttle is not None:
+            self.throttle.done(update)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from storage import atomic_write
+
+
+def parse_timezone(name: str) -> str:
+    """Назва часового поясу IANA (Europe/Kyiv); ValueError, якщо такого поясу немає"""
+    try:
+        return ZoneInfo(name.strip()).key
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"невідомий часовий пояс: {name}")
+
+
+class UserSettings:
+    """Налаштування нагадувань користувачів: відступи та часовий пояс.
+
+    Зберігаються лише відмінні від типових значення, тож навіть для великої
+    кількості користувачів файл і словник у пам'яті лишаються невеликими.
+    """
+
+    def __init__(self, path: str, default_offsets: tuple[int, ...], default_timezone: str = "Europe/Kyiv"):
+        self.path = path
+        self.default_offsets = tuple(sorted(set(default_offsets)))
+        self.default_timezone = parse_timezone(default_timezone)
+        self._offsets = {}  # user_id -> tuple[int, ...]
+        self._offset_usage = Counter()  # скільки користувачів використовує кожен відступ
+        self._timezones = {}  # user_id -> назва поясу
+        self._lock = asyncio.Lock()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        for user_id, settings in data.items():
+            if 'offsets' in settings:
+                self._set_offsets(int(user_id), tuple(settings['offsets']))
+            if 'timezone' in settings:
+                self._set_timezone(int(user_id), settings['timezone'])
+
+    def _dump(self) -> dict:
+        data = {}
+        for user_id, offsets in self._offsets.items():
+            data.setdefault(str(user_id), {})['offsets'] = list(offsets)
+        for user_id, timezone in self._timezones.items():
+            data.setdefault(str(user_id), {})['timezone'] = timezone
+        return data
+
+    async def save(self) -> None:
+        async with self._lock:
+            await asyncio.to_thread(atomic_write, self.path, json.dumps(self._dump(), ensure_ascii=False))
+
+    def get_offsets(self, user_id: int) -> tuple[int, ...]:
+        """За скільки днів до дати нагадувати користувачу (0 — у сам день)"""
+        return self._offsets.get(user_id, self.default_offsets)
+
+    def _set_offsets(self, user_id: int, offsets: tuple[int, ...]) -> None:
+        self._offset_usage.subtract(self._offsets.pop(user_id, ()))
+        offsets = tuple(sorted(set(offsets)))
+        if offsets != self.default_offsets:
+            self._offsets[user_id] = offsets
+            self._offset_usage.update(offsets)
+
+    async def set_offsets(self, user_id: int, offsets) -> None:
+        self._set_offsets(user_id, tuple(offsets))
+        await self.save()
+
+    def get_timezone(self, user_id: int) -> str:
+        return self._timezones.get(user_id, self.default_timezone)
+
+    def _set_timezone(self, user_id: int, timezone: str) -> None:
+        timezone = parse_timezone(timezone)
+        if timezone != self.default_timezone:
+            self._timezones[user_id] = timezone
+        else:
+            self._timezones.pop(user_id, None)
+
+    async def set_timezone(self, user_id: int, timezone: str) -> None:
+        self._set_timezone(user_id, timezone)
+        await self.save()
+
+    def local_now(self, user_id: int, now: datetime) -> datetime:
+        """Поточний час у поясі користувача; now — час з годинника (UTC)"""
+        return now.astimezone(ZoneInfo(self.get_timezone(user_id)))
+
+    def all_offsets(self) -> set[int]:
+        """Усі відступи, які використовує хоча б один користувач"""
+        return set(self.default_offsets) | {offset for offset, count in self._offset_usage.items() if count > 0}